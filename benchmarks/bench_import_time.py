@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark czasu importu (python -X importtime) dla punktów wejścia CLI/GUI.
+
+Dla każdego modułu uruchamia świeży interpreter, sumuje czas importu
+i sprawdza, czy nie zostały załadowane ciężkie zależności (torch,
+faster_whisper, yt_dlp, openai, instructor, gradio). Kończy się kodem 1,
+jeśli budżet czasu zostanie przekroczony albo ciężki moduł wróci do startu.
+
+UŻYCIE:
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --repeat 5 --slack 2.0
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("torch", "faster_whisper", "ctranslate2", "yt_dlp", "openai", "instructor", "gradio")
+
+# moduł -> (budżet w sekundach, ciężkie moduły dozwolone przy starcie)
+TARGETS: Dict[str, Tuple[float, Tuple[str, ...]]] = {
+    "src.utils.config": (0.15, ()),
+    "src.core.kb_store": (0.15, ()),
+    "src.core.gpu_manager": (0.15, ()),
+    "src.core.transcriber": (0.3, ()),
+    "src.core.transcription_pool": (0.3, ()),
+    "src.core.downloader": (0.3, ()),
+    "src.agents.writer": (0.6, ()),
+    "main_pipeline": (1.0, ()),
+    "nightly_pipeline": (1.0, ()),
+    "src.core.processor": (1.0, ()),
+    # GUI potrzebuje gradio, ale nie torch/whisper/yt_dlp
+    "src.gui.handlers": (8.0, ("gradio",)),
+}
+
+
+def measure(module: str) -> Tuple[float, List[str]]:
+    """Zwraca (łączny czas importu w s, lista zaimportowanych ciężkich modułów)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import {module} nie powiódł się:\n{proc.stderr[-2000:]}")
+
+    total_us = 0
+    imported = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not name.startswith("  "):
+            # Moduł najwyższego poziomu - jego czas obejmuje zależności
+            total_us += int(cumulative)
+        imported.add(name.strip())
+
+    heavy = [m for m in HEAVY_MODULES if m in imported]
+    return total_us / 1e6, heavy
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark czasu importu")
+    parser.add_argument("--repeat", type=int, default=3, help="Liczba pomiarów (bierzemy najlepszy)")
+    parser.add_argument("--slack", type=float, default=1.0, help="Mnożnik budżetu (wolne maszyny CI)")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'moduł':<24}{'czas':>10}{'budżet':>10}  ciężkie moduły")
+    for module, (budget, allowed) in TARGETS.items():
+        results = [measure(module) for _ in range(args.repeat)]
+        seconds = min(r[0] for r in results)
+        heavy = results[0][1]
+        unexpected = [m for m in heavy if m not in allowed]
+
+        status = "OK"
+        if seconds > budget * args.slack or unexpected:
+            status = "REGRESJA"
+            failed = True
+        print(f"{module:<24}{seconds:>9.3f}s{budget * args.slack:>9.2f}s  {', '.join(heavy) or '-'}  {status}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
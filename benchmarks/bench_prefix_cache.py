@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark ponownego użycia prefiksu promptu (wymaga działającej Ollamy):
+time-to-first-token (TTFT) zapytań ekstrakcji z tym samym
+EXTRACTION_PROMPT["system"] i różnymi fragmentami transkrypcji.
+
+Scenariusze (każdy po --requests zapytań, po jednym rozgrzewającym):
+- stały prefiks      - build_messages + model_options (jak LLMEngine): serwer
+                       bierze prefiks z cache KV i liczy tylko fragment,
+- zmienny prefiks    - prompt systemowy poprzedzony unikalnym znacznikiem:
+                       prefiks liczony od zera przy każdym zapytaniu,
+- zmienny num_ctx    - stary układ: ścieżki z num_ctx 4096 i 8192 na przemian,
+                       każda zmiana przeładowuje model.
+
+Poza TTFT pokazuje prompt_eval_count z odpowiedzi Ollamy - przy trafieniu
+w cache serwer ewaluuje tylko tokeny spoza wspólnego prefiksu.
+
+UŻYCIE:
+    python benchmarks/bench_prefix_cache.py
+    python benchmarks/bench_prefix_cache.py --model qwen2.5:7b --requests 8 --host http://gpu1:11434
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from src.core.llm_engine import build_messages
+from src.core.ollama_client import OllamaClient, model_options
+from src.utils.config import MODEL_EXTRACTOR_OLLAMA, OLLAMA_URL
+from src.utils.prompts_config import EXTRACTION_PROMPT
+
+
+def fragments(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    words = ("w tym odcinku pokazujemy jak Maltego łączy konta z różnych serwisów a metadane "
+             "zdjęć zdradzają lokalizację pamiętajcie o weryfikacji źródeł i separacji tożsamości").split()
+    for _ in range(count):
+        text = " ".join(rng.choice(words) for _ in range(250))
+        yield EXTRACTION_PROMPT["user"].format(text=text)
+
+
+def run_request(client: OllamaClient, model: str, messages, options):
+    """Zwraca (TTFT w s, prompt_eval_count) jednego zapytania strumieniowego."""
+    payload = {"model": model, "messages": messages, "stream": True, "options": options}
+    started = time.perf_counter()
+    ttft, evaluated = None, None
+    for part in client._post("/api/chat", payload, True, 300):
+        if ttft is None and part.get("message", {}).get("content"):
+            ttft = time.perf_counter() - started
+        if part.get("done"):
+            evaluated = part.get("prompt_eval_count")
+    return (ttft if ttft is not None else time.perf_counter() - started), evaluated
+
+
+def scenario(client, model, name, build, count):
+    run_request(client, model, *build(-1, "Rozgrzewka."))
+    results = [run_request(client, model, *build(i, user)) for i, user in enumerate(fragments(count))]
+    ttfts = [ttft for ttft, _ in results]
+    evaluated = [n for _, n in results if n is not None]
+    print(f"  {name:<18} TTFT mediana {statistics.median(ttfts) * 1000:8.0f} ms, "
+          f"min {min(ttfts) * 1000:6.0f} ms, ewaluowane tokeny promptu {statistics.mean(evaluated) if evaluated else 0:7.0f}")
+    return statistics.median(ttfts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=OLLAMA_URL, help="Adres serwera Ollama")
+    parser.add_argument("--model", default=MODEL_EXTRACTOR_OLLAMA, help="Model do testu")
+    parser.add_argument("--requests", type=int, default=5, help="Zapytania na scenariusz")
+    args = parser.parse_args()
+
+    client = OllamaClient(args.host)
+    try:
+        client.list_models(timeout=5)
+    except requests.exceptions.RequestException as e:
+        raise SystemExit(f"Ollama niedostępna pod {args.host}: {e}")
+
+    system = EXTRACTION_PROMPT["system"]
+    short = {"num_predict": 8, "temperature": 0}
+
+    def stable(i, user):
+        return build_messages(system, user), model_options(args.model, short)
+
+    def unique_prefix(i, user):
+        return build_messages(f"[zapytanie {i} {time.time_ns()}]\n{system}", user), model_options(args.model, short)
+
+    def flipping_ctx(i, user):
+        return build_messages(system, user), {"num_ctx": 4096 if i % 2 else 8192, **short}
+
+    print(f"Model: {args.model} @ {client.host}, zapytań na scenariusz: {args.requests}")
+    base = scenario(client, args.model, "stały prefiks", stable, args.requests)
+    cold = scenario(client, args.model, "zmienny prefiks", unique_prefix, args.requests)
+    scenario(client, args.model, "zmienny num_ctx", flipping_ctx, args.requests)
+    if base:
+        print(f"  Przyspieszenie TTFT dzięki cache prefiksu: {cold / base:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark czyszczenia transkrypcji: stara implementacja (3x re.sub na całym
+tekście) vs TranscriptCleaner (jeden przebieg, strumieniowo z uchwytu pliku).
+
+UŻYCIE:
+    python benchmarks/bench_text_cleaner.py            # 100 MB
+    python benchmarks/bench_text_cleaner.py --size-mb 20
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.text_cleaner import TranscriptCleaner
+
+
+def legacy_clean_transcript(text: str) -> str:
+    """Poprzednia implementacja clean_transcript."""
+    text = re.sub(r'\[\d{2,3}:\d{2}\s->\s\d{2,3}:\d{2}\]', '', text)
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    text = ' '.join(lines)
+    text = re.sub(r'\s(yhh|yyy|no wiesz)\s', ' ', text, flags=re.IGNORECASE)
+    return text
+
+
+def generate_transcript(path: str, size_mb: int, seed: int = 42) -> None:
+    """Generuje syntetyczną transkrypcję w formacie Whispera ([MM:SS -> MM:SS] tekst)."""
+    rng = random.Random(seed)
+    words = ("narzędzie Maltego służy do analizy powiązań a SpiderFoot automatyzuje "
+             "zbieranie danych pamiętajcie o OPSEC yhh yyy no wiesz").split()
+    target = size_mb * 1024 * 1024
+    written = 0
+    second = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Język wykryty: pl (pewność: 99.00%)\n" + "-" * 40 + "\n\n")
+        while written < target:
+            line = " ".join(rng.choice(words) for _ in range(rng.randint(6, 20)))
+            start, second = second, second + rng.randint(2, 8)
+            row = f"[{start // 60:02d}:{start % 60:02d} -> {second // 60:02d}:{second % 60:02d}] {line}\n"
+            f.write(row)
+            written += len(row.encode("utf-8"))
+
+
+def bench(label: str, func, size_mb: float) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<38} {elapsed:7.2f} s   {size_mb / elapsed:7.1f} MB/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=100, help="Rozmiar transkrypcji testowej (MB)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "transcript.txt")
+        print(f"Generowanie transkrypcji {args.size_mb} MB...")
+        generate_transcript(src, args.size_mb)
+        size_mb = os.path.getsize(src) / (1024 * 1024)
+
+        cleaner = TranscriptCleaner()
+
+        def run_legacy():
+            with open(src, "r", encoding="utf-8") as f:
+                text = f.read()
+            with open(os.path.join(tmp, "legacy.txt"), "w", encoding="utf-8") as f:
+                f.write(legacy_clean_transcript(text))
+
+        def run_in_memory():
+            with open(src, "r", encoding="utf-8") as f:
+                text = f.read()
+            with open(os.path.join(tmp, "memory.txt"), "w", encoding="utf-8") as f:
+                f.write(cleaner.clean(text))
+
+        def run_streaming():
+            cleaner.clean_file(src, os.path.join(tmp, "stream.txt"))
+
+        print(f"Czyszczenie {size_mb:.1f} MB:")
+        legacy = bench("legacy (3x re.sub, cały tekst)", run_legacy, size_mb)
+        bench("TranscriptCleaner.clean (str)", run_in_memory, size_mb)
+        streaming = bench("TranscriptCleaner.clean_file (stream)", run_streaming, size_mb)
+        print(f"  Przyspieszenie (stream vs legacy): {legacy / streaming:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
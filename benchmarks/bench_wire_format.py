@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark formatu odpowiedzi ekstraktora (offline, bez LLM): ile tokenów
+model musi wygenerować na fragment w formacie "json" (KnowledgeGraph)
+i "compact" (CompactKnowledgeGraph) dla tej samej wiedzy.
+
+Dane: segmenty z istniejących plików KB (--kb) albo syntetyczne. Każdy
+segment jest też konwertowany tam i z powrotem, żeby potwierdzić
+bezstratność formatu kompaktowego.
+
+Tokeny liczy tiktoken (o200k_base), jeśli jest zainstalowany; w przeciwnym
+razie przybliżenie (słowa dzielone co 4 znaki + interpunkcja) - wystarczające
+do porównania obu formatów.
+
+UŻYCIE:
+    python benchmarks/bench_wire_format.py
+    python benchmarks/bench_wire_format.py --kb data/processed/wyklad_kb.jsonl
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.kb_store import iter_kb_records
+from src.core.schema import CompactKnowledgeGraph, KnowledgeGraph
+
+APPROX_TOKEN = re.compile(r"\s?\w{1,4}|\s?[^\w\s]|\s+")
+
+
+def get_token_counter():
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("o200k_base")
+        return "tiktoken o200k_base", lambda text: len(encoding.encode(text))
+    except ImportError:
+        return "przybliżenie regex", lambda text: len(APPROX_TOKEN.findall(text))
+
+
+def synthetic_graphs(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    words = ("narzędzie służy do analizy powiązań między kontami a metadane zdjęć zdradzają "
+             "lokalizację urządzenia pamiętaj o separacji tożsamości i weryfikacji źródeł").split()
+    tools = ["Maltego", "SpiderFoot", "Sherlock", "Shodan", "ExifTool", "theHarvester"]
+
+    def sentence(n):
+        return " ".join(rng.choice(words) for _ in range(n)).capitalize() + "."
+
+    for _ in range(count):
+        yield KnowledgeGraph(
+            topics=[sentence(3) for _ in range(rng.randint(2, 4))],
+            tools=[{"name": rng.choice(tools), "description": sentence(12)} for _ in range(rng.randint(1, 4))],
+            key_concepts=[{"term": sentence(2), "definition": sentence(25)} for _ in range(rng.randint(2, 5))],
+            tips=[sentence(14) for _ in range(rng.randint(2, 5))],
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kb", nargs="*", default=[], help="Pliki KB z prawdziwymi segmentami")
+    parser.add_argument("--samples", type=int, default=200, help="Liczba segmentów syntetycznych")
+    args = parser.parse_args()
+
+    if args.kb:
+        graphs = [KnowledgeGraph.model_validate(item) for path in args.kb for item in iter_kb_records(path)]
+    else:
+        graphs = list(synthetic_graphs(args.samples))
+
+    label, count_tokens = get_token_counter()
+    full_total = compact_total = 0
+    for graph in graphs:
+        # Model generuje tylko pola wiedzy - time_range ustawia ekstraktor
+        full = json.dumps(graph.model_dump(exclude={"time_range"}), ensure_ascii=False)
+        compact_graph = CompactKnowledgeGraph.from_graph(graph)
+        compact = json.dumps(compact_graph.model_dump(), ensure_ascii=False)
+
+        restored = CompactKnowledgeGraph.model_validate_json(compact).to_graph(graph.time_range)
+        if restored != graph:
+            raise SystemExit("Format kompaktowy nie jest bezstratny dla jednego z segmentów!")
+
+        full_total += count_tokens(full)
+        compact_total += count_tokens(compact)
+
+    n = max(len(graphs), 1)
+    print(f"Segmenty: {len(graphs)} ({'KB' if args.kb else 'syntetyczne'}), tokenizer: {label}")
+    print(f"  {'json (KnowledgeGraph)':<28} {full_total / n:8.1f} tokenów/fragment")
+    print(f"  {'compact (CompactKG)':<28} {compact_total / n:8.1f} tokenów/fragment")
+    if full_total:
+        print(f"  Redukcja: {(1 - compact_total / full_total):.1%} (round-trip bezstratny)")
+
+
+if __name__ == "__main__":
+    main()
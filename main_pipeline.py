@@ -1,20 +1,23 @@
 import os
-import json
 import shutil
 from tqdm import tqdm
 from src.utils.config import (
     DATA_RAW, DATA_PROCESSED, DATA_OUTPUT, CHUNK_SIZE, OVERLAP,
     MODEL_EXTRACTOR, MODEL_WRITER, OBSIDIAN_VAULT_PATH,
-    OBSIDIAN_EXPORT_ENABLED, OBSIDIAN_SUBFOLDER
+    OBSIDIAN_EXPORT_ENABLED, OBSIDIAN_SUBFOLDER, MEDIA_EXTENSIONS
 )
-from src.core.text_cleaner import clean_transcript
-from src.utils.text_processing import smart_split_text
+from src.core.text_cleaner import clean_transcript_with_timeline
+from src.utils.text_processing import split_with_time_ranges
 from src.core.transcriber import Transcriber
 from src.core.gpu_manager import clear_gpu_memory
-from src.agents.extractor import KnowledgeExtractor
+from src.agents.extractor import KnowledgeExtractor, get_extraction_stats
 from src.agents.writer import ReportWriter
 from src.agents.tagger import TaggerAgent
 from src.core.llm_engine import unload_model
+from src.core.ollama_client import model_num_ctx
+from src.core.provider_router import get_routing_trace
+from src.core.kb_store import save_kb, kb_path_for
+from src.core.obsidian_sync import export_to_obsidian
 
 
 def run_pipeline(input_path: str, output_dir: str = DATA_OUTPUT, topic: str = "Narzędzia OSINT, Krypto i Techniki Śledcze", whisper_model: str = "large-v3"):
@@ -22,6 +25,9 @@ def run_pipeline(input_path: str, output_dir: str = DATA_OUTPUT, topic: str = "N
         print(f"Błąd: Nie znaleziono pliku {input_path}")
         return
 
+    # Budżet i ślad routera liczone per przebieg, nie per proces
+    get_routing_trace().reset()
+
     filename = os.path.basename(input_path)
     print(f"\n🚀 {'='*60}")
     print(f"🚀 ROZPOCZYNAM PRZETWARZANIE: {filename}")
@@ -57,12 +63,13 @@ def run_pipeline(input_path: str, output_dir: str = DATA_OUTPUT, topic: str = "N
     with open(txt_path, 'r', encoding='utf-8') as f:
         raw_text = f.read()
     
-    clean_text = clean_transcript(raw_text)
-    chunks = smart_split_text(clean_text, chunk_size=CHUNK_SIZE, chunk_overlap=OVERLAP)
+    clean_text, timeline = clean_transcript_with_timeline(raw_text)
+    chunks = split_with_time_ranges(clean_text, timeline, chunk_size=CHUNK_SIZE, chunk_overlap=OVERLAP)
     print(f"\n📦 Podzielono na {len(chunks)} fragmentów.")
 
     # 3. Mapowanie (Ekstrakcja)
     knowledge_base = []
+    chunk_tags = []
     failed_chunks = 0
     stats = {
         "tools": 0,
@@ -71,17 +78,18 @@ def run_pipeline(input_path: str, output_dir: str = DATA_OUTPUT, topic: str = "N
         "tips": 0
     }
     
-    print(f"\n🕵️ [KROK 2] Ekstrakcja wiedzy (Model: {MODEL_EXTRACTOR}, num_ctx: 4096)...")
+    print(f"\n🕵️ [KROK 2] Ekstrakcja wiedzy (Model: {MODEL_EXTRACTOR}, num_ctx: {model_num_ctx(MODEL_EXTRACTOR)})...")
     
     try:
         extractor = KnowledgeExtractor()
         total_chunks = len(chunks)
-        for i, chunk in enumerate(tqdm(chunks)):
-            # Oznaczanie fragmentu (Part X (Y%))
+        for i, (chunk, time_range) in enumerate(tqdm(chunks)):
+            # Oznaczanie fragmentu: prawdziwy czas z indeksu, w razie braku Part X (Y%)
             progress_pct = int(((i + 1) / total_chunks) * 100)
-            time_tag = f"Part {i+1} ({progress_pct}%)"
+            time_tag = time_range or f"Part {i+1} ({progress_pct}%)"
+            chunk_tags.append(time_tag)
             
-            graph = extractor.extract_knowledge(chunk, chunk_id=time_tag)
+            graph = extractor.extract_knowledge(chunk, chunk_id=time_tag, time_range=time_range)
             
             # Wykrywanie cichego błędu
             is_empty_graph = not any([graph.topics, graph.tools, graph.key_concepts, graph.tips])
@@ -100,9 +108,12 @@ def run_pipeline(input_path: str, output_dir: str = DATA_OUTPUT, topic: str = "N
             
             # Backup co 5 fragmentów
             if i % 5 == 0:
-                os.makedirs(DATA_PROCESSED, exist_ok=True)
-                with open(os.path.join(DATA_PROCESSED, "knowledge_backup.json"), 'w', encoding='utf-8') as f:
-                    json.dump(knowledge_base, f, ensure_ascii=False, indent=2)
+                save_kb(os.path.join(DATA_PROCESSED, "knowledge_backup.jsonl"), knowledge_base)
+
+        # Fragmenty odłożone po błędach backendu - jedna ponowna próba
+        positions = {tag: idx for idx, tag in enumerate(chunk_tags)}
+        for time_tag, graph in extractor.retry_failed().items():
+            knowledge_base[positions[time_tag]] = graph.model_dump()
 
         # Raport końcowy ekstrakcji
         print(f"\n📊 RAPORT EKSTRAKCJI:")
@@ -110,6 +121,7 @@ def run_pipeline(input_path: str, output_dir: str = DATA_OUTPUT, topic: str = "N
         print(f"   - Znaleziono narzędzi: {stats['tools']}")
         print(f"   - Zdefiniowano pojęć: {stats['concepts']}")
         print(f"   - Wykryto błędów: {failed_chunks}")
+        print(f"   - {get_extraction_stats().format()}")
         if failed_chunks > 0:
             print(f"   🚨 UWAGA: Brakuje {failed_chunks} fragmentów wiedzy.")
     finally:
@@ -117,10 +129,7 @@ def run_pipeline(input_path: str, output_dir: str = DATA_OUTPUT, topic: str = "N
 
     # Zapis bazy wiedzy
     kb_name = os.path.basename(txt_path)
-    kb_path = os.path.join(DATA_PROCESSED, f"{kb_name}_kb.json")
-    os.makedirs(DATA_PROCESSED, exist_ok=True)
-    with open(kb_path, 'w', encoding='utf-8') as f:
-        json.dump(knowledge_base, f, ensure_ascii=False, indent=2)
+    kb_path = save_kb(kb_path_for(kb_name, DATA_PROCESSED), knowledge_base)
 
     unload_model(MODEL_EXTRACTOR)
 
@@ -173,15 +182,17 @@ def run_pipeline(input_path: str, output_dir: str = DATA_OUTPUT, topic: str = "N
         f.write(final_content)
 
     print(f"\n🎉 SUKCES! Plik zapisany: {output_path}")
+    if get_routing_trace().records:
+        print(get_routing_trace().format())
 
-    # Eksport do Obsidian Vault
+    # Eksport do Obsidian Vault (tylko zmienione notatki, z zachowaniem reviewed/status)
     if OBSIDIAN_EXPORT_ENABLED:
-        export_to_obsidian(output_path)
+        export_to_obsidian(output_path, OBSIDIAN_VAULT_PATH, OBSIDIAN_SUBFOLDER)
 
 
 if __name__ == "__main__":
     # Obsługa wielu plików i różnych formatów
-    supported_extensions = ('.txt', '.mp3', '.mp4', '.m4a', '.wav')
+    supported_extensions = ('.txt',) + MEDIA_EXTENSIONS
     files = [f for f in os.listdir(DATA_RAW) if f.lower().endswith(supported_extensions)]
     
     if files:
@@ -24,12 +24,10 @@ from typing import List, Dict, Optional
 # Dodaj główny katalog do PATH
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-import torch
-
 from src.core.downloader import Downloader
 from src.core.transcriber import Transcriber
 from src.core.batch_manager import BatchManager
-from src.core.text_cleaner import clean_transcript
+from src.core.text_cleaner import clean_transcript_with_timeline
 from src.core.gpu_manager import clear_gpu_memory
 from src.utils.config import (
     MODEL_EXTRACTOR_OPENAI,
@@ -38,7 +36,7 @@ from src.utils.config import (
     DEFAULT_MODEL_SIZE,
 )
 from src.utils.prompts_config import EXTRACTION_PROMPT
-from src.utils.batch_utils import build_batch_request
+from src.utils.batch_utils import build_chunk_items, build_chunk_time_ranges, build_packed_batch_requests
 from src.utils.helpers import sanitize_filename
 
 
@@ -157,7 +155,7 @@ def process_single_video(
 
         # Bierzemy pierwszy (i jedyny) element z listy
         file_info = downloaded[0]
-        audio_file = file_info["video"]  # W trybie audio_only to jest plik .mp3
+        audio_file = file_info["video"]  # W trybie audio_only: ścieżka audio w oryginalnym kodeku
         source_title = file_info.get("source_title", f"video_{index}")
         source_url = file_info.get("source_url", url)
 
@@ -191,25 +189,25 @@ def process_single_video(
         with open(output_file, "r", encoding="utf-8") as f:
             raw_text = f.read()
 
-        cleaned_text = clean_transcript(raw_text)
+        cleaned_text, timeline = clean_transcript_with_timeline(raw_text)
         logger.log(f"Oczyszczony tekst: {len(cleaned_text)} znaków")
 
         # --- KROK 4: Czyszczenie pamięci GPU ---
         clear_gpu_memory()
         logger.log("Pamięć GPU wyczyszczona.")
 
-        # --- KROK 5: Budowanie requestu Batch API ---
+        # --- KROK 5: Podział na fragmenty (requesty Batch API budowane dla wszystkich filmów naraz) ---
         custom_id = sanitize_filename(source_title)
-        batch_request = build_batch_request(
-            custom_id=custom_id,
-            transcript_text=cleaned_text,
-            model=OPENAI_MODEL
-        )
+        chunk_items = build_chunk_items(custom_id, cleaned_text)
+
+        time_ranges = build_chunk_time_ranges(custom_id, cleaned_text, timeline)
 
-        logger.log(f"Przygotowano request dla Batch API (custom_id: {custom_id})")
+        logger.log(f"Przygotowano {len(chunk_items)} fragment(ów) dla Batch API (custom_id: {custom_id})")
 
         return {
-            "request": batch_request,
+            "custom_id": custom_id,
+            "items": chunk_items,
+            "time_ranges": time_ranges,
             "source_url": source_url,
             "source_title": source_title,
             "audio_file": audio_file,
@@ -313,8 +311,23 @@ def main():
     try:
         batch_manager = BatchManager()
 
-        # Przygotuj listę requestów
-        requests_list = [r["request"] for r in successful_requests]
+        # Przygotuj listę fragmentów - tylko części, których brakuje w bazach KB
+        all_items = [item for r in successful_requests for item in r["items"]]
+        missing = set(batch_manager.select_missing_ids([item_id for item_id, _ in all_items]))
+        items = [item for item in all_items if item[0] in missing]
+        skipped = len(all_items) - len(items)
+        if skipped:
+            logger.log(f"Pominięto {skipped} części już zaimportowanych do KB.")
+
+        if not items:
+            print("\nWszystkie części są już w bazach wiedzy - nie tworzę Batcha.")
+            return
+
+        # Krótkie filmy i końcówki transkrypcji po kilka w jednym requeście
+        requests_list, packs = build_packed_batch_requests(items, model=OPENAI_MODEL)
+        if packs:
+            packed = sum(len(id_map) for id_map in packs.values())
+            logger.log(f"Spakowano {packed} krótkich fragmentów w {len(packs)} requestów.")
 
         # Utwórz nazwę pliku z timestampem
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -349,13 +362,16 @@ def main():
             "failed_urls": failed_urls,
             "files": [
                 {
-                    "custom_id": r["request"]["custom_id"],
+                    "custom_id": r["custom_id"],
+                    "parts": len(r["items"]),
+                    "time_ranges": r["time_ranges"],
                     "source_url": r["source_url"],
                     "source_title": r["source_title"],
                     "transcript_file": r["transcript_file"]
                 }
                 for r in successful_requests
-            ]
+            ],
+            "packs": packs
         }
 
         manifest_path = os.path.join(DATA_PROCESSED, f"nightly_manifest_{timestamp}.json")
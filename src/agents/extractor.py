@@ -1,13 +1,128 @@
 import time
 import re
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.core.chunk_packer import pack_id, plan_packs, render_pack, split_pack_result
 from src.core.llm_engine import LLMEngine
-from src.core.schema import KnowledgeGraph
-from src.utils.prompts_config import EXTRACTION_PROMPT
+from src.core.retry_policy import (
+    TRANSIENT_ERRORS, CircuitOpenError, backoff_delay, classify_error, get_circuit_breaker, retry_after_seconds,
+)
+from src.core.schema import (
+    CompactKnowledgeGraph, KnowledgeGraph, PackedCompactKnowledgeGraphs, PackedKnowledgeGraphs,
+)
+from src.utils.config import EXTRACTION_WIRE_FORMAT, EXTRACTION_MAX_RETRIES, EXTRACTION_REQUEUE_WAIT
+from src.utils.prompts_config import (
+    EXTRACTION_PROMPT, EXTRACTION_PROMPT_COMPACT, EXTRACTION_PROMPT_PACKED, EXTRACTION_PROMPT_PACKED_COMPACT,
+    EXTRACTION_REASK,
+)
+
+class ExtractionStats:
+    """
+    Liczniki jakości ekstrakcji (współdzielone, bezpieczne wątkowo): ile
+    fragmentów przeszło walidację za pierwszym razem, ile kosztowało
+    re-asków instructora i ponowień zewnętrznej pętli. Zapytania z pakietem
+    fragmentów (extract_packed) mają osobne liczniki - nieudany pakiet nie jest
+    pominiętym fragmentem, bo jego fragmenty idą dalej osobno.
+    """
 
-class KnowledgeExtractor:
     def __init__(self):
-        self.llm = LLMEngine(model_type="extractor")
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.chunks = 0
+            self.first_attempt_valid = 0
+            self.reasks = 0
+            self.retries = 0
+            self.failures = 0
+            self.recovered = 0
+            self.packs = 0
+            self.packs_first_attempt_valid = 0
+            self.pack_failures = 0
+
+    def record(self, attempts: int, reasks: int, failed: bool, pack: bool = False) -> None:
+        with self._lock:
+            self.reasks += reasks
+            self.retries += attempts - 1
+            if pack:
+                self.packs += 1
+                if failed:
+                    self.pack_failures += 1
+                elif attempts == 1 and reasks == 0:
+                    self.packs_first_attempt_valid += 1
+                return
+            self.chunks += 1
+            if failed:
+                self.failures += 1
+            elif attempts == 1 and reasks == 0:
+                self.first_attempt_valid += 1
+
+    def record_recovered(self) -> None:
+        """Fragment odłożony po błędzie udało się przetworzyć w ponownym przebiegu."""
+        with self._lock:
+            self.failures -= 1
+            self.recovered += 1
+
+    def summary(self) -> Dict:
+        with self._lock:
+            rate = self.first_attempt_valid / self.chunks if self.chunks else 0.0
+            pack_rate = self.packs_first_attempt_valid / self.packs if self.packs else 0.0
+            return {
+                "chunks": self.chunks,
+                "first_attempt_valid": self.first_attempt_valid,
+                "first_attempt_rate": round(rate, 3),
+                "reasks": self.reasks,
+                "retries": self.retries,
+                "failures": self.failures,
+                "recovered": self.recovered,
+                "packs": self.packs,
+                "pack_first_attempt_rate": round(pack_rate, 3),
+                "pack_failures": self.pack_failures,
+            }
+
+    def format(self) -> str:
+        s = self.summary()
+        line = (
+            f"[EXTRACTOR] Fragmenty: {s['chunks']}, poprawne za 1. razem: {s['first_attempt_rate']:.0%}, "
+            f"re-aski: {s['reasks']}, ponowienia: {s['retries']}, odzyskane: {s['recovered']}, "
+            f"pominięte: {s['failures']}"
+        )
+        if s["packs"]:
+            line += (f"\n[EXTRACTOR] Pakiety: {s['packs']}, poprawne za 1. razem: "
+                     f"{s['pack_first_attempt_rate']:.0%}, nieudane: {s['pack_failures']}")
+        return line
+
+
+_stats = ExtractionStats()
+
+
+def get_extraction_stats() -> ExtractionStats:
+    """Zwraca współdzielone liczniki ekstrakcji."""
+    return _stats
+
+
+class KnowledgeExtractor:
+    def __init__(self, provider: Optional[str] = None, model_name: Optional[str] = None,
+                 wire_format: Optional[str] = None):
+        """
+        Args:
+            wire_format: "json" lub "compact" (domyślnie EXTRACTION_WIRE_FORMAT) - format,
+                w którym model zwraca wiedzę; wynik zawsze jest KnowledgeGraph.
+        """
+        self.llm = LLMEngine(model_type="extractor", provider=provider, model_name=model_name)
+        # Wspólny dla wszystkich ekstraktorów tego samego backendu
+        self.breaker = get_circuit_breaker(self.llm.backend)
+        self._requeue: List[Tuple[str, str, Optional[str]]] = []
+        self._requeue_lock = threading.Lock()
+        self.wire_format = wire_format or EXTRACTION_WIRE_FORMAT
+        if self.wire_format == "compact":
+            self.prompt, self.response_model = EXTRACTION_PROMPT_COMPACT, CompactKnowledgeGraph
+            self.packed_prompt, self.packed_model = EXTRACTION_PROMPT_PACKED_COMPACT, PackedCompactKnowledgeGraphs
+        else:
+            self.prompt, self.response_model = EXTRACTION_PROMPT, KnowledgeGraph
+            self.packed_prompt, self.packed_model = EXTRACTION_PROMPT_PACKED, PackedKnowledgeGraphs
 
     def _extract_timestamp(self, text: str) -> Optional[str]:
         """
@@ -20,50 +135,247 @@ class KnowledgeExtractor:
             return match.group(1)
         return None
 
-    def extract_knowledge(self, chunk_text: str, chunk_id: str | int = 0) -> KnowledgeGraph:
+    def extract_knowledge(self, chunk_text: str, chunk_id: str | int = 0,
+                          time_range: Optional[str] = None) -> KnowledgeGraph:
         """
-        Ekstrakcja wiedzy z fragmentu tekstu z mechanizmem Retry i Regex.
+        Ekstrakcja wiedzy z fragmentu tekstu z ponowieniami zależnymi od rodzaju błędu.
+
+        Args:
+            chunk_text: Fragment transkrypcji.
+            chunk_id: Etykieta zastępcza, gdy czas jest nieznany.
+            time_range: Zakres czasu z indeksu TranscriptTimeline ("MM:SS -> MM:SS").
+                Ma pierwszeństwo przed wyszukiwaniem znacznika w tekście.
+
+        Fragment, którego nie udało się przetworzyć, trafia do kolejki
+        ponowień (retry_failed), a wynikiem jest pusty graf z opisem błędu.
         """
-        
-        # 1. Determinisyczne wyciąganie czasu (zamiast LLM)
-        real_timestamp = self._extract_timestamp(chunk_text)
-        # Fallback: Jeśli nie ma czasu w tekście, użyj ID fragmentu
-        final_time_marker = real_timestamp if real_timestamp else f"{chunk_id}"
+        graph, failed = self._extract_chunk(chunk_text, chunk_id, time_range)
+        if failed:
+            with self._requeue_lock:
+                self._requeue.append((str(chunk_id), chunk_text, time_range))
+        return graph
+
+    def _time_marker(self, chunk_text: str, chunk_id: str | int, time_range: Optional[str]) -> str:
+        # Determinisyczne wyciąganie czasu (zamiast LLM); fallback: ID fragmentu
+        return time_range or self._extract_timestamp(chunk_text) or f"{chunk_id}"
+
+    def _extract_chunk(self, chunk_text: str, chunk_id: str | int, time_range: Optional[str],
+                       record_stats: bool = True) -> Tuple[KnowledgeGraph, bool]:
+        """Zwraca (graf, czy_nieudany) - przy niepowodzeniu graf zastępczy z opisem błędu."""
+        final_time_marker = self._time_marker(chunk_text, chunk_id, time_range)
 
-        system_prompt = EXTRACTION_PROMPT["system"]
-        user_prompt = EXTRACTION_PROMPT["user"].format(text=chunk_text)
+        response, last_error = self._call_llm(
+            self.prompt["system"], self.prompt["user"].format(text=chunk_text),
+            self.response_model, chunk_id, record_stats,
+        )
+        if response is None:
+            # Failover - Zwrócenie pustego obiektu z błędem zamiast wysypania programu
+            return KnowledgeGraph(
+                topics=[], 
+                tools=[], 
+                key_concepts=[], 
+                tips=[f"BŁĄD PRZETWARZANIA: {str(last_error)}"],
+                time_range=final_time_marker
+            ), True
+
+        if isinstance(response, CompactKnowledgeGraph):
+            response = response.to_graph()
+        # Nadpisanie czasu wartością z Regexa (gwarancja poprawności)
+        response.time_range = final_time_marker
+        return response, False
+
+    def _call_llm(self, system_prompt: str, base_user_prompt: str, response_model: type,
+                  label: str | int, record_stats: bool = True,
+                  pack: bool = False) -> Tuple[Optional[Any], Optional[Exception]]:
+        """
+        Wywołanie modelu z ponowieniami zależnymi od klasy błędu (src/core/retry_policy.py).
+        pack=True: zapytanie z pakietem fragmentów (osobne liczniki ExtractionStats).
 
-        # 2. Pętla Retry (odporność na błędy API/Modelu)
-        max_retries = 3
+        Returns:
+            (odpowiedź, None) albo (None, ostatni_błąd) po wyczerpaniu prób.
+        """
+        user_prompt = base_user_prompt
+        max_retries = EXTRACTION_MAX_RETRIES
         last_error = None
+        reasks = 0
+        attempts = 0
 
         for attempt in range(max_retries):
+            attempts = attempt + 1
             try:
+                self.breaker.before_call()
                 # Wywołanie modelu
-                response: KnowledgeGraph = self.llm.generate_structured(
+                response = self.llm.generate_structured(
                     system_prompt=system_prompt,
                     user_prompt=user_prompt,
-                    response_model=KnowledgeGraph
+                    response_model=response_model
                 )
-                
-                # Nadpisanie czasu wartością z Regexa (gwarancja poprawności)
-                response.time_range = final_time_marker
-                return response
-
+            except CircuitOpenError as e:
+                # Backend niesprawny - bez kolejnych prób, fragment wróci w retry_failed
+                last_error = e
+                break
             except Exception as e:
+                reasks += self.llm.last_parse_errors
                 last_error = e
-                print(f"[EXTRACTOR] Błąd przetwarzania (próba {attempt + 1}/{max_retries}): {e}")
-                time.sleep(1) # Odczekaj chwilę
-
-        # 3. Failover - Zwrócenie pustego obiektu z błędem zamiast wysypania programu
-        print(f"[EXTRACTOR CRITICAL] Pominięto fragment {chunk_id} po {max_retries} próbach.")
-        return KnowledgeGraph(
-            topics=[], 
-            tools=[], 
-            key_concepts=[], 
-            tips=[f"BŁĄD PRZETWARZANIA: {str(last_error)}"],
-            time_range=final_time_marker
-        )
+                kind = classify_error(e)
+
+                if kind in TRANSIENT_ERRORS:
+                    self.breaker.record_failure()
+                    if attempt + 1 < max_retries:
+                        delay = backoff_delay(attempt, retry_after=retry_after_seconds(e))
+                        print(f"[EXTRACTOR] Błąd backendu ({kind}, próba {attempt + 1}/{max_retries}): {e} "
+                              f"- ponowienie za {delay:.1f} s")
+                        time.sleep(delay)
+                    continue
+
+                # Backend odpowiedział - to nie jego awaria
+                self.breaker.record_success()
+                if kind == "validation":
+                    # Od razu, z treścią błędu walidacji w prompcie
+                    print(f"[EXTRACTOR] Odpowiedź niezgodna ze schematem (próba {attempt + 1}/{max_retries}) - ponawiam z opisem błędu.")
+                    user_prompt = base_user_prompt + EXTRACTION_REASK.format(error=str(e)[:500])
+                    continue
+
+                print(f"[EXTRACTOR] Błąd nienaprawialny ponowieniem ({kind}): {e}")
+                break
+
+            self.breaker.record_success()
+            reasks += self.llm.last_parse_errors
+            if record_stats:
+                _stats.record(attempts, reasks, failed=False, pack=pack)
+            return response, None
+
+        if record_stats:
+            _stats.record(attempts, reasks, failed=True, pack=pack)
+        print(f"[EXTRACTOR CRITICAL] Pominięto fragment {label} po {attempts} próbach: {last_error}")
+        return None, last_error
+
+    def retry_failed(self, max_wait: float = EXTRACTION_REQUEUE_WAIT) -> Dict[str, KnowledgeGraph]:
+        """
+        Ponownie przetwarza fragmenty odłożone przez extract_knowledge (jeden przebieg).
+        Przy otwartym obwodzie czeka na wywołanie próbne, ale nie dłużej niż max_wait.
+
+        Returns:
+            {chunk_id: graf} dla fragmentów, które tym razem się udały.
+        """
+        with self._requeue_lock:
+            pending, self._requeue = self._requeue, []
+        recovered = self._retry_pending(pending, max_wait)
+        return {chunk_id: recovered[i] for i, (chunk_id, _, _) in enumerate(pending) if i in recovered}
+
+    def _retry_pending(self, pending: List[Tuple[str, str, Optional[str]]],
+                       max_wait: float = EXTRACTION_REQUEUE_WAIT) -> Dict[int, KnowledgeGraph]:
+        """Ponawia listę (chunk_id, tekst, time_range); zwraca {indeks: graf} udanych."""
+        if not pending:
+            return {}
+        wait = self.breaker.retry_in()
+        if wait > max_wait:
+            print(f"[EXTRACTOR] Backend nadal niedostępny - {len(pending)} fragmentów pozostaje pominiętych.")
+            return {}
+        if wait:
+            print(f"[EXTRACTOR] Czekam {wait:.0f} s na backend przed ponowieniem odłożonych fragmentów...")
+            time.sleep(wait)
+
+        print(f"[EXTRACTOR] Ponawiam {len(pending)} odłożonych fragmentów...")
+        recovered = {}
+        for i, (chunk_id, chunk_text, time_range) in enumerate(pending):
+            # Ponowny przebieg liczy się do statystyk tylko jako odzyskanie
+            graph, failed = self._extract_chunk(chunk_text, chunk_id, time_range, record_stats=False)
+            if not failed:
+                _stats.record_recovered()
+                recovered[i] = graph
+        return recovered
+
+    def _workers(self, concurrency: int) -> int:
+        """Liczba wątków: jawna albo górna granica kontrolera AIMD (on i tak pilnuje limitu)."""
+        return concurrency if concurrency > 0 else self.llm.concurrency.max_limit
+
+    def extract_chunks(self, chunks: List[Tuple[str, Optional[str]]], concurrency: int = 0,
+                       on_progress: Optional[Callable[[int, KnowledgeGraph], None]] = None) -> List[KnowledgeGraph]:
+        """
+        Ekstrakcja listy fragmentów (tekst, time_range) z split_with_time_ranges,
+        `concurrency` naraz (0 = tyle, ile pozwoli adaptacyjny limit backendu,
+        patrz src/core/concurrency.py). Nieudane fragmenty są ponawiane po
+        przejściu całej listy, gdy backend zdąży dojść do siebie.
+        """
+        failed_indexes = []
+        failed_lock = threading.Lock()
+
+        def run(i):
+            chunk, time_range = chunks[i]
+            graph, failed = self._extract_chunk(chunk, f"Part {i + 1}", time_range)
+            if failed:
+                with failed_lock:
+                    failed_indexes.append(i)
+            if on_progress:
+                on_progress(i, graph)
+            return graph
+
+        with ThreadPoolExecutor(max_workers=self._workers(concurrency)) as pool:
+            graphs = list(pool.map(run, range(len(chunks))))
+
+        failed_indexes.sort()
+        pending = [(f"Part {i + 1}", *chunks[i]) for i in failed_indexes]
+        for j, graph in self._retry_pending(pending).items():
+            graphs[failed_indexes[j]] = graph
+        return graphs
+
+    def extract_packed(self, items: List[Tuple[str, str, Optional[str]]],
+                       concurrency: int = 0) -> Dict[str, KnowledgeGraph]:
+        """
+        Ekstrakcja fragmentów (klucz, tekst, time_range) - także z różnych plików -
+        z pakowaniem krótkich fragmentów po kilka w jednym zapytaniu (chunk_packer),
+        w formacie self.wire_format.
+        Fragmenty pominięte w odpowiedzi na pakiet są przetwarzane osobno,
+        a nieudane - ponawiane na końcu, jak w extract_chunks.
+
+        Returns:
+            {klucz: KnowledgeGraph} dla wszystkich fragmentów.
+        """
+        by_key = {key: (text, time_range) for key, text, time_range in items}
+        packs, singles = plan_packs([(key, text) for key, text, _ in items])
+        results: Dict[str, KnowledgeGraph] = {}
+        failed_keys = set()
+        results_lock = threading.Lock()
+
+        def run_single(key):
+            text, time_range = by_key[key]
+            graph, failed = self._extract_chunk(text, key, time_range)
+            with results_lock:
+                results[key] = graph
+                if failed:
+                    failed_keys.add(key)
+
+        def run_pack(members):
+            text, id_map = render_pack(members)
+            response, _ = self._call_llm(
+                self.packed_prompt["system"], self.packed_prompt["user"].format(fragments=text),
+                self.packed_model, pack_id(members), pack=True,
+            )
+            if isinstance(response, PackedCompactKnowledgeGraphs):
+                response = response.to_packed()
+            graphs = split_pack_result(response, id_map) if response is not None else {}
+            for key, chunk_text in members:
+                if key not in graphs:
+                    run_single(key)
+                    continue
+                graph = KnowledgeGraph.model_validate(graphs[key])
+                graph.time_range = self._time_marker(chunk_text, key, by_key[key][1])
+                with results_lock:
+                    results[key] = graph
+
+        if packs:
+            packed = sum(len(pack) for pack in packs)
+            print(f"[EXTRACTOR] {packed} krótkich fragmentów w {len(packs)} pakietach, {len(singles)} osobno.")
+
+        tasks = [(run_pack, members) for members in packs] + [(run_single, key) for key, _ in singles]
+        with ThreadPoolExecutor(max_workers=self._workers(concurrency)) as pool:
+            list(pool.map(lambda task: task[0](task[1]), tasks))
+
+        pending = [(key, *by_key[key]) for key, _, _ in items if key in failed_keys]
+        for j, graph in self._retry_pending(pending).items():
+            results[pending[j][0]] = graph
+        return results
 
 # Wrapper dla zachowania kompatybilności wstecznej
 def extract_knowledge(chunk_text: str, time_range: str | int = 0) -> KnowledgeGraph:
@@ -1,12 +1,16 @@
 import re
 from src.core.llm_engine import LLMEngine
 from src.core.prompt_manager import PromptManager
-from src.utils.config import MODEL_TAGGER
+from src.utils.config import LLM_PROVIDER, MODEL_TAGGER_OLLAMA, MODEL_TAGGER_OPENAI
 
 class TaggerAgent:
-    def __init__(self, provider: str = "ollama"):
-        # Używamy dedykowanego modelu dla taggera
-        self.llm = LLMEngine(model_type="extractor", model_name=MODEL_TAGGER, provider=provider) 
+    def __init__(self, provider: str = None, model_name: str = None):
+        # Dedykowany model taggera dla wybranego providera (nie LLM_PROVIDER z configu);
+        # przy "auto" to model silnika lokalnego
+        provider = provider or LLM_PROVIDER
+        default_model = MODEL_TAGGER_OPENAI if provider == "openai" else MODEL_TAGGER_OLLAMA
+        self.llm = LLMEngine(model_type="extractor", model_name=model_name or default_model, provider=provider,
+                             stage="tagger")
         self.prompts = PromptManager()
 
     def generate_tags(self, text_content: str) -> list[str]:
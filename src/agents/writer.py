@@ -9,8 +9,8 @@ from src.core.llm_engine import LLMEngine
 from src.core.prompt_manager import PromptManager
 
 class ReportWriter:
-    def __init__(self):
-        self.llm = LLMEngine(model_type="writer")
+    def __init__(self, provider: Optional[str] = None, model_name: Optional[str] = None):
+        self.llm = LLMEngine(model_type="writer", provider=provider, model_name=model_name)
         self.prompt_manager = PromptManager()
 
     def _prepare_context(self, aggregated_data: list) -> str:
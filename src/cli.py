@@ -0,0 +1,594 @@
+"""
+CLI transkrypcje - jeden punkt wejścia dla wszystkich etapów pipeline'u.
+
+Każdy etap działa samodzielnie na wielu plikach w jednym procesie (model
+Whispera, klienci LLM i połączenia HTTP zostają "ciepłe" między plikami).
+Wejścia można podawać jako ścieżki, katalogi lub wzorce glob.
+
+UŻYCIE:
+    python transkrypcje.py download URL [URL...] [--urls-file urls.txt]
+    python transkrypcje.py transcribe "data/raw/*.mp3" --model large-v3 --workers 0
+    python transkrypcje.py extract "data/raw/*_transkrypcja.txt" --resume
+    python transkrypcje.py write "data/processed/*_kb.jsonl" --mode deep_dive
+    python transkrypcje.py tag "data/output/*.md" --resume
+    python transkrypcje.py export "data/output/*.md"
+    python transkrypcje.py batch submit "data/raw/*_transkrypcja.txt"
+    python transkrypcje.py batch import BATCH_ID --manifest data/processed/batch_manifest_X.json
+    python transkrypcje.py batch status
+
+Wspólne opcje: --provider ollama|openai|auto, --workers N (pliki równolegle),
+--resume (pomija pliki z aktualnym wynikiem).
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from src.utils.config import (
+    DATA_RAW, DATA_PROCESSED, DATA_OUTPUT, DEFAULT_MODEL_SIZE, WHISPER_MODELS,
+    CHUNK_SIZE, OVERLAP, MODEL_EXTRACTOR_OPENAI,
+    OBSIDIAN_VAULT_PATH, OBSIDIAN_SUBFOLDER, DOWNLOAD_AUDIO_CODEC, MEDIA_EXTENSIONS,
+)
+
+TRANSCRIPT_EXTENSIONS = ('.txt',)
+NOTE_EXTENSIONS = ('.md',)
+
+
+# ============================================================================
+# KONSOLA (zamiast loggera / stop_event / postępu z GUI)
+# ============================================================================
+
+class ConsoleLogger:
+    """Logger wypisujący na konsolę (bezpieczny wątkowo)."""
+
+    _lock = threading.Lock()
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+
+    def log(self, message: str):
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        with self._lock:
+            print(f"[{timestamp}] {self.prefix}{message}", flush=True)
+
+
+def console_progress(percent: float, stage: str = ""):
+    """Callback postępu - w CLI tylko kamienie milowe, żeby nie mieszać wyjścia wątków."""
+    if percent >= 100:
+        ConsoleLogger().log(f"  100% {stage}")
+
+
+# ============================================================================
+# POMOCNICZE
+# ============================================================================
+
+def expand_inputs(patterns: Sequence[str], extensions: Sequence[str] = ()) -> List[str]:
+    """
+    Rozwija ścieżki, katalogi i wzorce glob do posortowanej listy plików
+    (bez duplikatów, w kolejności podania wzorców).
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(os.path.join(pattern, f) for f in os.listdir(pattern))
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True)) or ([pattern] if os.path.exists(pattern) else [])
+        for path in matches:
+            if not os.path.isfile(path):
+                continue
+            if extensions and not path.lower().endswith(tuple(extensions)):
+                continue
+            if path not in files:
+                files.append(path)
+    return files
+
+
+def is_up_to_date(output_path: Optional[str], *input_paths: str) -> bool:
+    """Czy wynik istnieje i jest nowszy od wszystkich wejść (dla --resume)."""
+    if not output_path or not os.path.exists(output_path):
+        return False
+    output_mtime = os.path.getmtime(output_path)
+    return all(os.path.getmtime(p) <= output_mtime for p in input_paths if os.path.exists(p))
+
+
+def run_for_files(items: Sequence, func: Callable, workers: int, logger: ConsoleLogger, label: str) -> int:
+    """
+    Uruchamia func(item) dla każdego elementu (max `workers` naraz).
+    Błąd jednego pliku nie przerywa pozostałych. Zwraca liczbę błędów.
+    """
+    failures = 0
+    if not items:
+        logger.log(f"[{label}] Brak plików do przetworzenia.")
+        return 0
+
+    def guarded(item):
+        try:
+            func(item)
+            return True
+        except Exception as e:
+            logger.log(f"[{label}] BŁĄD {os.path.basename(str(item))}: {type(e).__name__}: {e}")
+            return False
+
+    if workers <= 1 or len(items) == 1:
+        results = [guarded(item) for item in items]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(guarded, items))
+
+    failures = results.count(False)
+    logger.log(f"[{label}] Gotowe: {len(items) - failures}/{len(items)} plików.")
+    return failures
+
+
+def transcript_base_name(txt_path: str) -> str:
+    """Nazwa bazowa KB dla pliku transkrypcji (zgodna z GUI)."""
+    return os.path.splitext(os.path.basename(txt_path))[0]
+
+
+def load_urls(urls: Iterable[str], urls_file: Optional[str]) -> List[str]:
+    """Łączy URL-e z argumentów i z pliku (jeden per linia, # = komentarz)."""
+    result = list(urls)
+    if urls_file and os.path.exists(urls_file):
+        with open(urls_file, "r", encoding="utf-8") as f:
+            result.extend(line.strip() for line in f if line.strip() and not line.strip().startswith("#"))
+    return list(dict.fromkeys(result))
+
+
+# ============================================================================
+# ETAPY
+# ============================================================================
+
+def cmd_download(args, logger: ConsoleLogger) -> int:
+    from src.core.downloader import Downloader
+
+    urls = load_urls(args.urls, args.urls_file)
+    os.makedirs(args.output, exist_ok=True)
+    downloader = Downloader(logger, threading.Event(), console_progress)
+
+    def download(url):
+        files = downloader.download_video(url, args.output, args.quality, args.audio_quality, args.audio_codec)
+        if not files:
+            raise RuntimeError("nie pobrano żadnego pliku")
+        for info in files:
+            logger.log(f"[DOWNLOAD] {os.path.basename(info['video'])}")
+
+    return run_for_files(urls, download, args.workers, logger, "DOWNLOAD")
+
+
+def cmd_transcribe(args, logger: ConsoleLogger) -> int:
+    files = expand_inputs(args.inputs, MEDIA_EXTENSIONS)
+    if args.resume:
+        files = [f for f in files if not is_up_to_date(os.path.splitext(f)[0] + "_transkrypcja.txt", f)]
+
+    if args.workers != 1 and (len(files) > 1 or args.split_long):
+        return transcribe_with_pool(files, args, logger)
+
+    from src.core.transcriber import Transcriber
+
+    transcriber = Transcriber(logger, threading.Event(), console_progress)
+    transcriber.keep_model = True  # model ładowany raz dla wszystkich plików
+
+    def transcribe(path):
+        segments, info = transcriber.transcribe_video(path, args.language, args.model)
+        output_file, _ = transcriber.save_transcription(segments, info, path, args.format, args.language)
+        logger.log(f"[TRANSCRIBE] {os.path.basename(output_file)}")
+
+    try:
+        return run_for_files(files, transcribe, 1, logger, "TRANSCRIBE")
+    finally:
+        transcriber.release_model()
+
+
+def transcribe_with_pool(files: List[str], args, logger: ConsoleLogger) -> int:
+    """
+    Pula procesów: pliki rozdzielone między GPU lub procesy CPU (--workers 0 = auto).
+    Z --split-long nagrania od LONG_AUDIO_MIN_DURATION są dzielone na okna transkrybowane równolegle.
+    """
+    from src.core.long_audio import probe_duration
+    from src.core.transcription_pool import TranscriptionPool
+    from src.utils.config import LONG_AUDIO_MIN_DURATION
+
+    long_files = [f for f in files if probe_duration(f) >= LONG_AUDIO_MIN_DURATION] if args.split_long else []
+    short_files = [f for f in files if f not in long_files]
+    failures = 0
+
+    with TranscriptionPool(logger, threading.Event(), console_progress, model_size=args.model,
+                           max_workers=args.workers or None) as pool:
+        for r in pool.transcribe_files(short_files, language=args.language, output_format=args.format):
+            if r["output"]:
+                logger.log(f"[TRANSCRIBE] {os.path.basename(r['output'])}")
+            failures += bool(r["error"])
+
+        for path in long_files:
+            try:
+                output_file, _ = pool.transcribe_long(path, language=args.language, output_format=args.format)
+                logger.log(f"[TRANSCRIBE] {os.path.basename(output_file)}")
+            except InterruptedError:
+                raise
+            except Exception as e:
+                logger.log(f"[TRANSCRIBE] BŁĄD {os.path.basename(path)}: {type(e).__name__}: {e}")
+                failures += 1
+    return failures
+
+
+def load_chunks(txt_path: str) -> list:
+    """Fragmenty (tekst, time_range) transkrypcji - jak w pozostałych ścieżkach ekstrakcji."""
+    from src.core.text_cleaner import clean_transcript_with_timeline
+    from src.utils.text_processing import split_with_time_ranges
+
+    with open(txt_path, "r", encoding="utf-8") as f:
+        raw_text = f.read()
+
+    clean_text, timeline = clean_transcript_with_timeline(raw_text)
+    return split_with_time_ranges(clean_text, timeline, chunk_size=CHUNK_SIZE, chunk_overlap=OVERLAP)
+
+
+def extract_file(txt_path: str, extractor, concurrency: int, logger: ConsoleLogger) -> str:
+    """Ekstrakcja wiedzy z jednej transkrypcji (fragmenty równolegle). Zwraca ścieżkę KB."""
+    from src.core.kb_store import save_kb, kb_path_for
+
+    chunks = load_chunks(txt_path)
+    if not chunks:
+        raise RuntimeError("brak fragmentów do analizy")
+
+    parallel = concurrency or f"auto, limit {extractor.llm.concurrency.limit}"
+    logger.log(f"[EXTRACT] {os.path.basename(txt_path)}: {len(chunks)} fragmentów (równolegle: {parallel})")
+
+    graphs = extractor.extract_chunks(chunks, concurrency=concurrency)
+    knowledge_base = [graph.model_dump() for graph in graphs]
+
+    return save_kb(kb_path_for(transcript_base_name(txt_path), DATA_PROCESSED), knowledge_base)
+
+
+def extract_files_packed(files: List[str], extractor, concurrency: int, logger: ConsoleLogger) -> int:
+    """
+    Ekstrakcja wielu plików naraz: krótkie fragmenty (także z różnych plików)
+    są pakowane po kilka w jednym zapytaniu (KnowledgeExtractor.extract_packed),
+    a wyniki rozdzielane z powrotem na pliki KB.
+    """
+    from src.core.kb_store import save_kb, kb_path_for
+
+    chunks_by_file, items = {}, []
+    for path in files:
+        try:
+            chunks_by_file[path] = load_chunks(path)
+        except Exception as e:
+            logger.log(f"[EXTRACT] Błąd ({os.path.basename(path)}): {e}")
+            continue
+        items += [(f"{path}#{i}", chunk, time_range) for i, (chunk, time_range) in enumerate(chunks_by_file[path])]
+
+    graphs = extractor.extract_packed(items, concurrency=concurrency)
+
+    failed = len(files) - len(chunks_by_file)
+    for path, chunks in chunks_by_file.items():
+        if not chunks:
+            logger.log(f"[EXTRACT] Błąd ({os.path.basename(path)}): brak fragmentów do analizy")
+            failed += 1
+            continue
+        knowledge_base = [graphs[f"{path}#{i}"].model_dump() for i in range(len(chunks))]
+        kb_path = save_kb(kb_path_for(transcript_base_name(path), DATA_PROCESSED), knowledge_base)
+        logger.log(f"[EXTRACT] Zapisano {os.path.basename(kb_path)}")
+    return failed
+
+
+def log_routing(llm, logger: ConsoleLogger) -> None:
+    """Podsumowanie decyzji routera (tylko --provider auto)."""
+    if llm.router is not None:
+        from src.core.provider_router import get_routing_trace
+
+        for line in get_routing_trace().format().splitlines():
+            logger.log(line)
+
+
+def cmd_extract(args, logger: ConsoleLogger) -> int:
+    from src.agents.extractor import KnowledgeExtractor, get_extraction_stats
+    from src.core.kb_store import find_kb_path
+    from src.core.llm_engine import unload_model
+
+    files = expand_inputs(args.inputs, TRANSCRIPT_EXTENSIONS)
+    if args.resume:
+        files = [f for f in files if not is_up_to_date(find_kb_path(transcript_base_name(f), DATA_PROCESSED), f)]
+
+    # Jeden ekstraktor (i klient HTTP) dla wszystkich plików
+    extractor = KnowledgeExtractor(provider=args.provider, model_name=args.model)
+
+    def extract(path):
+        kb_path = extract_file(path, extractor, args.concurrency, logger)
+        logger.log(f"[EXTRACT] Zapisano {os.path.basename(kb_path)}")
+
+    try:
+        if args.pack:
+            return extract_files_packed(files, extractor, args.concurrency, logger)
+        return run_for_files(files, extract, args.workers, logger, "EXTRACT")
+    finally:
+        logger.log(get_extraction_stats().format())
+        logger.log(extractor.llm.concurrency.format())
+        log_routing(extractor.llm, logger)
+        if extractor.llm.provider != "openai":
+            if len(extractor.llm.pool.hosts) > 1:
+                logger.log(extractor.llm.pool.format())
+            unload_model(extractor.llm.model)
+
+
+def note_path_for(kb_path: str, output_dir: str) -> str:
+    from src.core.kb_store import kb_base_name
+    from src.utils.helpers import sanitize_filename
+
+    return os.path.join(output_dir, f"{sanitize_filename(kb_base_name(kb_path))}.md")
+
+
+def cmd_write(args, logger: ConsoleLogger) -> int:
+    from src.agents.writer import ReportWriter
+    from src.core.kb_store import load_kb, kb_base_name, is_kb_file
+    from src.core.llm_engine import unload_model
+
+    # Sufiksy KB (nowy i stary format) zna tylko kb_store
+    files = [f for f in expand_inputs(args.inputs) if is_kb_file(f)]
+    if args.resume:
+        files = [f for f in files if not is_up_to_date(note_path_for(f, args.output), f)]
+
+    os.makedirs(args.output, exist_ok=True)
+    writer = ReportWriter(provider=args.provider, model_name=args.model)
+
+    def write(kb_path):
+        topic = args.topic or kb_base_name(kb_path)
+        content = writer.generate_chapter(topic, load_kb(kb_path), mode=args.mode, tags=[])
+        note_path = note_path_for(kb_path, args.output)
+        with open(note_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        logger.log(f"[WRITE] {os.path.basename(note_path)}")
+
+    try:
+        return run_for_files(files, write, args.workers, logger, "WRITE")
+    finally:
+        log_routing(writer.llm, logger)
+        if writer.llm.provider != "openai":
+            unload_model(writer.llm.model)
+
+
+TAGS_LINE = re.compile(r'^tags:.*$', re.MULTILINE)
+
+
+def split_frontmatter(content: str):
+    """Zwraca (frontmatter_z_ogranicznikami, treść). Bez frontmattera: ("", content)."""
+    if content.startswith("---\n"):
+        end = content.find("\n---", 4)
+        if end != -1:
+            end = content.find("\n", end + 4)
+            end = len(content) if end == -1 else end + 1
+            return content[:end], content[end:]
+    return "", content
+
+
+def cmd_tag(args, logger: ConsoleLogger) -> int:
+    from src.agents.tagger import TaggerAgent
+    from src.core.llm_engine import unload_model
+
+    files = expand_inputs(args.inputs, NOTE_EXTENSIONS)
+    tagger = TaggerAgent(provider=args.provider, model_name=args.model)
+
+    def tag(path):
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        frontmatter, body = split_frontmatter(content)
+
+        match = TAGS_LINE.search(frontmatter)
+        if args.resume and match and match.group(0).strip() not in ("tags: []", "tags:"):
+            return
+
+        tags = tagger.generate_tags(body)
+        tags_line = f"tags: {tags}"
+        if match:
+            frontmatter = frontmatter[:match.start()] + tags_line + frontmatter[match.end():]
+        else:
+            frontmatter = f"---\n{tags_line}\n---\n\n"
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(frontmatter + body)
+        logger.log(f"[TAG] {os.path.basename(path)}: {', '.join(tags)}")
+
+    try:
+        return run_for_files(files, tag, args.workers, logger, "TAG")
+    finally:
+        log_routing(tagger.llm, logger)
+        if tagger.llm.provider != "openai":
+            unload_model(tagger.llm.model)
+
+
+def cmd_export(args, logger: ConsoleLogger) -> int:
+    from src.core.obsidian_sync import sync_files
+
+    files = expand_inputs(args.inputs, NOTE_EXTENSIONS)
+    if not os.path.isdir(args.vault):
+        logger.log(f"[EXPORT] Vault nie istnieje: {args.vault}")
+        return 1
+    target_dir = os.path.join(args.vault, args.subfolder) if args.subfolder else args.vault
+
+    # Jeden przebieg z manifestem hashy: zapisywane są tylko zmienione notatki
+    report = sync_files(files, target_dir)
+    logger.log(
+        f"[EXPORT] {target_dir}: zapisano {report['written']}, "
+        f"bez zmian {report['skipped'] + report['unchanged']}, błędy {report['failed']}"
+    )
+    return report["failed"]
+
+
+def cmd_batch(args, logger: ConsoleLogger) -> int:
+    from src.core.batch_manager import BatchManager
+
+    batch_manager = BatchManager()
+
+    if args.batch_command == "status":
+        for batch in batch_manager.list_active_batches():
+            logger.log(f"[BATCH] {batch.id}: {batch.status} ({getattr(batch, 'request_counts', '')})")
+        return 0
+
+    if args.batch_command == "import":
+        expected_parts, time_ranges, packs = {}, {}, {}
+        if args.manifest:
+            with open(args.manifest, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            for entry in manifest.get("files", []):
+                expected_parts[entry["custom_id"]] = entry.get("parts", 1)
+                time_ranges.update(entry.get("time_ranges", {}))
+            packs = manifest.get("packs", {})
+
+        results = batch_manager.retrieve_results(args.batch_id)
+        imported = batch_manager.import_batch_to_lab(results, expected_parts=expected_parts,
+                                                     time_ranges=time_ranges, packs=packs)
+        logger.log(f"[BATCH] Zaimportowano: {', '.join(imported) or 'brak'}")
+        for base_name, missing in batch_manager.last_missing_parts.items():
+            logger.log(f"[BATCH] {base_name}: brakujące części {missing} - ponów z `batch submit --resume`")
+        return 1 if batch_manager.last_missing_parts else 0
+
+    # submit
+    from src.core.text_cleaner import clean_transcript_with_timeline
+    from src.utils.batch_utils import build_chunk_items, build_chunk_time_ranges, build_packed_batch_requests
+    from src.utils.helpers import sanitize_filename
+
+    files = expand_inputs(args.inputs, TRANSCRIPT_EXTENSIONS)
+    model = args.model or MODEL_EXTRACTOR_OPENAI
+    all_items, manifest_files = [], []
+
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            cleaned_text, timeline = clean_transcript_with_timeline(f.read())
+        custom_id = sanitize_filename(transcript_base_name(path))
+        items_for_file = build_chunk_items(custom_id, cleaned_text)
+        all_items.extend(items_for_file)
+        manifest_files.append({
+            "custom_id": custom_id,
+            "parts": len(items_for_file),
+            "time_ranges": build_chunk_time_ranges(custom_id, cleaned_text, timeline),
+            "transcript_file": path,
+        })
+
+    if args.resume:
+        missing = set(batch_manager.select_missing_ids([item_id for item_id, _ in all_items]))
+        all_items = [item for item in all_items if item[0] in missing]
+    if not all_items:
+        logger.log("[BATCH] Brak requestów do wysłania.")
+        return 0
+
+    # Krótkie fragmenty (także z różnych plików) po kilka w jednym requeście
+    requests_list, packs = build_packed_batch_requests(all_items, model=model, pack=not args.no_pack)
+    if packs:
+        packed = sum(len(id_map) for id_map in packs.values())
+        logger.log(f"[BATCH] {packed} krótkich fragmentów w {len(packs)} pakietach.")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    jsonl_path = batch_manager.create_batch_file(requests_list, f"cli_batch_{timestamp}.jsonl")
+    batch_id = batch_manager.upload_and_submit(jsonl_path, description=f"CLI batch {timestamp} - {len(requests_list)} requestów")
+
+    manifest_path = os.path.join(DATA_PROCESSED, f"batch_manifest_{timestamp}.json")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"batch_id": batch_id, "timestamp": timestamp, "files": manifest_files, "packs": packs},
+                  f, ensure_ascii=False, indent=2)
+
+    logger.log(f"[BATCH] Wysłano {len(requests_list)} requestów, BATCH ID: {batch_id}")
+    logger.log(f"[BATCH] Import: transkrypcje batch import {batch_id} --manifest {manifest_path}")
+    return 0
+
+
+# ============================================================================
+# PARSER
+# ============================================================================
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--workers", type=int, default=1, help="Ile plików przetwarzać równolegle")
+    common.add_argument("--resume", action="store_true", help="Pomiń pliki, dla których wynik jest aktualny")
+
+    llm = argparse.ArgumentParser(add_help=False)
+    llm.add_argument("--provider", choices=["ollama", "openai", "auto"], default=None,
+                     help="Provider LLM (domyślnie LLM_PROVIDER; auto = router per wywołanie)")
+    llm.add_argument("--model", default=None, help="Nadpisuje model LLM dla etapu")
+
+    parser = argparse.ArgumentParser(prog="transkrypcje", description="Transkrypcja i ekstrakcja wiedzy z nagrań.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("download", parents=[common], help="Pobieranie z YouTube")
+    p.add_argument("urls", nargs="*", help="URL-e (filmy lub playlisty)")
+    p.add_argument("--urls-file", default=None, help="Plik z URL-ami (jeden per linia)")
+    p.add_argument("--output", default=DATA_RAW)
+    p.add_argument("--quality", default="audio_only", choices=["audio_only", "best", "worst"])
+    p.add_argument("--audio-quality", default="128")
+    p.add_argument("--audio-codec", default=DOWNLOAD_AUDIO_CODEC, choices=["best", "mp3", "m4a", "opus", "wav"],
+                   help="audio_only: best = bez ponownego kodowania")
+    p.set_defaults(func=cmd_download)
+
+    p = sub.add_parser("transcribe", parents=[common], help="Transkrypcja Whisper",
+                       description="--workers N > 1: pula procesów (po jednym na GPU lub kilka na CPU), 0 = auto.")
+    p.add_argument("inputs", nargs="+", help="Pliki audio/wideo, katalogi lub wzorce glob")
+    p.add_argument("--model", default=DEFAULT_MODEL_SIZE, choices=WHISPER_MODELS)
+    p.add_argument("--language", default=None, help="Kod języka (domyślnie auto-detekcja)")
+    p.add_argument("--format", default="txt", choices=["txt", "json", "srt", "vtt", "txt_no_timestamps"])
+    p.add_argument("--split-long", action="store_true",
+                   help="Długie nagrania: okna w ciszy (VAD) transkrybowane równolegle przez pulę")
+    p.set_defaults(func=cmd_transcribe)
+
+    p = sub.add_parser("extract", parents=[common, llm], help="Ekstrakcja wiedzy (KB) z transkrypcji")
+    p.add_argument("inputs", nargs="+", help="Pliki .txt, katalogi lub wzorce glob")
+    p.add_argument("--concurrency", type=int, default=0,
+                   help="Równoległe zapytania LLM na plik (0 = adaptacyjnie, AIMD)")
+    p.add_argument("--pack", action="store_true",
+                   help="Krótkie fragmenty wszystkich plików po kilka w jednym zapytaniu (krótkie filmy)")
+    p.set_defaults(func=cmd_extract)
+
+    p = sub.add_parser("write", parents=[common, llm], help="Generowanie notatki z bazy wiedzy")
+    p.add_argument("inputs", nargs="+", help="Pliki _kb.jsonl, katalogi lub wzorce glob")
+    p.add_argument("--mode", default="deep_dive", help="Tryb promptu (np. standard, deep_dive)")
+    p.add_argument("--topic", default=None, help="Temat (domyślnie nazwa pliku KB)")
+    p.add_argument("--output", default=DATA_OUTPUT)
+    p.set_defaults(func=cmd_write)
+
+    p = sub.add_parser("tag", parents=[common, llm], help="Tagowanie notatek (frontmatter)")
+    p.add_argument("inputs", nargs="+", help="Notatki .md, katalogi lub wzorce glob")
+    p.set_defaults(func=cmd_tag)
+
+    # Bez --resume/--workers: sync_files i tak pomija notatki bez zmian (manifest hashy)
+    p = sub.add_parser("export", help="Eksport notatek do Obsidian")
+    p.add_argument("inputs", nargs="+", help="Notatki .md, katalogi lub wzorce glob")
+    p.add_argument("--vault", default=OBSIDIAN_VAULT_PATH)
+    p.add_argument("--subfolder", default=OBSIDIAN_SUBFOLDER)
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("batch", help="OpenAI Batch API")
+    batch_sub = p.add_subparsers(dest="batch_command", required=True)
+    bp = batch_sub.add_parser("submit", parents=[common], help="Wysyła transkrypcje do Batch API")
+    bp.add_argument("inputs", nargs="+", help="Pliki .txt, katalogi lub wzorce glob")
+    bp.add_argument("--model", default=None, help=f"Model OpenAI (domyślnie {MODEL_EXTRACTOR_OPENAI})")
+    bp.add_argument("--no-pack", action="store_true", help="Każdy fragment jako osobny request (bez pakowania krótkich)")
+    bp = batch_sub.add_parser("import", help="Importuje wyniki batcha do KB")
+    bp.add_argument("batch_id")
+    bp.add_argument("--manifest", default=None, help="Manifest z `batch submit` (części, zakresy czasu)")
+    batch_sub.add_parser("status", help="Lista aktywnych batchy")
+    p.set_defaults(func=cmd_batch)
+
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logger = ConsoleLogger()
+    # Budżet OpenAI routera (--provider auto) liczony od zera w każdym wywołaniu
+    from src.core.provider_router import get_routing_trace
+    get_routing_trace().reset()
+    try:
+        failures = args.func(args, logger)
+    except KeyboardInterrupt:
+        logger.log("Przerwano.")
+        return 130
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
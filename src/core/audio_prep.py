@@ -0,0 +1,142 @@
+"""
+Audio Prep - jednorazowe dekodowanie nagrań do 16 kHz mono PCM z cache.
+
+Whisper i tak pracuje na 16 kHz mono float32, więc plik źródłowy (mp3, m4a,
+webm, mp4...) dekodujemy raz i zapisujemy surowe próbki (float32 LE) w
+AUDIO_CACHE_DIR pod kluczem = hash zawartości źródła. Kolejne transkrypcje
+(inny rozmiar modelu, okna długiego nagrania, procesy puli) mapują plik
+w pamięć (np.memmap) zamiast dekodować go ponownie.
+
+Użycie:
+    audio = load_audio("wyklad.m4a")   # np.memmap float32, 16 kHz
+    segments, info = model.transcribe(audio)
+    pcm_path = prepare_audio("wyklad.m4a")   # ścieżka pliku w cache (dla innych procesów)
+"""
+
+import hashlib
+import os
+import subprocess
+import threading
+from typing import Dict, Optional, Tuple
+
+from src.utils.config import AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_GB
+
+SAMPLE_RATE = 16000
+PCM_EXTENSION = ".f32"
+
+# (ścieżka, rozmiar, mtime) -> hash; oszczędza ponowne haszowanie w tym samym procesie
+_hash_memo: Dict[Tuple[str, int, int], str] = {}
+_lock = threading.Lock()
+
+
+def source_hash(path: str) -> str:
+    """Hash zawartości pliku źródłowego (BLAKE2b, 128 bit)."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _lock:
+        cached = _hash_memo.get(memo_key)
+    if cached:
+        return cached
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    value = digest.hexdigest()
+
+    with _lock:
+        _hash_memo[memo_key] = value
+    return value
+
+
+def _decode(path: str, output_path: str) -> None:
+    """Dekoduje plik do surowego PCM float32 LE 16 kHz mono (ffmpeg, a bez niego PyAV)."""
+    from src.utils.helpers import check_ffmpeg
+
+    if check_ffmpeg()[0]:
+        # ffmpeg zapisuje strumieniowo na dysk - bez trzymania całego nagrania w RAM
+        cmd = [
+            "ffmpeg", "-nostdin", "-y", "-loglevel", "error",
+            "-i", path, "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+            "-f", "f32le", output_path,
+        ]
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Błąd FFmpeg: {result.stderr.strip()}")
+        return
+
+    from faster_whisper import decode_audio
+
+    decode_audio(path, sampling_rate=SAMPLE_RATE).astype("<f4", copy=False).tofile(output_path)
+
+
+def prepare_audio(path: str, cache_dir: Optional[str] = None) -> str:
+    """
+    Zwraca ścieżkę zdekodowanego PCM w cache (dekoduje tylko przy braku wpisu).
+    Zapis atomowy (plik tymczasowy + os.replace), więc równoległe procesy
+    nie widzą niepełnych plików.
+    """
+    cache_dir = cache_dir or AUDIO_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    pcm_path = os.path.join(cache_dir, source_hash(path) + PCM_EXTENSION)
+
+    if os.path.exists(pcm_path):
+        os.utime(pcm_path)  # świeży wpis nie zostanie usunięty przy przycinaniu cache
+        return pcm_path
+
+    tmp_path = f"{pcm_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        _decode(path, tmp_path)
+        os.replace(tmp_path, pcm_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    prune_audio_cache(cache_dir, keep=pcm_path)
+    return pcm_path
+
+
+def open_pcm(pcm_path: str):
+    """Mapuje plik PCM z cache w pamięć (tylko do odczytu)."""
+    import numpy as np
+
+    if os.path.getsize(pcm_path) == 0:
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(pcm_path, dtype=np.float32, mode="r")
+
+
+def load_audio(path: str, cache_dir: Optional[str] = None):
+    """Nagranie jako 16 kHz mono float32 (np.memmap z cache)."""
+    return open_pcm(prepare_audio(path, cache_dir))
+
+
+def prune_audio_cache(cache_dir: Optional[str] = None, max_bytes: Optional[int] = None,
+                      keep: Optional[str] = None) -> int:
+    """Usuwa najdawniej używane wpisy ponad limit AUDIO_CACHE_MAX_GB. Zwraca liczbę usuniętych."""
+    cache_dir = cache_dir or AUDIO_CACHE_DIR
+    if max_bytes is None:
+        max_bytes = int(AUDIO_CACHE_MAX_GB * 1024 ** 3)
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(PCM_EXTENSION):
+            full = os.path.join(cache_dir, name)
+            stat = os.stat(full)
+            entries.append((stat.st_mtime, stat.st_size, full))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, full in sorted(entries):
+        if total <= max_bytes:
+            break
+        if full == keep:
+            continue
+        try:
+            os.remove(full)
+        except OSError:
+            continue  # np. plik zmapowany przez inny proces na Windows
+        total -= size
+        removed += 1
+    return removed
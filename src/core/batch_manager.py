@@ -1,15 +1,21 @@
 import json
 import os
 import time
-from typing import List, Dict
-from openai import OpenAI
+from collections import defaultdict
+from typing import Iterator, List, Dict, Optional, Tuple
 from src.utils.config import OPENAI_API_KEY, DATA_PROCESSED
+from src.core.kb_store import kb_path_for, find_kb_path, load_kb, save_kb
+from src.core.chunk_packer import split_pack_result
+from src.core.schema import normalize_extraction
 
 class BatchManager:
     """Zarządza operacjami OpenAI Batch API."""
     
     def __init__(self):
+        from openai import OpenAI  # import openai trwa ~1 s - tylko gdy faktycznie używamy Batch API
+
         self.client = OpenAI(api_key=OPENAI_API_KEY)
+        self.last_missing_parts: Dict[str, List[int]] = {}
 
     def create_batch_file(self, requests: List[Dict], filename: str) -> str:
         """
@@ -63,63 +69,193 @@ class BatchManager:
         """Anuluje batch."""
         return self.client.batches.cancel(batch_id)
 
-    def import_batch_to_lab(self, results: List[Dict]) -> List[str]:
+    @staticmethod
+    def parse_custom_id(custom_id: str) -> Tuple[str, Optional[int]]:
         """
-        Przekształca wyniki Batcha w pliki _kb.json gotowe dla Laboratorium.
-        Teraz obsługuje scalanie chunków (custom_id w formacie 'plik__part_N').
+        Rozbija custom_id na (nazwa_bazowa, indeks_części).
+        Format chunków: 'plik__part_N'. Dla pojedynczych requestów indeks to None.
         """
-        from collections import defaultdict
-        
-        # Grupowanie wyników według nazwy bazowej pliku
-        grouped_results = defaultdict(list)
-        
+        if "__part_" in custom_id:
+            base_name, _, part = custom_id.rpartition("__part_")
+            if part.isdigit():
+                return base_name, int(part)
+            return base_name, None
+        return os.path.splitext(custom_id)[0], None
+
+    @staticmethod
+    def _parse_result_json(res: Dict):
+        """Treść pojedynczej odpowiedzi Batch API jako JSON."""
+        # Wyciągnięcie treści z odpowiedzi OpenAI
+        content = res["response"]["body"]["choices"][0]["message"]["content"]
+
+        # Proste czyszczenie markdowna
+        if content.startswith("```json"):
+            content = content.replace("```json", "", 1).rsplit("```", 1)[0].strip()
+        elif content.startswith("```"):
+            content = content.replace("```", "", 1).rsplit("```", 1)[0].strip()
+
+        return json.loads(content)
+
+    @staticmethod
+    def _parse_result_content(res: Dict) -> List[Dict]:
+        """Wyciąga listę segmentów KB z pojedynczej odpowiedzi Batch API."""
+        parsed_data = BatchManager._parse_result_json(res)
+
+        # Upewnienie się, że mamy listę segmentów; klucze (także polskie aliasy)
+        # mapowane na pola KnowledgeGraph z tego samego rejestru co prompt
+        if isinstance(parsed_data, list):
+            return [normalize_extraction(item) for item in parsed_data if isinstance(item, dict)]
+        if isinstance(parsed_data, dict):
+            # Jeśli model zwrócił jeden obiekt (np. z listami narzędzi/pojęć)
+            # to też pakujemy to w listę dla Laboratorium
+            return [normalize_extraction(parsed_data)]
+        return []
+
+    @staticmethod
+    def _load_existing_parts(base_name: str) -> Dict[int, List[Dict]]:
+        """
+        Wczytuje istniejący plik KB (dowolny format) i grupuje segmenty według
+        numeru części. Segmenty bez pola 'part' (stare pliki) trafiają do części 0.
+        """
+        kb_path = find_kb_path(base_name, DATA_PROCESSED)
+        if not kb_path:
+            return {}
+
+        try:
+            data = load_kb(kb_path)
+        except Exception as e:
+            print(f"[BATCH] Nie można wczytać istniejącej bazy {kb_path}: {e}")
+            return {}
+
+        parts = defaultdict(list)
+        for item in data:
+            if isinstance(item, dict):
+                parts[item.get("part", 0)].append(item)
+        return dict(parts)
+
+    def _iter_result_items(self, results: List[Dict],
+                           packs: Dict[str, Dict[str, str]]) -> Iterator[Tuple[str, List[Dict]]]:
+        """(custom_id, segmenty) dla każdego wyniku; pakiety rozkładane na fragmenty."""
         for res in results:
             custom_id = res.get("custom_id", f"unknown_{int(time.time())}")
-            
-            # Obsługa formatu chunków: nazwa__part_0
-            if "__part_" in custom_id:
-                base_name = custom_id.split("__part_")[0]
-            else:
-                base_name = os.path.splitext(custom_id)[0]
-            
             try:
-                # Wyciągnięcie treści z odpowiedzi OpenAI
-                content = res["response"]["body"]["choices"][0]["message"]["content"]
-                
-                # Proste czyszczenie markdowna
-                if content.startswith("```json"):
-                    content = content.replace("```json", "", 1).rsplit("```", 1)[0].strip()
-                elif content.startswith("```"):
-                    content = content.replace("```", "", 1).rsplit("```", 1)[0].strip()
-                
-                parsed_data = json.loads(content)
-                
-                # Upewnienie się, że mamy listę segmentów
-                if isinstance(parsed_data, list):
-                    grouped_results[base_name].extend(parsed_data)
-                elif isinstance(parsed_data, dict):
-                    # Jeśli model zwrócił jeden obiekt (np. z listami narzędzi/pojęć)
-                    # to też pakujemy to w listę dla Laboratorium
-                    grouped_results[base_name].append(parsed_data)
-                    
+                if custom_id not in packs:
+                    yield custom_id, self._parse_result_content(res)
+                    continue
+
+                graphs = split_pack_result(self._parse_result_json(res), packs[custom_id])
+                for member_id in packs[custom_id].values():
+                    if member_id in graphs:
+                        yield member_id, [normalize_extraction(graphs[member_id])]
+                    else:
+                        print(f"[BATCH] Pakiet {custom_id}: brak wyniku dla {member_id}")
             except Exception as e:
                 print(f"[BATCH] Błąd parsowania dla {custom_id}: {e}")
 
+    def import_batch_to_lab(self, results: List[Dict],
+                            expected_parts: Optional[Dict[str, int]] = None,
+                            time_ranges: Optional[Dict[str, str]] = None,
+                            packs: Optional[Dict[str, Dict[str, str]]] = None) -> List[str]:
+        """
+        Przekształca wyniki Batcha w pliki KB (_kb.jsonl) gotowe dla Laboratorium.
+        Obsługuje scalanie chunków (custom_id w formacie 'plik__part_N'):
+        - segmenty są sortowane według numeru części (a nie kolejności z API),
+        - części są dopisywane (upsert) do istniejącego pliku KB, więc częściowe
+          batche i ponowienia nie nadpisują wcześniej zaimportowanych części,
+        - `time_range` części pochodzi z indeksu czasu transkrypcji (time_ranges),
+          a w razie jego braku uzupełniany jest numerem części ("Part N").
+
+        Args:
+            results: Wyniki z retrieve_results().
+            expected_parts: Opcjonalnie {nazwa_bazowa: liczba_części}. Brakujące części
+                są zapisywane w self.last_missing_parts (patrz missing_parts()).
+            time_ranges: Opcjonalnie {custom_id: "MM:SS -> MM:SS"} z manifestu
+                (patrz build_chunk_time_ranges()).
+            packs: Opcjonalnie {custom_id pakietu: {"F1": custom_id fragmentu}} z manifestu
+                (patrz build_packed_batch_requests()) - wyniki pakietów są rozdzielane
+                na fragmenty, a fragmenty pominięte przez model trafiają do brakujących części.
+
+        Returns:
+            Lista nazw zapisanych plików KB.
+        """
+        # Grupowanie wyników: nazwa bazowa -> numer części -> segmenty
+        grouped_results = defaultdict(dict)
+        whole_files = set()
+
+        for custom_id, items in self._iter_result_items(results, packs or {}):
+            base_name, part = self.parse_custom_id(custom_id)
+
+            if part is None:
+                # Pojedynczy request = cała transkrypcja (zastępuje cały plik)
+                whole_files.add(base_name)
+                part = 0
+            else:
+                real_time = (time_ranges or {}).get(custom_id)
+                for item in items:
+                    item["part"] = part
+                    if real_time:
+                        item["time_range"] = real_time
+                    elif not item.get("time_range"):
+                        item["time_range"] = f"Part {part + 1}"
+
+            grouped_results[base_name].setdefault(part, []).extend(items)
+
         imported_files = []
         os.makedirs(DATA_PROCESSED, exist_ok=True)
-        
-        for base_name, kb_data in grouped_results.items():
-            kb_filename = f"{base_name}_kb.json"
-            kb_path = os.path.join(DATA_PROCESSED, kb_filename)
-            
+
+        for base_name, new_parts in grouped_results.items():
+            kb_path = kb_path_for(base_name, DATA_PROCESSED)
+
             try:
-                # Jeśli plik już istnieje, wczytaj go i doklej (opcjonalne, ale bezpieczniejsze dla dużych batchy)
-                # Na razie nadpisujemy/tworzymy nowy z całości zebranej w tym batchu
-                with open(kb_path, "w", encoding="utf-8") as f:
-                    json.dump(kb_data, f, ensure_ascii=False, indent=2)
-                
-                imported_files.append(kb_filename)
+                # Upsert: nowe części zastępują tylko te same numery części
+                merged = {} if base_name in whole_files else self._load_existing_parts(base_name)
+                merged.update(new_parts)
+
+                kb_data = [item for part in sorted(merged) for item in merged[part]]
+                save_kb(kb_path, kb_data)
+
+                imported_files.append(os.path.basename(kb_path))
             except Exception as e:
                 print(f"[BATCH] Błąd zapisu dla {base_name}: {e}")
-                
+
+        self.last_missing_parts = {}
+        for base_name, total in (expected_parts or {}).items():
+            missing = self.missing_parts(base_name, total)
+            if missing:
+                self.last_missing_parts[base_name] = missing
+                print(f"[BATCH] {base_name}: brakuje części {missing}")
+
         return imported_files
+
+    def missing_parts(self, base_name: str, total_parts: int) -> List[int]:
+        """Zwraca numery części (0..total_parts-1), których brakuje w pliku KB."""
+        present = self._load_existing_parts(base_name)
+        return [part for part in range(total_parts) if part not in present]
+
+    def select_missing_requests(self, requests: List[Dict]) -> List[Dict]:
+        """
+        Filtruje listę requestów Batch API, zostawiając tylko części,
+        których nie ma jeszcze w plikach KB. Ponowienie nieudanego fragmentu
+        kosztuje wtedy tylko ten fragment.
+        """
+        missing = set(self.select_missing_ids([req["custom_id"] for req in requests]))
+        return [req for req in requests if req["custom_id"] in missing]
+
+    def select_missing_ids(self, custom_ids: List[str]) -> List[str]:
+        """Jak select_missing_requests, dla samych custom_id (np. przed pakowaniem fragmentów)."""
+        present_cache = {}
+        selected = []
+
+        for custom_id in custom_ids:
+            base_name, part = self.parse_custom_id(custom_id)
+            if part is None:
+                selected.append(custom_id)
+                continue
+
+            if base_name not in present_cache:
+                present_cache[base_name] = self._load_existing_parts(base_name)
+
+            if part not in present_cache[base_name]:
+                selected.append(custom_id)
+
+        return selected
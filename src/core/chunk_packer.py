@@ -0,0 +1,101 @@
+"""
+Chunk Packer - kilka krótkich fragmentów w jednym zapytaniu ekstrakcji.
+
+Ostatni fragment każdej transkrypcji i całe krótkie transkrypcje (np. z napisów)
+są znacznie mniejsze niż CHUNK_SIZE, a każde zapytanie powtarza pełny
+EXTRACTION_PROMPT["system"]. Packer łączy takie fragmenty (także z różnych
+plików) w pakiety do PACK_MAX_CHARS znaków; model zwraca tablicę grafów
+z identyfikatorami F1, F2, ... (PackedKnowledgeGraphs), którą split_pack_result
+rozkłada z powrotem na klucze fragmentów.
+
+Użycie:
+    packs, singles = plan_packs([("wyklad__part_3", tekst), ("krotki", tekst2), ...])
+    for members in packs:
+        text, id_map = render_pack(members)
+        prompt = EXTRACTION_PROMPT_PACKED["user"].format(fragments=text)
+        ...
+        graphs = split_pack_result(response, id_map)   # {klucz: dict KnowledgeGraph}
+"""
+
+import hashlib
+from typing import Any, Dict, List, Tuple
+
+from src.utils.config import PACK_SMALL_CHARS, PACK_MAX_CHARS, PACK_MAX_ITEMS
+
+PACK_ID_PREFIX = "pack__"
+
+PackItem = Tuple[str, str]  # (klucz, tekst)
+
+
+def plan_packs(items: List[PackItem], small_chars: int = PACK_SMALL_CHARS, max_chars: int = PACK_MAX_CHARS,
+               max_items: int = PACK_MAX_ITEMS) -> Tuple[List[List[PackItem]], List[PackItem]]:
+    """
+    Dzieli fragmenty na pakiety i fragmenty wysyłane osobno.
+
+    Krótkie fragmenty (< small_chars) trafiają do pakietów metodą first-fit
+    decreasing (najdłuższe najpierw), z limitem długości i liczby elementów.
+    Pakiet z jednym fragmentem nie ma sensu - taki fragment idzie osobno.
+
+    Returns:
+        (pakiety, pojedyncze) - pojedyncze w kolejności wejściowej.
+    """
+    small = [item for item in items if len(item[1]) < small_chars]
+    packs: List[List[PackItem]] = []
+    sizes: List[int] = []
+
+    for item in sorted(small, key=lambda it: len(it[1]), reverse=True):
+        for i, pack in enumerate(packs):
+            if len(pack) < max_items and sizes[i] + len(item[1]) <= max_chars:
+                pack.append(item)
+                sizes[i] += len(item[1])
+                break
+        else:
+            packs.append([item])
+            sizes.append(len(item[1]))
+
+    packed_keys = {key for pack in packs if len(pack) > 1 for key, _ in pack}
+    order = {key: i for i, (key, _) in enumerate(items)}
+    packs = [sorted(pack, key=lambda it: order[it[0]]) for pack in packs if len(pack) > 1]
+    singles = [item for item in items if item[0] not in packed_keys]
+    return packs, singles
+
+
+def pack_id(members: List[PackItem]) -> str:
+    """Stabilny identyfikator pakietu (np. custom_id w Batch API)."""
+    digest = hashlib.blake2b("\n".join(key for key, _ in members).encode("utf-8"), digest_size=6)
+    return PACK_ID_PREFIX + digest.hexdigest()
+
+
+def render_pack(members: List[PackItem]) -> Tuple[str, Dict[str, str]]:
+    """Zwraca (tekst fragmentów z nagłówkami [F1], [F2], ..., {F1: klucz})."""
+    id_map = {f"F{i + 1}": key for i, (key, _) in enumerate(members)}
+    text = "\n\n".join(f"[F{i + 1}]\n{chunk.strip()}" for i, (_, chunk) in enumerate(members))
+    return text, id_map
+
+
+def _fragment_id(value: Any) -> str:
+    """"F2", "f2", "2", 2, "[F2]" -> "F2"."""
+    text = str(value).strip().strip("[]").upper()
+    return text if text.startswith("F") else f"F{text}"
+
+
+def split_pack_result(result: Any, id_map: Dict[str, str]) -> Dict[str, Dict]:
+    """
+    Rozkłada odpowiedź na pakiet (PackedKnowledgeGraphs albo surowy dict/lista)
+    na {klucz_fragmentu: dane KnowledgeGraph}. Fragmenty pominięte przez model
+    nie występują w wyniku - wywołujący przetwarza je osobno.
+    """
+    if hasattr(result, "model_dump"):
+        result = result.model_dump()
+    fragments = result.get("fragments", []) if isinstance(result, dict) else result
+    if not isinstance(fragments, list):
+        return {}
+
+    graphs: Dict[str, Dict] = {}
+    for fragment in fragments:
+        if not isinstance(fragment, dict) or "id" not in fragment:
+            continue
+        key = id_map.get(_fragment_id(fragment["id"]))
+        if key is not None and key not in graphs:
+            graphs[key] = {k: v for k, v in fragment.items() if k != "id"}
+    return graphs
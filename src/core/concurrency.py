@@ -0,0 +1,177 @@
+"""
+Concurrency - adaptacyjny (AIMD) limit równoległych wywołań LLM.
+
+Właściwa liczba równoległych zapytań zależy od backendu: RTX 3060 z Ollamą
+(num_ctx 4096) nasyca się przy 2, API OpenAI przyjmuje dziesiątki. Zamiast
+ręcznie stroić `--concurrency` na każdej maszynie, każdy provider/model ma
+kontroler, który:
+
+- podnosi limit o 1 po każdej "rundzie" (tyle udanych wywołań, ile wynosi
+  limit), o ile przepustowość (wywołania/s) w tej rundzie wzrosła,
+- tnie limit o połowę przy timeout, 429, błędzie serwera/połączenia albo
+  skoku opóźnienia (> LATENCY_SPIKE x bazowe); jedno zdarzenie przeciążenia
+  = jedno cięcie (sygnały z wywołań rozpoczętych przed cięciem są ignorowane).
+
+Użycie:
+    controller = get_concurrency_controller("ollama:http://localhost:11434", "qwen2.5:7b")
+    with controller.slot():          # czeka, gdy in-flight >= limit
+        response = client.chat(...)
+    print(controller.format())       # bieżący limit i metryki
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from src.utils.config import (
+    LLM_CONCURRENCY_INITIAL, LLM_CONCURRENCY_MAX_OLLAMA, LLM_CONCURRENCY_MAX_OPENAI,
+)
+
+OVERLOAD_ERRORS = ("timeout", "rate_limit", "server", "connection")
+LATENCY_SPIKE = 2.0      # opóźnienie > 2x bazowe = przeciążenie
+THROUGHPUT_GAIN = 1.05   # podnosimy limit, dopóki runda daje >= 5% więcej wywołań/s
+EWMA_ALPHA = 0.2
+
+
+class AdaptiveConcurrency:
+    """Semafor z limitem sterowanym AIMD i metrykami opóźnień/błędów."""
+
+    def __init__(self, name: str, initial: int = LLM_CONCURRENCY_INITIAL, min_limit: int = 1,
+                 max_limit: int = LLM_CONCURRENCY_MAX_OLLAMA, clock=time.monotonic):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.limit = min(max(initial, min_limit), self.max_limit)
+        self._clock = clock
+        self._cond = threading.Condition()
+
+        self.in_flight = 0
+        self.waiting = 0     # wątki czekające na slot (długość kolejki)
+        self.completed = 0
+        self.errors = 0
+        self.decreases = 0
+        self.latency: Optional[float] = None     # EWMA
+        self.baseline: Optional[float] = None    # najniższe EWMA przy niskim obciążeniu
+        self._last_decrease = float("-inf")
+        self._round_start = clock()
+        self._round_done = 0
+        self._last_throughput: Optional[float] = None
+
+    # --- Sloty ---
+
+    def acquire(self) -> float:
+        """Czeka na wolny slot; zwraca czas startu wywołania."""
+        with self._cond:
+            self.waiting += 1
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.waiting -= 1
+            self.in_flight += 1
+            return self._clock()
+
+    def release(self, started: float, error_kind: Optional[str] = None) -> None:
+        """Zwalnia slot i aktualizuje limit (error_kind z retry_policy.classify_error)."""
+        latency = self._clock() - started
+        with self._cond:
+            self.in_flight -= 1
+            if error_kind in OVERLOAD_ERRORS:
+                self.errors += 1
+                self._decrease(started, f"błąd {error_kind}")
+            elif error_kind is None:
+                self._on_success(started, latency)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        from src.core.retry_policy import classify_error
+
+        started = self.acquire()
+        try:
+            yield
+        except BaseException as e:
+            self.release(started, classify_error(e) if isinstance(e, Exception) else "cancelled")
+            raise
+        self.release(started)
+
+    # --- AIMD ---
+
+    def _on_success(self, started: float, latency: float) -> None:
+        self.completed += 1
+        self.latency = latency if self.latency is None else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.latency
+        if self.baseline is None or self.latency < self.baseline:
+            self.baseline = self.latency
+
+        if latency > LATENCY_SPIKE * self.baseline and self.limit > self.min_limit:
+            self._decrease(started, f"opóźnienie {latency:.1f} s > {LATENCY_SPIKE:.0f}x bazowe")
+            return
+
+        self._round_done += 1
+        if self._round_done < self.limit:
+            return
+
+        # Koniec rundy: podnosimy limit tylko, gdy przepustowość faktycznie rośnie
+        elapsed = max(self._clock() - self._round_start, 1e-6)
+        throughput = self._round_done / elapsed
+        improved = self._last_throughput is None or throughput >= self._last_throughput * THROUGHPUT_GAIN
+        self._last_throughput = throughput
+        self._round_start = self._clock()
+        self._round_done = 0
+        if improved and self.limit < self.max_limit:
+            self.limit += 1
+
+    def _decrease(self, started: float, reason: str) -> None:
+        if started < self._last_decrease:
+            return  # wywołanie sprzed ostatniego cięcia - to samo przeciążenie
+        old = self.limit
+        self.limit = max(self.min_limit, self.limit // 2)
+        self._last_decrease = self._clock()
+        self._round_start = self._last_decrease
+        self._round_done = 0
+        self._last_throughput = None
+        self.decreases += 1
+        if self.limit != old:
+            print(f"[AIMD] {self.name}: {reason} - limit {old} -> {self.limit}")
+
+    # --- Metryki ---
+
+    def metrics(self) -> Dict:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "max_limit": self.max_limit,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "completed": self.completed,
+                "errors": self.errors,
+                "decreases": self.decreases,
+                "latency": round(self.latency, 3) if self.latency is not None else None,
+                "baseline": round(self.baseline, 3) if self.baseline is not None else None,
+            }
+
+    def format(self) -> str:
+        m = self.metrics()
+        latency = f"{m['latency']:.1f} s" if m["latency"] is not None else "-"
+        return (
+            f"[AIMD] {self.name}: limit {m['limit']}/{m['max_limit']}, wywołania {m['completed']}, "
+            f"błędy {m['errors']}, cięcia {m['decreases']}, śr. opóźnienie {latency}"
+        )
+
+
+_controllers: Dict[str, AdaptiveConcurrency] = {}
+_controllers_lock = threading.Lock()
+
+
+def get_concurrency_controller(backend: str, model: str, max_limit: Optional[int] = None) -> AdaptiveConcurrency:
+    """
+    Zwraca współdzielony kontroler dla pary backend/model. `max_limit` nadpisuje
+    domyślną górną granicę (np. pula kilku hostów Ollamy).
+    """
+    name = f"{backend}/{model}"
+    with _controllers_lock:
+        controller = _controllers.get(name)
+        if controller is None:
+            if max_limit is None:
+                max_limit = LLM_CONCURRENCY_MAX_OPENAI if backend == "openai" else LLM_CONCURRENCY_MAX_OLLAMA
+            controller = _controllers[name] = AdaptiveConcurrency(name, max_limit=max_limit)
+        return controller
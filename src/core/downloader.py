@@ -1,8 +1,12 @@
 import os
-import yt_dlp
 import subprocess
 import time
-from src.utils.helpers import get_file_size
+# AUDIO_EXTENSIONS - możliwe rozszerzenia po FFmpegExtractAudio z preferredcodec="best"
+from src.utils.config import DOWNLOAD_AUDIO_CODEC, AUDIO_EXTENSIONS
+from src.utils.helpers import get_file_size, lazy_import
+
+# Import yt_dlp trwa ~0.5 s - ładowany dopiero przy pierwszym pobieraniu
+yt_dlp = lazy_import("yt_dlp")
 
 class Downloader:
     def __init__(self, logger, stop_event, progress_callback):
@@ -10,8 +14,11 @@ class Downloader:
         self.stop_event = stop_event
         self.progress_callback = progress_callback
 
-    def download_video(self, url, save_path, quality, audio_quality="192"):
-        """Pobiera wideo z YouTube (obsługuje playlisty)"""
+    def download_video(self, url, save_path, quality, audio_quality="192", audio_codec=DOWNLOAD_AUDIO_CODEC):
+        """Pobiera wideo z YouTube (obsługuje playlisty).
+
+        audio_codec (tylko audio_only): "best" zostawia oryginalny kodek, "mp3" konwertuje.
+        """
         if self.stop_event.is_set():
             raise InterruptedError("Operacja anulowana przez użytkownika")
         
@@ -75,13 +82,14 @@ class Downloader:
                 "postprocessors": [{"key": "FFmpegVideoConvertor", "preferedformat": "mp4"}],
             })
         elif quality == "audio_only":
+            # "best" = ścieżka audio bez ponownego kodowania - transkrypcja i tak dekoduje
+            # ją raz do 16 kHz PCM (audio_prep); MP3 tylko gdy jest potrzebne jako wynik
+            extract_audio = {"key": "FFmpegExtractAudio", "preferredcodec": audio_codec}
+            if audio_codec == "mp3":
+                extract_audio["preferredquality"] = audio_quality
             final_opts.update({
                 "format": "bestaudio/best",
-                "postprocessors": [{
-                    "key": "FFmpegExtractAudio",
-                    "preferredcodec": "mp3",
-                    "preferredquality": audio_quality,
-                }],
+                "postprocessors": [extract_audio],
             })
             
         # Subtitle options
@@ -135,7 +143,7 @@ class Downloader:
                     # Korekta rozszerzenia
                     base = os.path.splitext(filename)[0]
                     if quality == "audio_only":
-                        filename = base + ".mp3"
+                        filename = self._audio_output_path(item_info, base, audio_codec)
                     else:
                         filename = base + ".mp4"
                     
@@ -200,10 +208,24 @@ class Downloader:
 
         return downloaded_files
 
+    @staticmethod
+    def _audio_output_path(item_info, base, audio_codec):
+        """Ścieżka pliku audio po FFmpegExtractAudio (rozszerzenie zależy od kodeka źródła)."""
+        if audio_codec != "best":
+            return f"{base}.{'m4a' if audio_codec == 'aac' else audio_codec}"
+        for download in item_info.get("requested_downloads") or []:
+            filepath = download.get("filepath")
+            if filepath and os.path.exists(filepath):
+                return filepath
+        for ext in AUDIO_EXTENSIONS:
+            if os.path.exists(base + ext):
+                return base + ext
+        return base + ".mp3"
+
     # Removed old `yt_dlp_hook` method as we use closure now
     
     def convert_to_mp3(self, input_path, output_path=None):
-        """Konwertuje plik audio do MP3 używając FFmpeg"""
+        """Konwertuje plik audio do MP3 używając FFmpeg (tylko jako plik wynikowy - transkrypcja go nie potrzebuje)"""
         if self.stop_event.is_set():
             raise InterruptedError("Anulowano")
 
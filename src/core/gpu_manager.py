@@ -13,14 +13,38 @@ Użycie funkcji bezpośrednio:
 """
 
 import gc
+import sys
 from contextlib import contextmanager
 from typing import Optional
 
-try:
+import importlib.util
+
+# Sprawdzenie bez importu - sam import torch trwa kilka sekund
+TORCH_AVAILABLE = importlib.util.find_spec("torch") is not None
+
+
+def _cuda_torch():
+    """Zwraca moduł torch, jeśli CUDA jest dostępna (import przy pierwszym użyciu), inaczej None."""
+    from src.utils.config import get_device
+
+    if not TORCH_AVAILABLE or get_device() != "cuda":
+        return None
     import torch
-    TORCH_AVAILABLE = True
-except ImportError:
-    TORCH_AVAILABLE = False
+    return torch if torch.cuda.is_available() else None
+
+
+def get_cuda_device_count() -> int:
+    """Liczba dostępnych GPU (0 na CPU). Najpierw ctranslate2 - lżejszy niż torch."""
+    from src.utils.config import get_device
+
+    if get_device() != "cuda":
+        return 0
+    try:
+        import ctranslate2
+        return ctranslate2.get_cuda_device_count()
+    except ImportError:
+        torch = _cuda_torch()
+        return torch.cuda.device_count() if torch is not None else 0
 
 
 def clear_gpu_memory(verbose: bool = False) -> None:
@@ -32,7 +56,10 @@ def clear_gpu_memory(verbose: bool = False) -> None:
     """
     gc.collect()
 
-    if TORCH_AVAILABLE and torch.cuda.is_available():
+    # empty_cache zwalnia tylko pamięć alokatora torch - jeśli torch nie był
+    # jeszcze zaimportowany, nie ma czego zwalniać (i nie płacimy za import)
+    torch = _cuda_torch() if "torch" in sys.modules else None
+    if torch is not None:
         torch.cuda.empty_cache()
         torch.cuda.synchronize()
 
@@ -50,14 +77,18 @@ def get_gpu_memory_info() -> dict:
 
     Returns:
         dict z kluczami: available, allocated_gb, reserved_gb, total_gb, free_gb
+        (free_gb - wolna pamięć całej karty, łącznie z innymi procesami, np. Ollamą
+        i Whisperem na ctranslate2)
     """
-    if not TORCH_AVAILABLE or not torch.cuda.is_available():
+    torch = _cuda_torch()
+    if torch is None:
         return {"available": False}
 
     props = torch.cuda.get_device_properties(0)
     total = props.total_memory / (1024**3)
     allocated = torch.cuda.memory_allocated() / (1024**3)
     reserved = torch.cuda.memory_reserved() / (1024**3)
+    free = torch.cuda.mem_get_info(0)[0] / (1024**3)
 
     return {
         "available": True,
@@ -65,7 +96,7 @@ def get_gpu_memory_info() -> dict:
         "total_gb": round(total, 2),
         "allocated_gb": round(allocated, 2),
         "reserved_gb": round(reserved, 2),
-        "free_gb": round(total - reserved, 2)
+        "free_gb": round(free, 2)
     }
 
 
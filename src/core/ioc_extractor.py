@@ -0,0 +1,129 @@
+"""
+IoC Extractor - deterministyczne wyciąganie wskaźników (IoC) z tekstu.
+
+Zamiast prosić LLM o wypisanie adresów z każdego fragmentu, jeden przebieg
+wyrażeń regularnych po całej transkrypcji zbiera:
+    URL, domeny, IPv4, IPv6, e-maile, hashe (MD5/SHA1/SHA256) i adresy portfeli.
+
+Wynik trafia bezpośrednio do sekcji "IoC / Ślady" raportu OSINT.
+
+Użycie:
+    iocs = extract_iocs(text)          # {"urls": [...], "domains": [...], ...}
+    section = format_iocs_markdown(iocs)
+"""
+
+import ipaddress
+import re
+from typing import Dict, List
+
+# Kolejność kategorii w raporcie
+IOC_CATEGORIES = {
+    "urls": "URL",
+    "domains": "Domeny",
+    "ipv4": "IPv4",
+    "ipv6": "IPv6",
+    "emails": "E-maile",
+    "hashes": "Hashe",
+    "wallets": "Portfele krypto",
+}
+
+# Rozszerzenia plików, które regex domen myli z TLD ("skrypt.py", "raport.pdf")
+FILE_EXTENSIONS = {
+    "py", "js", "ts", "sh", "exe", "dll", "bat", "ps1", "txt", "md", "json", "xml", "yml", "yaml",
+    "csv", "log", "pdf", "doc", "docx", "xls", "xlsx", "ppt", "pptx", "png", "jpg", "jpeg", "gif",
+    "mp3", "mp4", "wav", "zip", "rar", "gz", "tar", "iso", "bin", "html", "htm", "php", "jar",
+}
+# Skróty, które wyglądają jak domeny ("m.in." = "między innymi")
+NON_DOMAINS = {"m.in", "p.n.e", "n.e"}
+
+URL_PATTERN = re.compile(r'\b(?:https?|ftp)://[^\s<>"\'\]\[)]+', re.IGNORECASE)
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@(?:[A-Za-z0-9-]+\.)+[A-Za-z]{2,24}\b')
+DOMAIN_PATTERN = re.compile(
+    r'(?<![@\w.-])((?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+([A-Za-z]{2,24}))(?![\w@-]|\.\w)'
+)
+IPV4_PATTERN = re.compile(r'(?<![\d.])(?:\d{1,3}\.){3}\d{1,3}(?!\d|\.\d)')
+IPV6_PATTERN = re.compile(r'(?<![\w:])(?:[0-9A-Fa-f]{0,4}:){2,7}[0-9A-Fa-f]{0,4}(?![\w:])')
+HASH_PATTERN = re.compile(r'\b(?:[A-Fa-f0-9]{64}|[A-Fa-f0-9]{40}|[A-Fa-f0-9]{32})\b')
+WALLET_PATTERNS = (
+    re.compile(r'\b0x[a-fA-F0-9]{40}\b'),                       # Ethereum
+    re.compile(r'\bbc1[a-z0-9]{25,59}\b'),                      # Bitcoin (bech32)
+    re.compile(r'\b[13][a-km-zA-HJ-NP-Z1-9]{25,34}\b'),         # Bitcoin (legacy)
+)
+
+
+def _unique(items: List[str]) -> List[str]:
+    """Usuwa duplikaty (bez rozróżniania wielkości liter), zachowując kolejność wystąpień."""
+    seen = set()
+    result = []
+    for item in items:
+        key = item.lower()
+        if key not in seen:
+            seen.add(key)
+            result.append(item)
+    return result
+
+
+def _valid_ip(candidate: str, version: int) -> bool:
+    try:
+        return ipaddress.ip_address(candidate).version == version
+    except ValueError:
+        return False
+
+
+def extract_iocs(text: str) -> Dict[str, List[str]]:
+    """
+    Wyciąga wskaźniki IoC z tekstu (jeden przebieg na kategorię).
+
+    Returns:
+        Słownik {kategoria: lista unikalnych wartości w kolejności wystąpień}
+        z kluczami jak w IOC_CATEGORIES.
+    """
+    urls = [u.rstrip('.,;:!?') for u in URL_PATTERN.findall(text)]
+    emails = EMAIL_PATTERN.findall(text)
+
+    # Domeny: samodzielne wystąpienia + hosty z URL-i i adresów e-mail
+    domains = []
+    for match in DOMAIN_PATTERN.finditer(text):
+        if match.group(2).lower() in FILE_EXTENSIONS or match.group(1).lower() in NON_DOMAINS:
+            continue
+        domains.append(match.group(1))
+    for url in urls:
+        host = re.sub(r'^[a-z]+://', '', url, flags=re.IGNORECASE).split('/')[0].split(':')[0]
+        if DOMAIN_PATTERN.fullmatch(host):
+            domains.append(host)
+    domains.extend(email.split('@', 1)[1] for email in emails)
+
+    wallets = [m for pattern in WALLET_PATTERNS for m in pattern.findall(text)]
+    hashes = [h for h in HASH_PATTERN.findall(text) if not h.isdigit()]
+
+    return {
+        "urls": _unique(urls),
+        "domains": _unique(d.lower() for d in domains),
+        "ipv4": _unique(ip for ip in IPV4_PATTERN.findall(text) if _valid_ip(ip, 4)),
+        "ipv6": _unique(ip for ip in IPV6_PATTERN.findall(text) if _valid_ip(ip, 6)),
+        "emails": _unique(emails),
+        "hashes": _unique(hashes),
+        "wallets": _unique(wallets),
+    }
+
+
+def count_iocs(iocs: Dict[str, List[str]]) -> int:
+    """Łączna liczba znalezionych wskaźników."""
+    return sum(len(values) for values in iocs.values())
+
+
+def format_iocs_markdown(iocs: Dict[str, List[str]], heading: str = "## IoC / Ślady") -> str:
+    """Formatuje wskaźniki jako sekcję Markdown raportu."""
+    lines = [heading, ""]
+    if not count_iocs(iocs):
+        lines.append("Nie znaleziono wskaźników (URL, domeny, IP, hashe, portfele).")
+        return "\n".join(lines) + "\n"
+
+    for key, label in IOC_CATEGORIES.items():
+        values = iocs.get(key) or []
+        if not values:
+            continue
+        lines.append(f"**{label}** ({len(values)}):")
+        lines.extend(f"- `{value}`" for value in values)
+        lines.append("")
+    return "\n".join(lines).rstrip() + "\n"
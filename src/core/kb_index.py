@@ -0,0 +1,256 @@
+"""
+KB Index - indeks metadanych baz wiedzy dla GUI.
+
+Trzyma dla każdego pliku KB w DATA_PROCESSED: mtime, rozmiar, liczniki
+(segments, concepts, tools, tips), najczęstsze tematy i podgląd. Indeks jest
+zapisywany obok plików (`.kb_index.json`), więc po restarcie aplikacji nie
+trzeba ponownie parsować baz.
+
+Odświeżanie:
+- przyrostowe (refresh): tylko stat() dla każdego pliku, ponowne parsowanie
+  wyłącznie plików o zmienionym mtime/rozmiarze,
+- watcher (start_watching): watchdog aktualizuje pojedyncze wpisy na bieżąco,
+  a list_files() nie dotyka wtedy dysku wcale.
+
+Użycie:
+    index = get_kb_index()
+    files = index.list_files()
+    entry = index.get(files[0])   # {"segments": 12, "topics": [...], ...}
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+from src.core.kb_store import is_kb_file, read_kb_header, read_kb_preview
+from src.utils.config import DATA_PROCESSED
+
+INDEX_FILENAME = ".kb_index.json"
+INDEX_VERSION = 1
+
+
+class KBIndex:
+    """Indeks metadanych plików KB unieważniany po mtime."""
+
+    def __init__(self, directory: str = DATA_PROCESSED, persist: bool = True):
+        """
+        Args:
+            directory: Katalog z plikami KB.
+            persist: Czy zapisywać indeks na dysku (`.kb_index.json`).
+        """
+        self.directory = directory
+        self.persist = persist
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.RLock()
+        self._observer = None
+        self._scanned = False
+        self._load()
+
+    # --- Persystencja ---
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILENAME)
+
+    def _load(self) -> None:
+        if not self.persist or not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self._entries = data.get("entries", {})
+        except Exception as e:
+            print(f"[KB INDEX] Nie można wczytać indeksu ({e}) - zostanie odbudowany.")
+            self._entries = {}
+
+    def _save(self) -> None:
+        if not self.persist or not os.path.isdir(self.directory):
+            return
+        with self._lock:
+            entries = dict(self._entries)
+        tmp_path = self.index_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "entries": entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            print(f"[KB INDEX] Nie można zapisać indeksu: {e}")
+
+    # --- Budowanie wpisów ---
+
+    @staticmethod
+    def _build_entry(path: str, stat: os.stat_result) -> Dict:
+        """Czyta nagłówek i podgląd pliku KB (dla starego formatu - pełne parsowanie)."""
+        try:
+            header = read_kb_header(path)
+            preview = json.dumps(read_kb_preview(path, 2), ensure_ascii=False, indent=2)
+            error = None
+        except Exception as e:
+            header, preview, error = {}, "{}", str(e)
+
+        return {
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "segments": header.get("segments", 0),
+            "concepts": header.get("concepts", 0),
+            "tools": header.get("tools", 0),
+            "tips": header.get("tips", 0),
+            "topics": header.get("topics", []),
+            "preview": preview,
+            "error": error,
+        }
+
+    def _update_entry(self, filename: str) -> Optional[Dict]:
+        """Aktualizuje wpis pojedynczego pliku (O(1) jeśli plik się nie zmienił)."""
+        path = os.path.join(self.directory, filename)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._entries.pop(filename, None)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                return entry
+
+        entry = self._build_entry(path, stat)
+        with self._lock:
+            self._entries[filename] = entry
+        return entry
+
+    # --- API ---
+
+    def refresh(self) -> None:
+        """Przyrostowe odświeżenie: stat() każdego pliku, parsowanie tylko zmienionych."""
+        if not os.path.isdir(self.directory):
+            with self._lock:
+                self._entries = {}
+            return
+
+        with self._lock:
+            before = dict(self._entries)
+
+        seen = set()
+        changed = False
+        with os.scandir(self.directory) as it:
+            for dir_entry in it:
+                if not dir_entry.is_file() or not is_kb_file(dir_entry.name):
+                    continue
+                seen.add(dir_entry.name)
+                stat = dir_entry.stat()
+                old = before.get(dir_entry.name)
+                if old and old["mtime"] == stat.st_mtime and old["size"] == stat.st_size:
+                    continue
+                entry = self._build_entry(dir_entry.path, stat)
+                with self._lock:
+                    self._entries[dir_entry.name] = entry
+                changed = True
+
+        with self._lock:
+            for filename in set(self._entries) - seen:
+                del self._entries[filename]
+                changed = True
+            self._scanned = True
+
+        if changed:
+            self._save()
+
+    def list_files(self) -> List[str]:
+        """
+        Zwraca ścieżki plików KB posortowane wg czasu modyfikacji (najnowsze pierwsze).
+        Przy aktywnym watcherze nie wykonuje żadnych operacji na dysku.
+        """
+        if not (self.is_watching and self._scanned):
+            self.refresh()
+
+        with self._lock:
+            items = sorted(self._entries.items(), key=lambda kv: kv[1]["mtime"], reverse=True)
+        return [os.path.join(self.directory, filename) for filename, _ in items]
+
+    def get(self, path: str) -> Optional[Dict]:
+        """Zwraca wpis dla pliku KB (odświeżony, jeśli plik zmienił się od ostatniego odczytu)."""
+        if not path:
+            return None
+        directory, filename = os.path.split(os.path.abspath(path))
+        if directory != os.path.abspath(self.directory):
+            # Plik spoza katalogu indeksu - liczymy bez cache
+            try:
+                return self._build_entry(path, os.stat(path))
+            except OSError:
+                return None
+
+        if self.is_watching:
+            with self._lock:
+                entry = self._entries.get(filename)
+            if entry:
+                return entry
+
+        with self._lock:
+            previous = self._entries.get(filename)
+        entry = self._update_entry(filename)
+        if entry is not previous:
+            self._save()
+        return entry
+
+    # --- Watcher (watchdog) ---
+
+    @property
+    def is_watching(self) -> bool:
+        return self._observer is not None
+
+    def start_watching(self) -> bool:
+        """Uruchamia watchdog dla katalogu KB. Zwraca False, jeśli watchdog jest niedostępny."""
+        if self._observer is not None:
+            return True
+
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            return False
+
+        os.makedirs(self.directory, exist_ok=True)
+        index = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                for path in (getattr(event, "src_path", ""), getattr(event, "dest_path", "")):
+                    filename = os.path.basename(path or "")
+                    if is_kb_file(filename):
+                        index._update_entry(filename)
+
+        self.refresh()
+        observer = Observer()
+        observer.schedule(_Handler(), self.directory, recursive=False)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        return True
+
+    def stop_watching(self) -> None:
+        """Zatrzymuje watcher i zapisuje indeks."""
+        if self._observer is None:
+            return
+        self._observer.stop()
+        self._observer.join(timeout=5)
+        self._observer = None
+        self._save()
+
+
+_kb_index: Optional[KBIndex] = None
+_kb_index_lock = threading.Lock()
+
+
+def get_kb_index() -> KBIndex:
+    """Zwraca współdzieloną instancję indeksu dla DATA_PROCESSED."""
+    global _kb_index
+    with _kb_index_lock:
+        if _kb_index is None:
+            _kb_index = KBIndex(DATA_PROCESSED)
+        return _kb_index
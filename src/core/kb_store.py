@@ -0,0 +1,166 @@
+"""
+KB Store - zapis i odczyt baz wiedzy (Knowledge Base).
+
+Format kompaktowy (NDJSON, rozszerzenie `_kb.jsonl`):
+    linia 1: nagłówek z wersją formatu i przeliczonymi statystykami
+    linie 2..N: po jednym segmencie KnowledgeGraph na linię (bez wcięć)
+
+    {"format":"transkrypcje-kb","version":1,"segments":12,"concepts":40,...,"topics":[...]}
+    {"topics":[...],"tools":[...],"key_concepts":[...],"tips":[...],"time_range":"01:04 -> 05:12"}
+    ...
+
+Dzięki nagłówkowi GUI może pokazać statystyki i podgląd bez parsowania
+całego pliku. Stare pliki `_kb.json` (jedna lista JSON) są nadal czytane.
+
+Użycie:
+    save_kb(kb_path_for("wyklad"), knowledge_base)
+    data = load_kb(path)                    # pełna lista segmentów
+    header = read_kb_header(path)           # tylko statystyki
+    preview = read_kb_preview(path, n=2)    # pierwsze segmenty
+"""
+
+import json
+import os
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+from src.utils.config import DATA_PROCESSED
+
+KB_FORMAT = "transkrypcje-kb"
+KB_FORMAT_VERSION = 1
+KB_SUFFIX = "_kb.jsonl"
+LEGACY_KB_SUFFIX = "_kb.json"
+TOP_TOPICS = 10
+
+
+def kb_path_for(base_name: str, directory: str = DATA_PROCESSED) -> str:
+    """Zwraca ścieżkę pliku KB (format kompaktowy) dla nazwy bazowej."""
+    return os.path.join(directory, f"{base_name}{KB_SUFFIX}")
+
+
+def find_kb_path(base_name: str, directory: str = DATA_PROCESSED) -> Optional[str]:
+    """Zwraca ścieżkę istniejącego pliku KB (nowy format ma pierwszeństwo) lub None."""
+    for suffix in (KB_SUFFIX, LEGACY_KB_SUFFIX):
+        path = os.path.join(directory, f"{base_name}{suffix}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def is_kb_file(filename: str) -> bool:
+    """Czy plik jest bazą wiedzy (nowy lub stary format)."""
+    return filename.endswith(KB_SUFFIX) or filename.endswith(LEGACY_KB_SUFFIX)
+
+
+def kb_base_name(filename: str) -> str:
+    """Usuwa sufiks KB z nazwy pliku."""
+    name = os.path.basename(filename)
+    for suffix in (KB_SUFFIX, LEGACY_KB_SUFFIX):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def compute_kb_stats(records: List[Dict]) -> Dict:
+    """Liczy statystyki bazy wiedzy zapisywane w nagłówku."""
+    topic_counter = Counter()
+    stats = {"segments": 0, "concepts": 0, "tools": 0, "tips": 0}
+
+    for item in records:
+        if not isinstance(item, dict):
+            continue
+        stats["segments"] += 1
+        stats["concepts"] += len(item.get("key_concepts", []) or [])
+        stats["tools"] += len(item.get("tools", []) or [])
+        stats["tips"] += len(item.get("tips", []) or [])
+        topic_counter.update(t for t in item.get("topics", []) or [] if isinstance(t, str))
+
+    stats["topics"] = [topic for topic, _ in topic_counter.most_common(TOP_TOPICS)]
+    return stats
+
+
+def save_kb(path: str, records: List[Dict], replace_legacy: bool = True) -> str:
+    """
+    Zapisuje bazę wiedzy w formacie kompaktowym (atomowo: plik tymczasowy + rename).
+
+    Args:
+        path: Ścieżka docelowa (`..._kb.jsonl`).
+        records: Lista segmentów (dict, np. KnowledgeGraph.model_dump()).
+        replace_legacy: Usuwa stary `_kb.json` o tej samej nazwie bazowej,
+            żeby w GUI nie pojawiały się duplikaty.
+
+    Returns:
+        Ścieżka zapisanego pliku.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    header = {"format": KB_FORMAT, "version": KB_FORMAT_VERSION, **compute_kb_stats(records)}
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(header, ensure_ascii=False, separators=(",", ":")) + "\n")
+        for item in records:
+            f.write(json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n")
+    os.replace(tmp_path, path)
+
+    if replace_legacy and path.endswith(KB_SUFFIX):
+        legacy_path = path[:-len(KB_SUFFIX)] + LEGACY_KB_SUFFIX
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+
+    return path
+
+
+def _is_legacy(path: str) -> bool:
+    return not path.endswith(KB_SUFFIX)
+
+
+def _load_legacy(path: str) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else []
+
+
+def iter_kb_records(path: str) -> Iterator[Dict]:
+    """Leniwie iteruje po segmentach bazy wiedzy (bez nagłówka)."""
+    if _is_legacy(path):
+        yield from _load_legacy(path)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        f.readline()  # nagłówek
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def load_kb(path: str) -> List[Dict]:
+    """Wczytuje całą bazę wiedzy jako listę segmentów (oba formaty)."""
+    return list(iter_kb_records(path))
+
+
+def read_kb_header(path: str) -> Dict:
+    """
+    Zwraca nagłówek ze statystykami (segments, concepts, tools, tips, topics).
+    Dla nowego formatu czyta tylko pierwszą linię pliku.
+    """
+    if _is_legacy(path):
+        return {"format": "legacy-json", "version": 0, **compute_kb_stats(_load_legacy(path))}
+
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+
+    if header.get("format") != KB_FORMAT:
+        raise ValueError(f"Nieznany format bazy wiedzy: {path}")
+    if header.get("version", 0) > KB_FORMAT_VERSION:
+        raise ValueError(f"Nieobsługiwana wersja formatu KB ({header.get('version')}): {path}")
+    return header
+
+
+def read_kb_preview(path: str, n: int = 2) -> List[Dict]:
+    """Zwraca pierwsze `n` segmentów bazy wiedzy."""
+    return list(islice(iter_kb_records(path), n))
@@ -0,0 +1,74 @@
+"""
+LLM Cache - pamięć podręczna odpowiedzi modeli (LRU, współdzielona w procesie).
+
+Klucz to hash (model, prompt, opcje), więc ponowne zapytanie o ten sam
+fragment (np. zmiana stylu podsumowania, ponowienie po błędzie) nie
+wysyła go drugi raz do modelu.
+
+Użycie:
+    cache = get_llm_cache()
+    key = cache.make_key(model, prompt)
+    answer = cache.get(key)
+    if answer is None:
+        answer = call_model(...)
+        cache.put(key, answer)
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+DEFAULT_MAX_ENTRIES = 512
+
+
+class LLMCache:
+    """Bezpieczny wątkowo cache LRU odpowiedzi LLM."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, prompt: str, options: Optional[Dict[str, Any]] = None) -> str:
+        payload = json.dumps([model, prompt, options or {}], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        if value is None:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_llm_cache = LLMCache()
+
+
+def get_llm_cache() -> LLMCache:
+    """Zwraca współdzieloną instancję cache."""
+    return _llm_cache
@@ -1,6 +1,11 @@
-import ollama
 import json
 import re
+import threading
+from contextlib import nullcontext
+from functools import lru_cache
+from src.core.concurrency import get_concurrency_controller
+from src.core.ollama_client import get_ollama_client, model_options
+from src.core.ollama_pool import get_ollama_pool
 
 def clean_json_string(response: str) -> str:
     """Czyści odpowiedź modelu z formatowania Markdown (np. ```json ... ```)."""
@@ -14,7 +19,7 @@ def clean_json_string(response: str) -> str:
 def call_ollama(model: str, system_prompt: str, user_prompt: str, json_mode: bool = False) -> str | dict:
     """Uniwersalna funkcja do wywoływania Ollama."""
     try:
-        response = ollama.chat(model=model, messages=[
+        response = get_ollama_client().chat(model=model, messages=[
             {'role': 'system', 'content': system_prompt},
             {'role': 'user', 'content': user_prompt}
         ], format='json' if json_mode else '')
@@ -33,77 +38,259 @@ def call_ollama(model: str, system_prompt: str, user_prompt: str, json_mode: boo
 def unload_model(model_name: str):
     """
     Wymusza zwolnienie modelu z pamięci VRAM (ważne dla kart z <24GB VRAM).
-    Wysyła pusty request z keep_alive=0 oraz czyści cache CUDA.
+    Wysyła pusty request z keep_alive=0 do każdego hosta puli oraz czyści cache CUDA.
     """
     from src.core.gpu_manager import clear_gpu_memory
 
-    try:
-        ollama.generate(model=model_name, prompt="", keep_alive=0)
-        clear_gpu_memory()
-        print(f"[INFO] Zwolniono model i wyczyszczono VRAM: {model_name}")
-    except Exception as e:
-        print(f"[WARNING] Nie udało się zwolnić modelu {model_name}: {e}")
+    for host in get_ollama_pool().urls:
+        try:
+            get_ollama_client(host).unload(model_name)
+        except Exception as e:
+            print(f"[WARNING] Nie udało się zwolnić modelu {model_name} na {host}: {e}")
+    clear_gpu_memory()
+    print(f"[INFO] Zwolniono model i wyczyszczono VRAM: {model_name}")
+
+@lru_cache(maxsize=None)
+def response_schema(response_model: type) -> dict:
+    """JSON schema modelu Pydantic (liczony raz na klasę) - ograniczenie dekodowania w Ollamie."""
+    return response_model.model_json_schema()
+
+@lru_cache(maxsize=64)
+def _canonical_prompt(text: str) -> str:
+    """Postać kanoniczna promptu systemowego (\n zamiast \r\n, bez białych znaków na brzegach)."""
+    return text.replace("\r\n", "\n").strip()
+
+
+def build_messages(system_prompt: str, user_prompt: str) -> list:
+    """
+    Jeden układ wiadomości dla wszystkich ścieżek: [system, user], stała część
+    (instrukcje, schemat) w prompcie systemowym, zmienna (fragment) na końcu.
+    Ten sam prompt systemowy daje identyczny bajtowo prefiks, więc serwer
+    (Ollama, automatyczny prompt caching OpenAI) używa cache KV zamiast
+    liczyć prefiks od nowa. Zawsze nowe słowniki - instructor w trybie JSON
+    dopisuje schemat do wiadomości systemowej w miejscu.
+    """
+    return [
+        {"role": "system", "content": _canonical_prompt(system_prompt)},
+        {"role": "user", "content": user_prompt.replace("\r\n", "\n").strip()},
+    ]
+
 
 class LLMEngine:
     """Klasa silnika LLM wspierająca ustrukturyzowane i zwykłe generowanie (Ollama & OpenAI)."""
-    def __init__(self, model_type: str, provider: str = None):
+    def __init__(self, model_type: str, provider: str = None, model_name: str = None, stage: str = None):
+        """
+        Args:
+            model_type: "extractor" lub "writer" - wybiera domyślny model providera.
+            provider: "ollama", "openai" lub "auto" (router per wywołanie; domyślnie LLM_PROVIDER).
+            model_name: Nadpisuje domyślny model (np. dedykowany model taggera);
+                przy "auto" dotyczy modelu lokalnego.
+            stage: Etap pipeline'u dla polityki routera (domyślnie model_type).
+        """
         from src.utils.config import (
             MODEL_EXTRACTOR_OLLAMA, MODEL_WRITER_OLLAMA,
             MODEL_EXTRACTOR_OPENAI, MODEL_WRITER_OPENAI,
-            OLLAMA_URL, LLM_PROVIDER, OPENAI_API_KEY
+            LLM_PROVIDER, OPENAI_API_KEY, OLLAMA_STRUCTURED_MODE, LLM_CONCURRENCY_MAX_OLLAMA
         )
         import instructor
-        from openai import OpenAI
+        from openai import OpenAI, DefaultHttpxClient
         
         self.provider = provider or LLM_PROVIDER
+        self.stage = stage or model_type
+        self.limiter = None
+        self.router = None
+        if self.provider == "auto":
+            self._init_router(model_type, model_name)
+            return
+
+        self.pool = get_ollama_pool()
+        self.ollama_url = self.pool.urls[0]
+        self._compat_clients = {}
         
         # dynamiczny wybór modelu na podstawie providera
         if self.provider == "openai":
-            self.model = MODEL_EXTRACTOR_OPENAI if model_type == "extractor" else MODEL_WRITER_OPENAI
-            self.raw_client = OpenAI(api_key=OPENAI_API_KEY)
+            from src.core.rate_limiter import get_rate_limiter
+
+            self.model = model_name or (MODEL_EXTRACTOR_OPENAI if model_type == "extractor" else MODEL_WRITER_OPENAI)
+            # Wspólny limiter RPM/TPM dla całego procesu; nagłówki x-ratelimit-* i 429
+            # trafiają do niego z każdej odpowiedzi (także re-asków instructora)
+            self.limiter = get_rate_limiter("openai")
+            self.raw_client = OpenAI(
+                api_key=OPENAI_API_KEY,
+                http_client=DefaultHttpxClient(event_hooks={"response": [self.limiter.on_response]}),
+            )
             self.client = instructor.from_openai(
                 self.raw_client,
                 mode=instructor.Mode.JSON
             )
+            # Każda próba instructora (łącznie z re-askami) pobiera z limitera
+            self.client.on("completion:kwargs", self._on_completion_kwargs)
         else:
             # Domyślnie Ollama
-            self.model = MODEL_EXTRACTOR_OLLAMA if model_type == "extractor" else MODEL_WRITER_OLLAMA
-            self.raw_client = OpenAI(
-                base_url=f"{OLLAMA_URL}/v1",
-                api_key="ollama",
-            )
-            self.client = instructor.from_openai(
-                self.raw_client,
-                mode=instructor.Mode.JSON,
-            )
+            self.model = model_name or (MODEL_EXTRACTOR_OLLAMA if model_type == "extractor" else MODEL_WRITER_OLLAMA)
+            # Klient pierwszego hosta puli; pozostałe tworzone przy pierwszym użyciu (_compat)
+            self.raw_client, self.client = self._make_compat_client(self.ollama_url)
+        # Klucz backendu (wspólny circuit breaker dla wszystkich instancji)
+        self.backend = "openai" if self.provider == "openai" else f"ollama:{self.pool.name}"
+        self.structured_mode = OLLAMA_STRUCTURED_MODE
+        # Adaptacyjny (AIMD) limit równoległych wywołań, wspólny dla backendu i modelu;
+        # pula Ollamy mieści tyle równoległych wywołań, ile wszystkie jej hosty
+        self.concurrency = get_concurrency_controller(
+            self.backend, self.model,
+            max_limit=None if self.provider == "openai" else LLM_CONCURRENCY_MAX_OLLAMA * len(self.pool.hosts),
+        )
+
+        # Liczenie błędów walidacji (re-asków instructora) osobno dla każdego wątku
+        self._local = threading.local()
+        self._compat_lock = threading.Lock()
+        if self.provider == "openai":
+            self.client.on("parse:error", self._on_parse_error)
+
+    def _init_router(self, model_type: str, model_name: str) -> None:
+        """Provider "auto": silnik lokalny (Ollama) i leniwie tworzony chmurowy (OpenAI) za routerem."""
+        from src.core.provider_router import ProviderRouter
+
+        local = LLMEngine(model_type, "ollama", model_name, stage=self.stage)
+        self.router = ProviderRouter(self.stage, local, lambda: LLMEngine(model_type, "openai", stage=self.stage))
+        self.model = local.model
+        self.pool = local.pool
+        self.ollama_url = local.ollama_url
+        self.structured_mode = local.structured_mode
+        # Osobny klucz: wyłącznik ekstraktora widzi tylko błędy, których nie uratował fallback
+        self.backend = f"auto:{local.backend}"
+        self.concurrency = local.concurrency
+        self._local = threading.local()
+
+    def _make_compat_client(self, host: str):
+        """(klient OpenAI, klient instructora) dla endpointu /v1 danego hosta Ollamy."""
+        import instructor
+        from openai import OpenAI
+
+        raw_client = OpenAI(base_url=f"{host}/v1", api_key="ollama")
+        client = instructor.from_openai(raw_client, mode=instructor.Mode.JSON)
+        client.on("parse:error", self._on_parse_error)
+        return raw_client, client
+
+    def _compat(self, host: str):
+        """Klienci endpointu /v1 hosta z puli (pierwszy host: self.raw_client / self.client)."""
+        if host == self.ollama_url:
+            return self.raw_client, self.client
+        with self._compat_lock:
+            if host not in self._compat_clients:
+                self._compat_clients[host] = self._make_compat_client(host)
+            return self._compat_clients[host]
+
+    def _on_pool(self, fn):
+        """Ollama: fn(host) przez pulę (wybór hosta, failover); OpenAI: fn(None)."""
+        if self.provider == "openai":
+            return fn(None)
+        return self.pool.call(self.model, fn)
+
+    def _lease(self):
+        """Host puli na czas strumienia (bez failoveru); OpenAI: None."""
+        if self.provider == "openai":
+            return nullcontext()
+        return self.pool.lease(self.model)
+
+    def _throttle(self, messages: list) -> None:
+        """Czeka na limiter RPM/TPM (tylko OpenAI)."""
+        if self.limiter is not None:
+            from src.core.rate_limiter import estimate_tokens
+
+            self.limiter.acquire(estimate_tokens(messages))
+
+    def _on_completion_kwargs(self, *args, **kwargs) -> None:
+        self._throttle(kwargs.get("messages", []))
+
+    def _on_parse_error(self, error) -> None:
+        self._local.parse_errors = getattr(self._local, "parse_errors", 0) + 1
+
+    @property
+    def last_parse_errors(self) -> int:
+        """Liczba odpowiedzi odrzuconych przez walidację w ostatnim generate_structured (w tym wątku)."""
+        return getattr(self._local, "parse_errors", 0)
 
     def generate_structured(self, system_prompt: str, user_prompt: str, response_model: type) -> any:
+        self._local.parse_errors = 0
+        if self.router is not None:
+            def call(engine):
+                try:
+                    return engine.generate_structured(system_prompt, user_prompt, response_model)
+                finally:
+                    self._local.parse_errors += engine.last_parse_errors
+
+            return self.router.run(build_messages(system_prompt, user_prompt), call)
+        with self.concurrency.slot():
+            return self._on_pool(lambda host: self._generate_structured(system_prompt, user_prompt, response_model, host))
+
+    def _generate_structured(self, system_prompt: str, user_prompt: str, response_model: type,
+                             host: str = None) -> any:
         # Parametry specyficzne dla providera
         extra_args = {}
+        client = self.client
         if self.provider == "ollama" or self.provider == "local":
-             # Zmiana: Zmniejszono num_ctx z 8192 do 4096 dla RTX 3060 (stabilność VRAM)
-             extra_args["extra_body"] = {"options": {"num_ctx": 4096}}
+            if self.structured_mode == "schema":
+                result = self._generate_constrained(system_prompt, user_prompt, response_model, host)
+                if result is not None:
+                    return result
+            # num_ctx wspólny dla wszystkich ścieżek modelu (OLLAMA_MODEL_NUM_CTX)
+            extra_args = self._ollama_extra_args()
+            client = self._compat(host or self.ollama_url)[1]
 
-        return self.client.chat.completions.create(
+        return client.chat.completions.create(
             model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
+            messages=build_messages(system_prompt, user_prompt),
             response_model=response_model,
             temperature=0.1,
             **extra_args
         )
 
-    def generate(self, system_prompt: str, user_prompt: str) -> str:
-        response = self.raw_client.chat.completions.create(
+    def _generate_constrained(self, system_prompt: str, user_prompt: str, response_model: type,
+                              host: str = None):
+        """
+        Natywne /api/chat Ollamy z JSON schema w `format`: sampler generuje tylko
+        tokeny zgodne ze schematem, więc odpowiedź parsuje się bez re-asków.
+        Zwraca None, gdy odpowiedź mimo to nie przeszła walidacji (np. ucięta
+        na limicie kontekstu) - wtedy generate_structured przechodzi na instructora.
+        """
+        from pydantic import ValidationError
+
+        response = get_ollama_client(host or self.ollama_url).chat(
             model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.7
+            messages=build_messages(system_prompt, user_prompt),
+            format=response_schema(response_model),
+            options={"temperature": 0.1},
         )
+        try:
+            return response_model.model_validate_json(response["message"]["content"])
+        except ValidationError as e:
+            self._on_parse_error(e)
+            print(f"[LLM] Odpowiedź z ograniczonym dekodowaniem niepoprawna ({e.error_count()} błędów) - ponawiam przez instructora.")
+            return None
+
+    def _ollama_extra_args(self) -> dict:
+        """Opcje modelu dla endpointu /v1 Ollamy (pusty dict dla OpenAI)."""
+        if self.provider == "openai":
+            return {}
+        return {"extra_body": {"options": model_options(self.model)}}
+
+    def generate(self, system_prompt: str, user_prompt: str) -> str:
+        messages = build_messages(system_prompt, user_prompt)
+        if self.router is not None:
+            return self.router.run(messages, lambda engine: engine.generate(system_prompt, user_prompt))
+
+        def call(host):
+            self._throttle(messages)
+            raw_client = self._compat(host)[0] if host else self.raw_client
+            return raw_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                **self._ollama_extra_args()
+            )
+
+        with self.concurrency.slot():
+            response = self._on_pool(call)
         return response.choices[0].message.content
 
     def generate_stream(self, system_prompt: str, user_prompt: str):
@@ -111,15 +298,21 @@ class LLMEngine:
         Generator streamujący odpowiedź token po tokenie.
         Użycie: for chunk in llm.generate_stream(...): print(chunk, end="")
         """
-        response = self.raw_client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.7,
-            stream=True
-        )
-        for chunk in response:
-            if chunk.choices and chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+        messages = build_messages(system_prompt, user_prompt)
+        if self.router is not None:
+            yield from self.router.stream(messages, lambda engine: engine.generate_stream(system_prompt, user_prompt))
+            return
+        # Slot (i host puli) zajęty przez cały czas strumieniowania
+        with self.concurrency.slot(), self._lease() as host:
+            self._throttle(messages)
+            raw_client = self._compat(host)[0] if host else self.raw_client
+            response = raw_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                stream=True,
+                **self._ollama_extra_args()
+            )
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
@@ -0,0 +1,110 @@
+"""
+Long Audio - podział długich nagrań na okna i sklejanie transkrypcji.
+
+Nagranie dzielone jest na okna (~LONG_AUDIO_WINDOW s) w przerwach ciszy
+wykrytych przez VAD faster-whisper, żeby nie ciąć w środku zdania. Każde
+okno ma zakładkę (WINDOW_PAD s) po obu stronach; przy sklejaniu segment
+należy do okna, w którego "własnym" zakresie leży jego środek, a
+powtórzony tekst na granicy jest usuwany.
+
+Audio dekodowane jest raz (src/core/audio_prep.py), a okna czytane z
+cache przez memmap. Transkrypcja okien równolegle: TranscriptionPool.transcribe_long().
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+from src.core.audio_prep import SAMPLE_RATE
+from src.utils.config import LONG_AUDIO_WINDOW
+
+# Zakładka okna (s) - chroni słowa przy twardym cięciu bez ciszy
+WINDOW_PAD = 2.0
+# Minimalna przerwa (ms), w której wolno ciąć
+MIN_SILENCE_MS = 500
+
+
+@dataclass
+class AudioWindow:
+    """Okno nagrania: [start, end] do transkrypcji, [own_start, own_end] do sklejania (sekundy)."""
+    start: float
+    end: float
+    own_start: float
+    own_end: float
+
+
+def probe_duration(path: str) -> float:
+    """Długość nagrania (s) z metadanych kontenera, bez dekodowania (0.0, gdy nieznana)."""
+    import av
+
+    try:
+        with av.open(path) as container:
+            return (container.duration or 0) / av.time_base
+    except (av.FFmpegError, OSError):
+        return 0.0
+
+
+def speech_spans(audio) -> List[Tuple[float, float]]:
+    """Fragmenty mowy (s) według VAD Silero z faster-whisper."""
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    timestamps = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=MIN_SILENCE_MS))
+    return [(t["start"] / SAMPLE_RATE, t["end"] / SAMPLE_RATE) for t in timestamps]
+
+
+def plan_windows(speech: Sequence[Tuple[float, float]], duration: float,
+                 window: float = LONG_AUDIO_WINDOW, pad: float = WINDOW_PAD) -> List[AudioWindow]:
+    """
+    Dzieli nagranie na okna ~`window` sekund, tnąc w środku przerw między mową.
+    Gdy w zakresie [window/2, 1.5*window] nie ma przerwy, tnie twardo (zakładka
+    i deduplikacja przy sklejaniu zabezpieczają granicę).
+    """
+    cuts = [(a_end + b_start) / 2 for (_, a_end), (b_start, _) in zip(speech, speech[1:]) if b_start > a_end]
+
+    bounds = [0.0]
+    while duration - bounds[-1] > window * 1.5:
+        current = bounds[-1]
+        target = current + window
+        candidates = [c for c in cuts if current + window / 2 <= c <= current + window * 1.5]
+        bounds.append(min(candidates, key=lambda c: abs(c - target)) if candidates else target)
+    bounds.append(duration)
+
+    return [
+        AudioWindow(max(0.0, own_start - pad), min(duration, own_end + pad), own_start, own_end)
+        for own_start, own_end in zip(bounds, bounds[1:])
+    ]
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r'\W+', ' ', text.lower()).strip()
+
+
+def stitch_segments(windows: Sequence[AudioWindow], results: Sequence[List[Dict]]) -> List[Dict]:
+    """
+    Skleja segmenty z okien (czasy względem początku okna) w jedną listę
+    z czasami bezwzględnymi, bez duplikatów z zakładek.
+    """
+    stitched: List[Dict] = []
+    prev_window = -1  # okno, z którego pochodzi stitched[-1]
+    last = len(windows) - 1
+    for i, (window, segments) in enumerate(zip(windows, results)):
+        for seg in segments:
+            start = round(window.start + seg["start"], 3)
+            end = round(window.start + seg["end"], 3)
+            middle = (start + end) / 2
+            if middle < window.own_start or (middle >= window.own_end and i != last):
+                continue  # segment należy do sąsiedniego okna
+
+            if stitched:
+                prev = stitched[-1]
+                # Tylko na styku okien: powtórzenie w obrębie okna to prawdziwa wypowiedź
+                if (prev_window != i and _normalize(prev["text"]) == _normalize(seg["text"])
+                        and start < prev["end"] + WINDOW_PAD):
+                    continue  # ten sam tekst rozpoznany w obu oknach
+                start = max(start, prev["end"])
+                end = max(end, start)
+
+            stitched.append({"start": start, "end": end, "text": seg["text"]})
+            prev_window = i
+    return stitched
+
@@ -0,0 +1,234 @@
+"""
+Obsidian Sync - przyrostowy eksport notatek do vaulta.
+
+Zapis do vaulta na /mnt/c (WSL) jest wolny, a każda zmiana pliku wywołuje
+ponowne indeksowanie w Obsidianie. Dlatego:
+- w katalogu docelowym trzymany jest manifest (MANIFEST_NAME) z hashami
+  wyeksportowanych notatek - niezmienione źródło nie jest nawet czytane z vaulta,
+- zmienione notatki zapisywane są atomowo (plik tymczasowy + os.replace),
+- pola frontmattera edytowane przez użytkownika (np. `reviewed: true`) oraz
+  pola dodane ręcznie w vaulcie są zachowywane przy nadpisywaniu,
+- cały katalog synchronizowany jest w jednym przebiegu (jeden odczyt
+  i jeden zapis manifestu).
+
+Użycie:
+    report = sync_directory(DATA_OUTPUT, os.path.join(OBSIDIAN_VAULT_PATH, OBSIDIAN_SUBFOLDER))
+    export_to_obsidian("data/output/Podrecznik_X.md")
+    path, written = sync_note(content, "Notatka.md", vault_dir)
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.config import OBSIDIAN_VAULT_PATH, OBSIDIAN_SUBFOLDER
+
+MANIFEST_NAME = ".transkrypcje_sync.json"
+MANIFEST_VERSION = 1
+
+# Pola frontmattera należące do użytkownika - wartość z vaulta wygrywa z wygenerowaną
+USER_FIELDS = ("reviewed", "status", "rating", "created")
+
+FRONTMATTER_KEY = re.compile(r'^([A-Za-z_][\w-]*):')
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def atomic_write_text(path: str, content: str) -> None:
+    """Zapisuje plik przez plik tymczasowy + os.replace (czytelnik nigdy nie widzi połowy pliku)."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# ============================================================================
+# FRONTMATTER
+# ============================================================================
+
+def parse_frontmatter(content: str) -> Tuple[Optional[List[Tuple[str, str]]], str]:
+    """
+    Dzieli notatkę na pola frontmattera i treść.
+
+    Returns:
+        ([(klucz, surowe_linie)], treść) - albo (None, content), gdy notatka
+        nie zaczyna się od frontmattera. Linie kontynuacji (listy, wcięcia)
+        należą do poprzedniego klucza.
+    """
+    if not content.startswith("---\n"):
+        return None, content
+    end = content.find("\n---", 3)
+    if end == -1:
+        return None, content
+    after = content.find("\n", end + 4)
+    body = "" if after == -1 else content[after + 1:]
+
+    fields: List[Tuple[str, str]] = []
+    for line in content[4:end + 1].splitlines():
+        match = FRONTMATTER_KEY.match(line)
+        if match or not fields:
+            fields.append((match.group(1) if match else "", line))
+        else:
+            key, raw = fields[-1]
+            fields[-1] = (key, f"{raw}\n{line}")
+    return fields, body
+
+
+def render_frontmatter(fields: List[Tuple[str, str]], body: str) -> str:
+    return "---\n" + "\n".join(raw for _, raw in fields) + "\n---\n" + body
+
+
+def merge_user_fields(new_content: str, existing_content: str) -> str:
+    """
+    Nakłada na nową notatkę pola użytkownika z wersji w vaulcie:
+    USER_FIELDS zachowują wartość z vaulta, pola spoza nowej notatki są dopisywane.
+    """
+    new_fields, body = parse_frontmatter(new_content)
+    old_fields, _ = parse_frontmatter(existing_content)
+    if new_fields is None or not old_fields:
+        return new_content
+
+    old_by_key = {key: raw for key, raw in old_fields if key}
+    new_keys = {key for key, _ in new_fields}
+
+    merged = [
+        (key, old_by_key[key]) if key in USER_FIELDS and key in old_by_key else (key, raw)
+        for key, raw in new_fields
+    ]
+    merged += [(key, raw) for key, raw in old_fields if key and key not in new_keys]
+    return render_frontmatter(merged, body)
+
+
+# ============================================================================
+# MANIFEST I SYNCHRONIZACJA
+# ============================================================================
+
+def load_manifest(target_dir: str) -> Dict[str, Dict]:
+    path = os.path.join(target_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == MANIFEST_VERSION:
+            return data.get("notes", {})
+    except Exception as e:
+        print(f"[OBSIDIAN] Nie można wczytać manifestu ({e}) - notatki zostaną porównane z vaultem.")
+    return {}
+
+
+def save_manifest(target_dir: str, notes: Dict[str, Dict]) -> None:
+    payload = json.dumps({"version": MANIFEST_VERSION, "notes": notes}, ensure_ascii=False, indent=1)
+    atomic_write_text(os.path.join(target_dir, MANIFEST_NAME), payload)
+
+
+def _sync_one(content: str, filename: str, target_dir: str, manifest: Dict[str, Dict],
+              existing_names: Optional[set] = None) -> Tuple[str, str]:
+    """
+    Synchronizuje jedną notatkę (manifest modyfikowany w miejscu).
+
+    Returns:
+        (ścieżka, status) - status: "written" | "unchanged" | "skipped"
+    """
+    target = os.path.join(target_dir, filename)
+    source_hash = content_hash(content)
+    exists = filename in existing_names if existing_names is not None else os.path.exists(target)
+    entry = manifest.get(filename)
+
+    # Źródło bez zmian od ostatniego eksportu - vaulta nawet nie czytamy
+    if exists and entry and entry.get("source") == source_hash:
+        return target, "skipped"
+
+    final_content = content
+    if exists:
+        with open(target, "r", encoding="utf-8") as f:
+            existing = f.read()
+        final_content = merge_user_fields(content, existing)
+        if final_content == existing:
+            manifest[filename] = {"source": source_hash, "written": content_hash(final_content)}
+            return target, "unchanged"
+
+    atomic_write_text(target, final_content)
+    manifest[filename] = {"source": source_hash, "written": content_hash(final_content)}
+    return target, "written"
+
+
+def sync_note(content: str, filename: str, target_dir: str) -> Tuple[str, bool]:
+    """
+    Eksportuje jedną notatkę (np. zapis z GUI).
+
+    Returns:
+        (ścieżka, czy_zapisano)
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    manifest = load_manifest(target_dir)
+    path, status = _sync_one(content, filename, target_dir, manifest)
+    if status != "skipped":
+        save_manifest(target_dir, manifest)
+    return path, status == "written"
+
+
+def sync_files(paths: List[str], target_dir: str) -> Dict[str, int]:
+    """
+    Eksportuje listę plików .md w jednym przebiegu (jeden odczyt listy
+    katalogu i jeden zapis manifestu).
+
+    Returns:
+        Liczniki {"written", "unchanged", "skipped", "failed"}.
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    manifest = load_manifest(target_dir)
+    existing_names = {entry.name for entry in os.scandir(target_dir) if entry.is_file()}
+    report = {"written": 0, "unchanged": 0, "skipped": 0, "failed": 0}
+
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+            _, status = _sync_one(content, os.path.basename(path), target_dir, manifest, existing_names)
+            report[status] += 1
+        except Exception as e:
+            print(f"[OBSIDIAN] Błąd eksportu {os.path.basename(path)}: {e}")
+            report["failed"] += 1
+
+    if report["written"] or report["unchanged"]:
+        save_manifest(target_dir, manifest)
+    return report
+
+
+def sync_directory(source_dir: str, target_dir: str, pattern: str = "*.md") -> Dict[str, int]:
+    """Eksportuje wszystkie notatki z katalogu (patrz sync_files)."""
+    return sync_files(sorted(glob.glob(os.path.join(source_dir, pattern))), target_dir)
+
+
+def export_to_obsidian(path: str, vault_path: str = OBSIDIAN_VAULT_PATH,
+                       subfolder: str = OBSIDIAN_SUBFOLDER) -> Optional[Dict[str, int]]:
+    """
+    Eksportuje notatkę lub cały katalog notatek do vaulta (podfolder `subfolder`).
+    Zwraca liczniki sync_files albo None, gdy vault nie istnieje.
+    """
+    if not vault_path or not os.path.isdir(vault_path):
+        print(f"[OBSIDIAN] Vault nie istnieje: {vault_path} - pomijam eksport.")
+        return None
+
+    target_dir = os.path.join(vault_path, subfolder) if subfolder else vault_path
+    if os.path.isdir(path):
+        report = sync_directory(path, target_dir)
+    else:
+        report = sync_files([path], target_dir)
+
+    print(
+        f"[OBSIDIAN] Eksport do {target_dir}: zapisano {report['written']}, "
+        f"bez zmian {report['skipped'] + report['unchanged']}, błędy {report['failed']}"
+    )
+    return report
@@ -0,0 +1,188 @@
+"""
+Ollama Client - wspólna warstwa HTTP do serwera Ollama.
+
+- jedna sesja requests (keep-alive, pula połączeń) na adres serwera,
+- lista modeli (/api/tags) cache'owana z TTL, więc odpytywanie statusu w GUI
+  i kolejne podsumowania nie powtarzają zapytań discovery,
+- chat/generate (także strumieniowo) i zwalnianie modelu z VRAM (keep_alive=0),
+- stały num_ctx per model (model_options): zmiana kontekstu między wywołaniami
+  przeładowuje model i kasuje cache prefiksu promptu (KV cache).
+
+Użycie:
+    client = get_ollama_client()
+    ok, msg = client.status()
+    models = client.list_models()
+    text = client.generate("qwen2.5:7b", "Streść...")["response"]
+    reply = client.chat(model, messages, format=KnowledgeGraph.model_json_schema())
+    for part in client.chat(model, messages, stream=True):
+        print(part["message"]["content"], end="")
+"""
+
+import json
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.utils.config import (
+    OLLAMA_URL, OLLAMA_MODELS_TTL, OLLAMA_POOL_SIZE, OLLAMA_NUM_CTX, OLLAMA_MODEL_NUM_CTX,
+)
+
+
+def normalize_host(host: str) -> str:
+    """Dodaje schemat http:// i usuwa końcowy ukośnik."""
+    if not host.startswith("http"):
+        host = f"http://{host}"
+    return host.rstrip("/")
+
+
+def model_num_ctx(model: str) -> int:
+    """num_ctx modelu z OLLAMA_MODEL_NUM_CTX (nazwa z sufiksem ":latest" lub bez), domyślnie OLLAMA_NUM_CTX."""
+    name = model[:-len(":latest")] if model.endswith(":latest") else model
+    return OLLAMA_MODEL_NUM_CTX.get(name, OLLAMA_MODEL_NUM_CTX.get(model, OLLAMA_NUM_CTX))
+
+
+def model_options(model: str, options: Optional[Dict] = None) -> Dict:
+    """
+    Opcje wywołania z num_ctx ustalonym dla modelu (num_ctx z `options` jest
+    ignorowany) - wszystkie ścieżki trafiają w ten sam załadowany model i cache.
+    """
+    merged = {"num_ctx": model_num_ctx(model)}
+    merged.update({k: v for k, v in sorted((options or {}).items()) if k != "num_ctx"})
+    return merged
+
+
+class OllamaClient:
+    """Klient HTTP Ollamy z pulą połączeń i cache listy modeli."""
+
+    def __init__(self, host: str = OLLAMA_URL, models_ttl: float = OLLAMA_MODELS_TTL,
+                 pool_size: int = OLLAMA_POOL_SIZE, session: Optional[requests.Session] = None):
+        """
+        Args:
+            host: Adres serwera Ollama.
+            models_ttl: Czas ważności (s) listy modeli z /api/tags.
+            pool_size: Maksymalna liczba utrzymywanych połączeń.
+            session: Gotowa sesja HTTP (np. w testach).
+        """
+        self.host = normalize_host(host)
+        self.models_ttl = models_ttl
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+
+        self._models: Optional[List[str]] = None
+        self._models_time = 0.0
+        self._lock = threading.Lock()
+
+    # --- Modele ---
+
+    def list_models(self, force: bool = False, timeout: float = 5) -> List[str]:
+        """
+        Zwraca nazwy modeli dostępnych w Ollama (z cache, jeśli świeży).
+        Błędy połączenia są rzucane dalej i nie trafiają do cache.
+        """
+        with self._lock:
+            if not force and self._models is not None and time.monotonic() - self._models_time < self.models_ttl:
+                return list(self._models)
+
+        response = self.session.get(f"{self.host}/api/tags", timeout=timeout)
+        response.raise_for_status()
+        models = [m["name"] for m in response.json().get("models", [])]
+
+        with self._lock:
+            self._models = models
+            self._models_time = time.monotonic()
+        return list(models)
+
+    def running_models(self, timeout: float = 5) -> List[str]:
+        """Modele aktualnie załadowane do pamięci (GET /api/ps) - bez cache."""
+        response = self.session.get(f"{self.host}/api/ps", timeout=timeout)
+        response.raise_for_status()
+        return [m["name"] for m in response.json().get("models", [])]
+
+    def invalidate_models(self) -> None:
+        """Wymusza ponowne pobranie listy modeli przy następnym wywołaniu."""
+        with self._lock:
+            self._models = None
+
+    def status(self, timeout: float = 2) -> Tuple[bool, str]:
+        """Zwraca (dostępna, opis) - korzysta z cache listy modeli."""
+        try:
+            models = self.list_models(timeout=timeout)
+        except requests.exceptions.HTTPError:
+            return False, "Nie odpowiada"
+        except requests.exceptions.RequestException:
+            return False, "Niedostępny"
+
+        if models:
+            return True, f"Dostępny ({len(models)} modeli)"
+        return True, "Dostępny (brak modeli)"
+
+    # --- Generowanie ---
+
+    def _post(self, path: str, payload: Dict, stream: bool, timeout: float) -> Union[Dict, Iterator[Dict]]:
+        response = self.session.post(f"{self.host}{path}", json=payload, stream=stream, timeout=timeout)
+        response.raise_for_status()
+        if not stream:
+            return response.json()
+        return self._iter_stream(response)
+
+    @staticmethod
+    def _iter_stream(response: requests.Response) -> Iterator[Dict]:
+        """Parsuje strumień NDJSON Ollamy; zamknięcie generatora zwalnia połączenie do puli."""
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                part = json.loads(line)
+                if part.get("error"):
+                    raise RuntimeError(part["error"])
+                yield part
+        finally:
+            response.close()
+
+    def chat(self, model: str, messages: List[Dict], stream: bool = False, options: Optional[Dict] = None,
+             format: Union[str, Dict] = "", keep_alive: Optional[Union[int, str]] = None,
+             timeout: float = 300) -> Union[Dict, Iterator[Dict]]:
+        """
+        POST /api/chat. Przy stream=True zwraca iterator części {"message": {"content": ...}}.
+        `format` to "json" albo pełny JSON schema (dekodowanie ograniczone do schematu).
+        """
+        payload = {"model": model, "messages": messages, "stream": stream, "options": model_options(model, options)}
+        if format:
+            payload["format"] = format
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return self._post("/api/chat", payload, stream, timeout)
+
+    def generate(self, model: str, prompt: str, stream: bool = False, options: Optional[Dict] = None,
+                 keep_alive: Optional[Union[int, str]] = None, timeout: float = 300) -> Union[Dict, Iterator[Dict]]:
+        """POST /api/generate. Wynik w polu "response"."""
+        payload = {"model": model, "prompt": prompt, "stream": stream, "options": model_options(model, options)}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return self._post("/api/generate", payload, stream, timeout)
+
+    def unload(self, model: str, timeout: float = 30) -> None:
+        """Zwalnia model z pamięci (pusty request z keep_alive=0, bez opcji - nie ładuje modelu ponownie)."""
+        self._post("/api/generate", {"model": model, "prompt": "", "stream": False, "keep_alive": 0}, False, timeout)
+
+
+_clients: Dict[str, OllamaClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_ollama_client(host: str = OLLAMA_URL) -> OllamaClient:
+    """Zwraca współdzielonego klienta dla danego adresu serwera."""
+    host = normalize_host(host)
+    with _clients_lock:
+        client = _clients.get(host)
+        if client is None:
+            client = _clients[host] = OllamaClient(host)
+        return client
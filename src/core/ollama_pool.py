@@ -0,0 +1,214 @@
+"""
+Ollama Pool - kilka serwerów Ollama (GPU) jako jeden backend.
+
+Każdy host jest okresowo sprawdzany (/api/tags - czy odpowiada i jakie ma
+modele, /api/ps - które modele są już załadowane do VRAM). Wywołanie trafia
+na najmniej obciążony host (najmniej zapytań w toku), który ma dany model;
+przy remisie wygrywa host, na którym model jest już załadowany (bez kosztu
+ładowania). Błąd połączenia/timeout oznacza host jako niedostępny i ponawia
+wywołanie na kolejnym - ekstrakcja jednej długiej transkrypcji rozkłada się
+na wszystkie dostępne karty.
+
+Pula z jednym hostem (domyślnie OLLAMA_URL) nie robi health checków.
+
+Użycie:
+    pool = get_ollama_pool()                      # hosty z OLLAMA_HOSTS
+    reply = pool.call("qwen2.5:7b", lambda host: get_ollama_client(host).chat(...))
+    with pool.lease("qwen2.5:7b") as host:        # bez failoveru (np. strumień)
+        ...
+    print(pool.format())
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, TypeVar
+
+import requests
+
+from src.core.ollama_client import OllamaClient, get_ollama_client, normalize_host
+from src.utils.config import OLLAMA_HOSTS, OLLAMA_HEALTH_INTERVAL
+
+HEALTH_TIMEOUT = 2.0
+FAILOVER_ERRORS = ("connection", "timeout", "server")  # ponawiamy na innym hoście
+HOST_DOWN_ERRORS = ("connection", "timeout")            # host oznaczany jako niedostępny
+COLD_PENALTY = 1  # "koszt" załadowania modelu, liczony jak jedno zapytanie w toku
+
+T = TypeVar("T")
+
+
+def model_key(name: str) -> str:
+    """"qwen2.5" -> "qwen2.5:latest" (tak nazywa modele /api/tags i /api/ps)."""
+    return name if ":" in name else f"{name}:latest"
+
+
+class OllamaHost:
+    """Stan jednego serwera w puli."""
+
+    def __init__(self, client: OllamaClient):
+        self.client = client
+        self.healthy = True           # optymistycznie do pierwszego health checku
+        self.models: Set[str] = set()     # dostępne (/api/tags); puste = nieznane
+        self.resident: Set[str] = set()   # załadowane do VRAM (/api/ps)
+        self.in_flight = 0
+        self.completed = 0
+        self.checked_at = float("-inf")
+
+    @property
+    def url(self) -> str:
+        return self.client.host
+
+
+class OllamaPool:
+    """Routing wywołań Ollamy: najmniej obciążony host z modelem, failover przy awarii."""
+
+    def __init__(self, hosts: Sequence[str], check_interval: float = OLLAMA_HEALTH_INTERVAL,
+                 clock=time.monotonic, client_factory: Callable[[str], OllamaClient] = get_ollama_client):
+        urls = list(dict.fromkeys(normalize_host(host) for host in hosts))
+        if not urls:
+            raise ValueError("Pula Ollamy wymaga co najmniej jednego hosta")
+        self.hosts = [OllamaHost(client_factory(url)) for url in urls]
+        self.name = ",".join(urls)
+        self.check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()       # stan hostów
+        self._checking = threading.Lock()   # jeden health check naraz
+
+    @property
+    def urls(self) -> List[str]:
+        return [host.url for host in self.hosts]
+
+    # --- Health check ---
+
+    def check(self, force: bool = False) -> None:
+        """Sprawdza hosty, których stan jest starszy niż check_interval."""
+        if len(self.hosts) < 2:
+            return
+        now = self._clock()
+        stale = [host for host in self.hosts if force or now - host.checked_at >= self.check_interval]
+        # Inne wątki nie czekają na trwający health check - korzystają z bieżącego stanu
+        if not stale or not self._checking.acquire(blocking=False):
+            return
+        try:
+            for host in stale:
+                self._check_host(host)
+        finally:
+            self._checking.release()
+
+    def _check_host(self, host: OllamaHost) -> None:
+        try:
+            models = host.client.list_models(force=True, timeout=HEALTH_TIMEOUT)
+            resident = host.client.running_models(timeout=HEALTH_TIMEOUT)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self._mark_down(host, e)
+            return
+        with self._lock:
+            if not host.healthy:
+                print(f"[POOL] {host.url}: znów dostępny.")
+            host.healthy = True
+            host.models = {model_key(m) for m in models}
+            host.resident = {model_key(m) for m in resident}
+            host.checked_at = self._clock()
+
+    def _mark_down(self, host: OllamaHost, error: BaseException) -> None:
+        with self._lock:
+            if host.healthy:
+                print(f"[POOL] {host.url}: niedostępny ({type(error).__name__}) - pomijam do kolejnego sprawdzenia.")
+            host.healthy = False
+            host.resident.clear()
+            host.checked_at = self._clock()
+
+    # --- Routing ---
+
+    def _acquire(self, model: str, exclude: Iterable[OllamaHost] = ()) -> OllamaHost:
+        self.check()
+        key = model_key(model)
+        excluded = set(map(id, exclude))
+        with self._lock:
+            candidates = [host for host in self.hosts if id(host) not in excluded]
+            # Wszystkie hosty niedostępne - próbujemy mimo to (błąd wywołania trafi do retry/breakera)
+            candidates = [host for host in candidates if host.healthy] or candidates
+            candidates = [host for host in candidates if not host.models or key in host.models] or candidates
+            host = min(candidates, key=lambda h: (
+                h.in_flight + (0 if key in h.resident else COLD_PENALTY),
+                key not in h.resident,
+                h.in_flight,
+            ))
+            host.in_flight += 1
+            return host
+
+    def _release(self, host: OllamaHost, model: Optional[str] = None) -> None:
+        with self._lock:
+            host.in_flight -= 1
+            if model is not None:
+                host.completed += 1
+                host.resident.add(model_key(model))
+
+    def call(self, model: str, fn: Callable[[str], T]) -> T:
+        """
+        Wywołuje fn(url_hosta) na wybranym hoście. Błąd połączenia, timeout
+        lub 5xx ponawia na kolejnym hoście; gdy zawiodły wszystkie, rzuca ostatni błąd.
+        """
+        from src.core.retry_policy import classify_error
+
+        tried: List[OllamaHost] = []
+        while True:
+            host = self._acquire(model, tried)
+            try:
+                result = fn(host.url)
+            except Exception as e:
+                self._release(host)
+                kind = classify_error(e)
+                if kind in HOST_DOWN_ERRORS and len(self.hosts) > 1:
+                    self._mark_down(host, e)
+                tried.append(host)
+                if kind not in FAILOVER_ERRORS or len(tried) >= len(self.hosts):
+                    raise
+                print(f"[POOL] {host.url}: błąd {kind} - przenoszę wywołanie na inny host.")
+                continue
+            self._release(host, model)
+            return result
+
+    @contextmanager
+    def lease(self, model: str):
+        """Rezerwuje host na czas bloku (bez failoveru) i zwraca jego adres."""
+        host = self._acquire(model)
+        try:
+            yield host.url
+        except BaseException:
+            self._release(host)
+            raise
+        self._release(host, model)
+
+    # --- Metryki ---
+
+    def metrics(self) -> List[Dict]:
+        with self._lock:
+            return [{
+                "host": host.url,
+                "healthy": host.healthy,
+                "in_flight": host.in_flight,
+                "completed": host.completed,
+                "resident": sorted(host.resident),
+            } for host in self.hosts]
+
+    def format(self) -> str:
+        parts = [
+            f"{m['host']} {'OK' if m['healthy'] else 'niedostępny'} ({m['completed']} wywołań)"
+            for m in self.metrics()
+        ]
+        return "[POOL] " + ", ".join(parts)
+
+
+_pools: Dict[tuple, OllamaPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_ollama_pool(hosts: Optional[Sequence[str]] = None) -> OllamaPool:
+    """Zwraca współdzieloną pulę dla danego zestawu hostów (domyślnie OLLAMA_HOSTS)."""
+    key = tuple(dict.fromkeys(normalize_host(host) for host in (hosts or OLLAMA_HOSTS)))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = OllamaPool(key)
+        return pool
@@ -1,24 +1,29 @@
 import os
-import ollama
-from src.utils.config import OLLAMA_URL, CHUNK_SIZE, OVERLAP
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.core.ioc_extractor import extract_iocs, count_iocs, format_iocs_markdown
+from src.core.ollama_client import get_ollama_client
+from src.utils.config import OLLAMA_URL, CHUNK_SIZE, OVERLAP, OSINT_MAX_WORKERS
 from src.utils.text_processing import smart_split_text
 
+NOTES_SEPARATOR = "\n\n---\n\n"
+# Ile znaków notatek mieści się w prompcie raportu końcowego (num_ctx 8192 - OLLAMA_NUM_CTX)
+REPORT_NOTES_BUDGET = 12000
+# Ile znaków notatek wysyłamy w jednym zapytaniu kondensującym
+CONDENSE_GROUP_CHARS = 16000
+# Zabezpieczenie przed modelem, który nie skraca tekstu
+MAX_CONDENSE_ROUNDS = 6
+
 class OsintAnalyzer:
-    def __init__(self, logger=None, stop_event=None, progress_callback=None):
+    def __init__(self, logger=None, stop_event=None, progress_callback=None, max_workers=OSINT_MAX_WORKERS):
         self.logger = logger
         self.stop_event = stop_event
         self.progress_callback = progress_callback
+        self.max_workers = max(1, max_workers)
         
-        # Obsługa adresu URL Ollamy
-        host = OLLAMA_URL
-        if not host.startswith("http"):
-             host = f"http://{host}"
-        
-        try:
-            self.client = ollama.Client(host=host)
-            self._log(f"OsintAnalyzer: Podłączono do {host}")
-        except Exception as e:
-            self._log(f"OsintAnalyzer: Błąd klienta: {e}")
+        # Współdzielony klient (pula połączeń keep-alive dla wątków etapu MAP)
+        self.client = get_ollama_client(OLLAMA_URL)
+        self._log(f"OsintAnalyzer: Podłączono do {self.client.host}")
 
     def _log(self, msg):
         if self.logger:
@@ -38,49 +43,66 @@ class OsintAnalyzer:
         with open(input_file, 'r', encoding='utf-8') as f:
             full_text = f.read()
 
-        # 2. Inteligentny podział
-        chunks = smart_split_text(full_text, max_length=CHUNK_SIZE, overlap=OVERLAP)
+        # 2. Deterministyczne IoC (jeden przebieg regexów po całym tekście zamiast pytania LLM)
+        iocs = extract_iocs(full_text)
+        self._log(f"Znaleziono {count_iocs(iocs)} wskaźników IoC (regex).")
+
+        # 3. Inteligentny podział
+        chunks = smart_split_text(full_text, chunk_size=CHUNK_SIZE, chunk_overlap=OVERLAP)
         total_chunks = len(chunks)
-        self._log(f"Podział na {total_chunks} fragmentów semantycznych.")
+        self._log(f"Podział na {total_chunks} fragmentów semantycznych "
+                  f"(równolegle: {min(self.max_workers, max(total_chunks, 1))}).")
 
-        extracted_notes = []
-        
-        # 3. ETAP MAP (Analiza fragmentów)
-        for i, chunk in enumerate(chunks):
-            if self.stop_event and self.stop_event.is_set():
-                raise InterruptedError("Analiza przerwana")
-            
-            # Kontekstowy nagłówek dla modelu
-            chunk_context = f"[FRAGMENT {i+1}/{total_chunks}]"
-            note = self._analyze_chunk_stream(chunk, chunk_context, model_name)
-            
-            if note:
-                extracted_notes.append(note)
-            
-            if self.progress_callback:
-                # 0-70% postępu to analiza fragmentów
-                prog = (i + 1) / total_chunks * 70
-                self.progress_callback(prog, "osint_analysis")
+        # 4. ETAP MAP (Analiza fragmentów, ograniczona pula wątków)
+        extracted_notes = self._map_chunks(chunks, model_name)
 
-        # 4. ETAP REDUCE (Synteza)
+        # 5. ETAP REDUCE (Synteza)
         self._log("Synteza raportu końcowego...")
-        full_notes_text = "\n\n---\n\n".join(extracted_notes)
-        
-        # Jeśli notatki są za długie, trzeba je skrócić przed finałem (Intermediate Reduce)
-        if len(full_notes_text) > 12000:
-             self._log("Notatki zbyt obszerne, wykonuję kondensację...")
-             full_notes_text = self._condense_notes(full_notes_text, model_name)
+        # Jeśli notatki są za długie, kondensujemy je drzewiasto (bez ucinania)
+        full_notes_text = self._condense_tree(extracted_notes, model_name)
+        if self.progress_callback: self.progress_callback(90, "osint_report")
 
         final_report = self._generate_final_report(full_notes_text, model_name)
 
-        # 5. Zapis
+        # 6. Zapis (sekcja IoC doklejana bez udziału modelu)
         with open(output_file, "w", encoding="utf-8") as f:
-            f.write(final_report)
+            f.write(final_report.rstrip() + "\n\n" + format_iocs_markdown(iocs))
             
         self._log(f"Gotowe. Raport: {output_file}")
         if self.progress_callback: self.progress_callback(100, "finished")
         return True
 
+    def _map_chunks(self, chunks, model_name):
+        """
+        Analizuje fragmenty równolegle (max self.max_workers naraz).
+        Notatki wracają w kolejności fragmentów, niezależnie od kolejności ukończenia.
+        """
+        total_chunks = len(chunks)
+        notes = [None] * total_chunks
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(self._analyze_chunk_stream, chunk, f"[FRAGMENT {i+1}/{total_chunks}]", model_name): i
+                for i, chunk in enumerate(chunks)
+            }
+            try:
+                for future in as_completed(futures):
+                    if self.stop_event and self.stop_event.is_set():
+                        raise InterruptedError("Analiza przerwana")
+
+                    notes[futures[future]] = future.result()
+                    done += 1
+                    if self.progress_callback:
+                        # 0-70% postępu to analiza fragmentów
+                        self.progress_callback(done / total_chunks * 70, "osint_analysis")
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        return [note for note in notes if note]
+
     def _analyze_chunk_stream(self, text, context_header, model):
         """Używa streamingu, aby móc przerwać w trakcie generowania"""
         prompt = f"""
@@ -88,12 +110,12 @@ class OsintAnalyzer:
         Przeanalizuj ten fragment transkrypcji pod kątem cyberbezpieczeństwa i OSINT.
         Wypisz TYLKO konkretne dane w formacie listy:
         - NARZĘDZIA: (nazwy softu, skryptów)
-        - URL/DOMENY: (adresy www, IP)
         - ZAGROŻENIA/ATAKI: (omawiane metody, wektory ataku)
         - CIEKAWOSTKI: (kontekst, nazwiska, firmy)
         
         Jeśli fragment nie zawiera takich danych, napisz "BRAK DANYCH".
         Nie streszczaj rozmowy, wyciągaj "mięso".
+        Nie wypisuj adresów URL, domen, IP ani hashy - są zbierane automatycznie.
         
         TEKST:
         {text}
@@ -108,12 +130,13 @@ class OsintAnalyzer:
                     {'role': 'user', 'content': prompt}
                 ],
                 stream=True,
-                options={'num_ctx': 8192, 'temperature': 0.2} # Niska temperatura dla faktów
+                options={'temperature': 0.2} # Niska temperatura dla faktów (num_ctx ustala klient per model)
             )
             
             for chunk in stream:
                 if self.stop_event and self.stop_event.is_set():
                     self._log("Przerwano generowanie przez użytkownika.")
+                    stream.close()  # zwraca połączenie do puli
                     return None
                 
                 content = chunk['message']['content']
@@ -126,22 +149,85 @@ class OsintAnalyzer:
             self._log(f"Błąd LLM: {e}")
             return None
 
+    @staticmethod
+    def _group_notes(notes, max_chars):
+        """Pakuje notatki w grupy do max_chars znaków (zbyt długie notatki są dzielone)."""
+        pieces = []
+        for note in notes:
+            if len(note) > max_chars:
+                pieces.extend(smart_split_text(note, chunk_size=max_chars, chunk_overlap=0))
+            else:
+                pieces.append(note)
+
+        groups, current, size = [], [], 0
+        for piece in pieces:
+            extra = len(piece) + (len(NOTES_SEPARATOR) if current else 0)
+            if current and size + extra > max_chars:
+                groups.append(current)
+                current, size = [], 0
+                extra = len(piece)
+            current.append(piece)
+            size += extra
+        if current:
+            groups.append(current)
+        return groups
+
+    def _condense_tree(self, notes, model):
+        """
+        Rekurencyjna kondensacja: grupy notatek są kondensowane równolegle, potem
+        kondensowane są wyniki, aż całość zmieści się w REPORT_NOTES_BUDGET.
+        Liczba rund rośnie logarytmicznie z długością materiału.
+        """
+        level = 0
+        while len(NOTES_SEPARATOR.join(notes)) > REPORT_NOTES_BUDGET:
+            if level >= MAX_CONDENSE_ROUNDS:
+                self._log(f"Kondensacja: osiągnięto limit {MAX_CONDENSE_ROUNDS} rund, notatki mogą być przycięte przez model.")
+                break
+
+            level += 1
+            groups = self._group_notes(notes, CONDENSE_GROUP_CHARS)
+            self._log(f"Kondensacja (runda {level}): {len(notes)} notatek -> {len(groups)} grup...")
+
+            # Każda runda zajmuje połowę pozostałego zakresu 70-90%
+            start = 90 - 20 / 2 ** (level - 1)
+            span = 20 / 2 ** level
+            condensed = [None] * len(groups)
+            done = 0
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {
+                    pool.submit(self._condense_notes, NOTES_SEPARATOR.join(group), model): i
+                    for i, group in enumerate(groups)
+                }
+                for future in as_completed(futures):
+                    if self.stop_event and self.stop_event.is_set():
+                        for f in futures:
+                            f.cancel()
+                        raise InterruptedError("Analiza przerwana")
+
+                    condensed[futures[future]] = future.result()
+                    done += 1
+                    if self.progress_callback:
+                        self.progress_callback(start + span * done / len(groups), "osint_condense")
+
+            notes = [note for note in condensed if note]
+
+        return NOTES_SEPARATOR.join(notes)
+
     def _condense_notes(self, notes, model):
-        """Kondensacja notatek, jeśli przekraczają okno kontekstowe"""
+        """Kondensacja jednej grupy notatek (wejście ograniczone przez _group_notes)."""
         prompt = f"""
         Poniżej znajdują się surowe notatki z analizy transkrypcji.
         Scal je, usuń duplikaty i sformatuj jako spójną listę znalezisk OSINT.
         
         NOTATKI:
-        {notes[:16000]} 
-        """ 
-        # Hard limit znaków dla kondensacji, Bielik powinien to udźwignąć
+        {notes}
+        """
         
         response = self.client.chat(
             model=model,
             messages=[{'role': 'user', 'content': prompt}],
-            stream=False,
-            options={'num_ctx': 8192} 
+            stream=False
         )
         return response['message']['content']
 
@@ -158,8 +244,9 @@ class OsintAnalyzer:
         1. **Executive Summary**: 3 zdania o czym był materiał.
         2. **Case Studies**: Opis konkretnych historii/ataków (kto, jak, skutki).
         3. **Narzędziownik**: Tabela lub lista narzędzi z opisem zastosowania.
-        4. **IoC / Ślady**: URLe, Domeny, IP (jeśli znaleziono).
-        5. **Wnioski i Rekomendacje**.
+        4. **Wnioski i Rekomendacje**.
+
+        Nie twórz sekcji IoC - lista URL/domen/IP jest dołączana automatycznie.
         
         DANE WEJŚCIOWE:
         {notes}
@@ -172,6 +259,6 @@ class OsintAnalyzer:
                 {'role': 'user', 'content': user_prompt}
             ],
             stream=False,
-            options={'num_ctx': 8192, 'temperature': 0.4}
+            options={'temperature': 0.4}
         )
         return response['message']['content']
@@ -9,7 +9,7 @@ from src.agents.writer import ReportWriter
 from src.agents.tagger import TaggerAgent
 from src.core.llm_engine import unload_model
 from src.utils.helpers import validate_url, validate_path, check_disk_space, check_ffmpeg
-from src.utils.config import DEFAULT_OLLAMA_MODEL
+from src.utils.config import DEFAULT_OLLAMA_MODEL, DOWNLOAD_AUDIO_CODEC
 from src.utils.subtitle_converter import convert_subtitle_to_txt
 
 class Processor:
@@ -39,9 +39,9 @@ class Processor:
     def check_ollama_status(self):
         return self.summarizer.check_ollama_status()
     
-    def download_video(self, url, save_path, quality, audio_quality="192"):
+    def download_video(self, url, save_path, quality, audio_quality="192", audio_codec=DOWNLOAD_AUDIO_CODEC):
         """Pobiera wideo z YouTube. Zwraca listę słowników {'video': path, 'subtitles': path_or_None}."""
-        return self.downloader.download_video(url, save_path, quality, audio_quality)
+        return self.downloader.download_video(url, save_path, quality, audio_quality, audio_codec)
 
     def convert_subtitles_to_txt(self, subtitle_path, output_path=None):
         return convert_subtitle_to_txt(subtitle_path, output_path)
@@ -84,8 +84,8 @@ class Processor:
         """
         from src.utils.config import DATA_OUTPUT, MODEL_EXTRACTOR, MODEL_WRITER, MODEL_TAGGER
         import json
-        from src.core.text_cleaner import clean_transcript
-        from src.utils.text_processing import smart_split_text
+        from src.core.text_cleaner import clean_transcript_with_timeline
+        from src.utils.text_processing import split_with_time_ranges
         from src.utils.config import CHUNK_SIZE, OVERLAP
         from tqdm import tqdm
 
@@ -110,16 +110,16 @@ class Processor:
         # 3. Wczytywanie i czyszczenie
         with open(input_path, 'r', encoding='utf-8') as f:
             raw_text = f.read()
-        clean_text = clean_transcript(raw_text)
-        chunks = smart_split_text(clean_text, chunk_size=CHUNK_SIZE, chunk_overlap=OVERLAP)
+        clean_text, timeline = clean_transcript_with_timeline(raw_text)
+        chunks = split_with_time_ranges(clean_text, timeline, chunk_size=CHUNK_SIZE, chunk_overlap=OVERLAP)
 
         # 4. Ekstrakcja
         knowledge_base = []
         self.logger.log(f"[PROCESSOR] Ekstrakcja wiedzy ({len(chunks)} fragmentów)...")
         try:
             extractor = KnowledgeExtractor()
-            for i, chunk in enumerate(chunks):
-                graph = extractor.extract_knowledge(chunk, chunk_id=i)
+            for i, (chunk, time_range) in enumerate(chunks):
+                graph = extractor.extract_knowledge(chunk, chunk_id=i, time_range=time_range)
                 knowledge_base.append(graph.model_dump())
         finally:
             unload_model(MODEL_EXTRACTOR)
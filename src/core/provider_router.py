@@ -0,0 +1,270 @@
+"""
+Provider Router - wybór Ollama/OpenAI dla każdego wywołania LLM (LLM_PROVIDER="auto").
+
+Każdy etap (extractor, writer, tagger) ma politykę z LLM_STAGE_POLICY:
+- "ollama" / "openai" - zawsze ten provider,
+- "auto" - lokalnie, a do chmury, gdy:
+    * lokalny backend jest niedostępny (otwarty circuit breaker),
+    * GPU jest zajęte (np. Whisper): wolny VRAM < ROUTER_MIN_FREE_VRAM_GB,
+    * kolejka lokalna jest za długa (ROUTER_QUEUE_SPILL, np. writer),
+    * wywołanie lokalne skończyło się błędem przejściowym (fallback),
+  o ile jest klucz OpenAI i wywołanie mieści się w budżecie ROUTER_COST_BUDGET_USD.
+
+Każda decyzja trafia do śladu (RoutingTrace): etap, provider, powód, czas,
+tokeny (szacunek ~4 znaki/token) i koszt - podsumowanie per przebieg pokazuje,
+ile przepustowości kosztowało wyjście do chmury.
+
+Użycie:
+    llm = LLMEngine("writer", provider="auto")     # router wewnątrz silnika
+    text = llm.generate(system_prompt, user_prompt)
+    print(get_routing_trace().format())            # wywołania, czas i koszt per etap/provider
+"""
+
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+from src.utils.config import (
+    LLM_STAGE_POLICY, ROUTER_QUEUE_SPILL, ROUTER_MIN_FREE_VRAM_GB, ROUTER_COST_BUDGET_USD,
+    ROUTER_TRACE_FILE, OPENAI_PRICES_PER_1M, OPENAI_API_KEY, OPENAI_OUTPUT_TOKENS_ESTIMATE,
+)
+
+VRAM_TTL = 5.0  # s ważności odczytu wolnego VRAM
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+class RouteDecision(NamedTuple):
+    provider: str  # "ollama" | "openai"
+    reason: str
+
+
+def estimate_cost(model: str, tokens_in: int, tokens_out: int) -> float:
+    """Koszt wywołania OpenAI w USD wg OPENAI_PRICES_PER_1M (0 dla nieznanego modelu)."""
+    price_in, price_out = OPENAI_PRICES_PER_1M.get(model, (0.0, 0.0))
+    return (tokens_in * price_in + tokens_out * price_out) / 1_000_000
+
+
+def output_tokens(result: Any) -> int:
+    """Szacunek tokenów odpowiedzi (tekst albo model Pydantic)."""
+    text = result.model_dump_json() if hasattr(result, "model_dump_json") else str(result or "")
+    return len(text) // 4
+
+
+def decide(policy: str, local_waiting: int = 0, spill_at: Optional[int] = None,
+           free_vram_gb: Optional[float] = None, local_circuit: str = "closed",
+           cloud_ready: bool = True) -> RouteDecision:
+    """Decyzja routera na podstawie polityki etapu i bieżących sygnałów (bez efektów ubocznych)."""
+    if policy in ("ollama", "openai"):
+        return RouteDecision(policy, "polityka etapu")
+    if not cloud_ready:
+        return RouteDecision("ollama", "chmura niedostępna (klucz/budżet)")
+    if local_circuit == "open":
+        return RouteDecision("openai", "lokalny backend niedostępny")
+    if free_vram_gb is not None and free_vram_gb < ROUTER_MIN_FREE_VRAM_GB:
+        return RouteDecision("openai", f"GPU zajęte ({free_vram_gb:.1f} GB wolne)")
+    if spill_at is not None and local_waiting >= spill_at:
+        return RouteDecision("openai", f"kolejka lokalna: {local_waiting}")
+    return RouteDecision("ollama", "lokalnie")
+
+
+class RoutingTrace:
+    """Ślad decyzji routera (współdzielony, bezpieczny wątkowo), opcjonalnie dopisywany do JSONL."""
+
+    def __init__(self, path: str = ROUTER_TRACE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.records: List[Dict] = []
+            self.spent = 0.0
+
+    def record(self, stage: str, provider: str, model: str, reason: str, latency: float,
+               tokens_in: int, tokens_out: int, error: Optional[str] = None) -> Dict:
+        cost = estimate_cost(model, tokens_in, tokens_out) if provider == "openai" else 0.0
+        entry = {
+            "time": round(time.time(), 3),
+            "stage": stage,
+            "provider": provider,
+            "model": model,
+            "reason": reason,
+            "latency": round(latency, 3),
+            "tokens_in": tokens_in,
+            "tokens_out": tokens_out,
+            "cost_usd": round(cost, 6),
+            "error": error,
+        }
+        with self._lock:
+            self.records.append(entry)
+            self.spent += cost
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+    def summary(self) -> Dict[str, Dict]:
+        """{"etap/provider": {calls, errors, latency, tokens_in, tokens_out, cost_usd}}."""
+        with self._lock:
+            records = list(self.records)
+        groups: Dict[str, Dict] = {}
+        for r in records:
+            g = groups.setdefault(f"{r['stage']}/{r['provider']}", {
+                "calls": 0, "errors": 0, "latency": 0.0, "tokens_in": 0, "tokens_out": 0, "cost_usd": 0.0,
+            })
+            g["calls"] += 1
+            g["errors"] += r["error"] is not None
+            g["latency"] += r["latency"]
+            g["tokens_in"] += r["tokens_in"]
+            g["tokens_out"] += r["tokens_out"]
+            g["cost_usd"] += r["cost_usd"]
+        return groups
+
+    def format(self) -> str:
+        lines = []
+        for key, g in sorted(self.summary().items()):
+            rate = g["tokens_out"] / g["latency"] if g["latency"] else 0.0
+            lines.append(
+                f"[ROUTER] {key}: wywołania {g['calls']} (błędy {g['errors']}), "
+                f"śr. {g['latency'] / g['calls']:.1f} s, {rate:.0f} tok/s, ${g['cost_usd']:.4f}"
+            )
+        lines.append(f"[ROUTER] Koszt OpenAI: ${self.spent:.4f} / ${ROUTER_COST_BUDGET_USD:.2f}")
+        return "\n".join(lines)
+
+
+_trace = RoutingTrace()
+
+
+def get_routing_trace() -> RoutingTrace:
+    """Zwraca wspólny ślad decyzji routera bieżącego przebiegu."""
+    return _trace
+
+
+class ProviderRouter:
+    """Wybór silnika (lokalny LLMEngine Ollamy / chmurowy OpenAI) dla wywołań jednego etapu."""
+
+    def __init__(self, stage: str, local, cloud_factory: Callable[[], Any], policy: Optional[str] = None,
+                 spill_at: Optional[int] = None, budget: float = ROUTER_COST_BUDGET_USD,
+                 trace: Optional[RoutingTrace] = None, vram_probe: Optional[Callable[[], Optional[float]]] = None):
+        from src.core.retry_policy import get_circuit_breaker
+
+        self.stage = stage
+        self.local = local
+        self._cloud_factory = cloud_factory
+        self._cloud = None
+        self._cloud_lock = threading.Lock()
+        self.policy = policy or LLM_STAGE_POLICY.get(stage, "auto")
+        self.spill_at = spill_at if spill_at is not None else ROUTER_QUEUE_SPILL.get(stage)
+        self.budget = budget
+        self.trace = trace or get_routing_trace()
+        # Stan lokalnego backendu (ten sam wyłącznik, co przy ekstrakcji bez routera)
+        self.breaker = get_circuit_breaker(local.backend)
+        # VRAM tej maszyny ma znaczenie tylko, gdy Ollama działa lokalnie
+        local_gpu = all(urlparse(url).hostname in LOCAL_HOSTS for url in local.pool.urls)
+        self._vram_probe = vram_probe or (self._read_free_vram if local_gpu else lambda: None)
+        self._vram = (float("-inf"), None)
+
+    @property
+    def cloud(self):
+        with self._cloud_lock:
+            if self._cloud is None:
+                self._cloud = self._cloud_factory()
+            return self._cloud
+
+    def _read_free_vram(self) -> Optional[float]:
+        checked_at, value = self._vram
+        if time.monotonic() - checked_at < VRAM_TTL:
+            return value
+        from src.core.gpu_manager import get_gpu_memory_info
+
+        info = get_gpu_memory_info()
+        value = info.get("free_gb") if info.get("available") else None
+        self._vram = (time.monotonic(), value)
+        return value
+
+    def _cloud_ready(self, tokens_in: int) -> bool:
+        if not OPENAI_API_KEY or self.policy == "ollama":
+            return False
+        cost = estimate_cost(self.cloud.model, tokens_in, OPENAI_OUTPUT_TOKENS_ESTIMATE)
+        return self.trace.spent + cost <= self.budget
+
+    def route(self, tokens_in: int) -> RouteDecision:
+        if self.policy != "auto":
+            return decide(self.policy)
+        if not self._cloud_ready(tokens_in):
+            return decide("auto", cloud_ready=False)
+        return decide(
+            "auto",
+            local_waiting=self.local.concurrency.waiting,
+            spill_at=self.spill_at,
+            free_vram_gb=self._vram_probe(),
+            local_circuit=self.breaker.state,
+        )
+
+    def _engine(self, provider: str):
+        return self.cloud if provider == "openai" else self.local
+
+    def _attempt(self, decision: RouteDecision, call: Callable[[Any], Any], tokens_in: int) -> Any:
+        from src.core.retry_policy import classify_error, TRANSIENT_ERRORS
+
+        engine = self._engine(decision.provider)
+        started = time.monotonic()
+        try:
+            result = call(engine)
+        except Exception as e:
+            kind = classify_error(e)
+            if decision.provider == "ollama" and kind in TRANSIENT_ERRORS:
+                self.breaker.record_failure()
+            self.trace.record(self.stage, decision.provider, engine.model, decision.reason,
+                              time.monotonic() - started, tokens_in, 0, error=kind)
+            raise
+        if decision.provider == "ollama":
+            self.breaker.record_success()
+        self.trace.record(self.stage, decision.provider, engine.model, decision.reason,
+                          time.monotonic() - started, tokens_in, output_tokens(result))
+        return result
+
+    def run(self, messages: List[Dict], call: Callable[[Any], Any]) -> Any:
+        """
+        Wykonuje call(silnik) na wybranym providerze. Przy polityce "auto" błąd
+        przejściowy lokalnego backendu ponawia wywołanie raz w chmurze.
+        """
+        from src.core.rate_limiter import estimate_tokens
+        from src.core.retry_policy import classify_error, TRANSIENT_ERRORS
+
+        tokens_in = estimate_tokens(messages, output_tokens=0)
+        decision = self.route(tokens_in)
+        try:
+            return self._attempt(decision, call, tokens_in)
+        except Exception as e:
+            kind = classify_error(e)
+            if (self.policy != "auto" or decision.provider != "ollama"
+                    or kind not in TRANSIENT_ERRORS or not self._cloud_ready(tokens_in)):
+                raise
+            print(f"[ROUTER] {self.stage}: lokalny backend - błąd {kind}, przechodzę na OpenAI.")
+            return self._attempt(RouteDecision("openai", f"fallback po błędzie {kind}"), call, tokens_in)
+
+    def stream(self, messages: List[Dict], call: Callable[[Any], Iterator[str]]) -> Iterator[str]:
+        """Strumień z wybranego providera (bez fallbacku - część odpowiedzi mogła już zostać wysłana)."""
+        from src.core.rate_limiter import estimate_tokens
+
+        tokens_in = estimate_tokens(messages, output_tokens=0)
+        decision = self.route(tokens_in)
+        engine = self._engine(decision.provider)
+        started = time.monotonic()
+        parts: List[str] = []
+        error = None
+        try:
+            for part in call(engine):
+                parts.append(part)
+                yield part
+        except Exception as e:
+            from src.core.retry_policy import classify_error
+
+            error = classify_error(e)
+            raise
+        finally:
+            self.trace.record(self.stage, decision.provider, engine.model, decision.reason,
+                              time.monotonic() - started, tokens_in, output_tokens("".join(parts)), error=error)
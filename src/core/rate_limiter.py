@@ -0,0 +1,172 @@
+"""
+Rate Limiter - wspólne (na proces) tempo wywołań OpenAI.
+
+Limity konta są liczone w requestach (RPM) i tokenach (TPM) na minutę.
+Zamiast wpadać w 429 i backoff, każde wywołanie LLMEngine najpierw pobiera
+z dwóch kubełków tokenów (token bucket): 1 request i szacowaną liczbę tokenów
+(prompt + przewidywana odpowiedź). Kubełki napełniają się w tempie limitu,
+więc przepustowość trzyma się tuż pod limitem konta bez skoków.
+
+Stan jest korygowany nagłówkami odpowiedzi API (x-ratelimit-limit-*,
+x-ratelimit-remaining-*), a 429 wstrzymuje wszystkie wątki na czas
+Retry-After (hook httpx na kliencie OpenAI - obejmuje też wywołania instructora).
+
+Użycie:
+    limiter = get_rate_limiter("openai")
+    limiter.acquire(estimate_tokens(messages))   # blokuje do czasu dostępności
+    limiter.update_from_headers(response.headers)
+"""
+
+import re
+import threading
+import time
+from typing import Dict, List, Mapping, Optional
+
+from src.utils.config import OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT, OPENAI_OUTPUT_TOKENS_ESTIMATE
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Czas z nagłówka x-ratelimit-reset-* ("1s", "6m0s", "20ms") w sekundach."""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def estimate_tokens(messages: List[Dict], output_tokens: int = OPENAI_OUTPUT_TOKENS_ESTIMATE) -> int:
+    """
+    Szacunek zużycia TPM przed wywołaniem: ~4 znaki na token dla promptu
+    (polski tekst wychodzi w okolicach 3-4), narzut na wiadomość i przewidywana
+    odpowiedź - API wlicza do limitu max_tokens/odpowiedź już przy przyjęciu requestu.
+    """
+    chars = sum(len(str(message.get("content", ""))) for message in messages)
+    return chars // 4 + 4 * len(messages) + output_tokens
+
+
+class TokenBucket:
+    """Kubełek o pojemności `capacity`, napełniany równomiernie `capacity / period` na sekundę."""
+
+    def __init__(self, capacity: float, period: float = 60.0, clock=time.monotonic):
+        self.capacity = float(capacity)
+        self.period = period
+        self._clock = clock
+        self._level = float(capacity)
+        self._updated = clock()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Ile sekund do momentu, gdy `amount` będzie dostępne (0 = od razu)."""
+        self._refill()
+        # Żądanie większe niż pojemność czeka na pełny kubełek zamiast w nieskończoność
+        missing = min(amount, self.capacity) - self._level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self._level -= amount
+
+    def sync(self, limit: Optional[float], remaining: Optional[float]) -> None:
+        """Koryguje pojemność i poziom wartościami z nagłówków API."""
+        self._refill()
+        if limit:
+            self.capacity = float(limit)
+        if remaining is not None:
+            self._level = min(self._level, float(remaining))
+
+
+class RateLimiter:
+    """Dwa kubełki (requesty, tokeny) współdzielone przez wszystkie wątki procesu."""
+
+    def __init__(self, name: str, rpm: int = OPENAI_RPM_LIMIT, tpm: int = OPENAI_TPM_LIMIT,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.name = name
+        self.requests = TokenBucket(rpm, clock=clock)
+        self.tokens = TokenBucket(tpm, clock=clock)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()   # stan kubełków
+        self._turn = threading.Lock()   # kolejka oczekujących
+        self._blocked_until = 0.0
+        self.waited = 0.0  # łączny czas oczekiwania (diagnostyka)
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Czeka, aż oba kubełki pozwolą na request z `tokens` tokenami, i pobiera je.
+        Oczekujące wątki są obsługiwane po kolei (blokada _turn) i nie wyprzedzają
+        się nawzajem. Zwraca czas oczekiwania (s).
+        """
+        waited = 0.0
+        with self._turn:
+            while True:
+                with self._lock:
+                    wait = max(
+                        self._blocked_until - self._clock(),
+                        self.requests.wait_time(1),
+                        self.tokens.wait_time(tokens),
+                    )
+                    if wait <= 0:
+                        self.requests.take(1)
+                        self.tokens.take(tokens)
+                        self.waited += waited
+                        return waited
+                # Śpimy poza blokadą stanu - nagłówki z trwających wywołań mogą go korygować
+                self._sleep(wait)
+                waited += wait
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Synchronizuje kubełki z nagłówkami x-ratelimit-* odpowiedzi OpenAI."""
+        def number(key):
+            try:
+                return float(headers[key])
+            except (KeyError, TypeError, ValueError):
+                return None
+
+        with self._lock:
+            self.requests.sync(number("x-ratelimit-limit-requests"), number("x-ratelimit-remaining-requests"))
+            self.tokens.sync(number("x-ratelimit-limit-tokens"), number("x-ratelimit-remaining-tokens"))
+
+    def penalize(self, retry_after: Optional[float]) -> None:
+        """429: wstrzymuje wszystkie wywołania na czas Retry-After (domyślnie 1 s)."""
+        with self._lock:
+            until = self._clock() + (retry_after if retry_after is not None else 1.0)
+            if until > self._blocked_until:
+                self._blocked_until = until
+                print(f"[RATE] {self.name}: 429 - wstrzymuję wywołania na {until - self._clock():.1f} s.")
+
+    def on_response(self, response) -> None:
+        """Hook httpx (event_hooks={"response": [...]}) dla klienta OpenAI."""
+        headers = response.headers
+        self.update_from_headers(headers)
+        if response.status_code == 429:
+            retry_after = parse_reset(headers.get("retry-after")) or parse_reset(
+                headers.get("x-ratelimit-reset-tokens") or headers.get("x-ratelimit-reset-requests"))
+            self.penalize(retry_after)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str = "openai") -> RateLimiter:
+    """Zwraca współdzielony limiter dla danego konta/providera."""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = RateLimiter(name)
+        return limiter
@@ -0,0 +1,180 @@
+"""
+Retry Policy - klasyfikacja błędów LLM, backoff z jitterem i circuit breaker.
+
+Nie każdy błąd zasługuje na to samo ponowienie:
+- "validation"  - odpowiedź niezgodna ze schematem: ponów od razu, podając
+                  modelowi treść błędu walidacji,
+- "rate_limit", "timeout", "connection", "server" - błędy przejściowe backendu:
+                  wykładniczy backoff z pełnym jitterem (Retry-After ma pierwszeństwo),
+- "fatal"       - np. 400/404 (brak modelu, za długi prompt): ponawianie nic nie da,
+- "circuit"     - backend uznany za niesprawny, wywołanie odrzucone bez próby.
+
+CircuitBreaker jest współdzielony przez wszystkie wątki ekstrakcji jednego
+backendu: po serii błędów przejściowych kolejne fragmenty kończą się od razu
+(zamiast 3 prób x timeout każdy), a po `reset_timeout` jedno wywołanie
+próbne sprawdza, czy backend wrócił.
+
+Użycie:
+    breaker = get_circuit_breaker("ollama:http://localhost:11434")
+    breaker.before_call()             # CircuitOpenError, gdy obwód otwarty
+    kind = classify_error(exc)
+    time.sleep(backoff_delay(attempt, retry_after=retry_after_seconds(exc)))
+"""
+
+import json
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+from src.utils.config import (
+    RETRY_BASE_DELAY, RETRY_MAX_DELAY, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT,
+)
+
+TRANSIENT_ERRORS = ("rate_limit", "timeout", "connection", "server")
+
+_VALIDATION_NAMES = {
+    "ValidationError", "JSONDecodeError", "InstructorRetryException",
+    "ResponseParsingError", "IncompleteOutputException",
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """Backend oznaczony jako niesprawny - wywołanie odrzucone bez próby."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Obwód {name} otwarty - backend niedostępny (ponowna próba za {retry_in:.0f} s)")
+        self.retry_in = retry_in
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def classify_error(error: BaseException) -> str:
+    """Zwraca klasę błędu (patrz opis modułu). Sprawdza też przyczyny (__cause__)."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, CircuitOpenError):
+            return "circuit"
+
+        names = {cls.__name__ for cls in type(error).__mro__}
+        status = _status_code(error)
+        if status == 429 or "RateLimitError" in names:
+            return "rate_limit"
+        if any("Timeout" in name for name in names):
+            return "timeout"
+        if names & {"ConnectionError", "APIConnectionError"}:
+            return "connection"
+        if status is not None and status >= 500:
+            return "server"
+        if names & _VALIDATION_NAMES or isinstance(error, json.JSONDecodeError):
+            return "validation"
+        if status is not None:
+            return "fatal"
+        error = error.__cause__ or error.__context__
+    return "fatal"
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Wartość nagłówka Retry-After (w sekundach), jeśli serwer ją podał."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY,
+                  retry_after: Optional[float] = None, rng: Optional[random.Random] = None) -> float:
+    """Wykładniczy backoff z pełnym jitterem: losowo z [0, min(cap, base * 2^attempt)]."""
+    if retry_after is not None:
+        return min(cap, retry_after)
+    return (rng or random).uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Wyłącznik: closed -> (failure_threshold kolejnych błędów) -> open ->
+    (po reset_timeout) half-open: przepuszcza jedno wywołanie próbne, którego
+    wynik zamyka albo ponownie otwiera obwód.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def retry_in(self) -> float:
+        """Ile sekund do wywołania próbnego (0, gdy obwód nie jest otwarty)."""
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def before_call(self) -> None:
+        """Rzuca CircuitOpenError, gdy wywołanie ma zostać odrzucone."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return
+            if state == "half-open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            retry_in = max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+        raise CircuitOpenError(self.name, retry_in)
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                print(f"[CIRCUIT] {self.name}: backend znów odpowiada - obwód zamknięty.")
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            reopen = self._probe_in_flight
+            self._probe_in_flight = False
+            if reopen or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = self._clock()
+                print(f"[CIRCUIT] {self.name}: {self._failures} błędów z rzędu - obwód otwarty "
+                      f"na {self.reset_timeout:.0f} s.")
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Zwraca współdzielony wyłącznik dla danego backendu."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
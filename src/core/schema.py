@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from dataclasses import dataclass, field
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Dict, List, Optional, Tuple
 
 class KeyConcept(BaseModel):
     term: str = Field(..., description="Termin lub pojęcie")
@@ -7,14 +8,207 @@ class KeyConcept(BaseModel):
 
 class Tool(BaseModel):
     name: str = Field(..., description="Nazwa narzędzia")
-    description: str = Field(..., description="Opis zastosowania")
+    description: str = Field(default="", description="Opis zastosowania")
+
+
+# ============================================================================
+# REJESTR PÓL EKSTRAKCJI
+# Jedno źródło prawdy dla promptu (EXTRACTION_PROMPT, Batch API) i walidacji
+# (KnowledgeGraph). Model często odpowiada polskimi kluczami - aliasy są
+# mapowane na pola modelu przed walidacją, więc nie kosztują ponowień.
+# ============================================================================
+
+@dataclass(frozen=True)
+class ExtractionField:
+    name: str                                # pole KnowledgeGraph
+    instruction: str                         # opis treści dla modelu (prompt, bez kształtu)
+    aliases: Tuple[str, ...] = ()            # klucze akceptowane przy parsowaniu
+    item_keys: Dict[str, Tuple[str, ...]] = field(default_factory=dict)  # pole obiektu -> aliasy
+    wire_key: str = ""                       # krótki klucz formatu kompaktowego
+
+
+EXTRACTION_FIELDS: Tuple[ExtractionField, ...] = (
+    ExtractionField(
+        "key_concepts",
+        "Kluczowe pojęcia z tekstu. Definicje muszą być wyczerpujące (min. 2 zdania).",
+        aliases=("kluczowe_pojęcia", "kluczowe_pojecia", "pojęcia", "concepts"),
+        item_keys={"term": ("termin", "pojęcie", "name"), "definition": ("definicja_i_kontekst", "definicja", "opis", "description")},
+        wire_key="c",
+    ),
+    ExtractionField(
+        "tools",
+        "Konkretne oprogramowanie, protokoły, urządzenia lub standardy wspomniane w tekście wraz z ich rolą.",
+        aliases=("narzędzia_i_technologie", "narzedzia_i_technologie", "narzędzia", "technologie"),
+        item_keys={"name": ("nazwa", "narzędzie", "tool"), "description": ("opis", "rola", "zastosowanie", "definition")},
+        wire_key="t",
+    ),
+    ExtractionField(
+        "tips",
+        "Konkretne kroki, porady lub instrukcje \"jak to zrobić\", a także nietrywialne wnioski "
+        "i ciekawostki z tekstu.",
+        aliases=("praktyczne_wskazówki", "praktyczne_wskazowki", "wskazówki", "wnioski_i_ciekawostki", "wnioski"),
+        wire_key="p",
+    ),
+    ExtractionField(
+        "topics",
+        "Ogólne obszary tematyczne, których dotyczy fragment.",
+        aliases=("tematy", "obszary_tematyczne"),
+        wire_key="s",
+    ),
+)
+
+
+def render_extraction_fields() -> str:
+    """Sekcja STRUKTURA JSON promptu ekstrakcji - te same klucze, które waliduje KnowledgeGraph."""
+    lines = []
+    for f in EXTRACTION_FIELDS:
+        if f.item_keys:
+            shape = "Lista obiektów { " + ", ".join(f'"{key}": "..."' for key in f.item_keys) + " }"
+        else:
+            shape = "Lista napisów"
+        lines.append(f"- {f.name}: {shape}. {f.instruction}")
+    return "\n".join(lines)
+
+
+def render_compact_fields() -> str:
+    """Sekcja STRUKTURA JSON promptu w formacie kompaktowym (krótkie klucze, pary zamiast obiektów)."""
+    lines = []
+    for f in EXTRACTION_FIELDS:
+        if f.item_keys:
+            main_key, detail_key = f.item_keys
+            shape = f'Lista par ["{main_key}", "{detail_key}"]'
+        else:
+            shape = "Lista napisów"
+        lines.append(f"- {f.wire_key} ({f.name}): {shape}. {f.instruction}")
+    return "\n".join(lines)
+
+
+def _alias_map(names: Dict[str, Tuple[str, ...]]) -> Dict[str, str]:
+    mapping = {}
+    for name, aliases in names.items():
+        for key in (name, *aliases):
+            mapping[key.lower()] = name
+    return mapping
+
+
+_FIELDS_BY_NAME = {f.name: f for f in EXTRACTION_FIELDS}
+_FIELD_ALIASES = _alias_map({f.name: f.aliases for f in EXTRACTION_FIELDS})
+_ITEM_ALIASES = {f.name: _alias_map(f.item_keys) for f in EXTRACTION_FIELDS if f.item_keys}
+
+
+def _normalize_item(field_name: str, item: Any) -> Any:
+    """Element listy: aliasy kluczy obiektu, napis "X: opis" -> obiekt, obiekt -> napis dla list napisów."""
+    keys = _ITEM_ALIASES.get(field_name)
+    if not keys:
+        if isinstance(item, dict):
+            return " - ".join(str(v) for v in item.values() if v)
+        return item if isinstance(item, str) else str(item)
+
+    main_key, detail_key = _FIELDS_BY_NAME[field_name].item_keys
+    if isinstance(item, str):
+        head, sep, tail = item.partition(":")
+        return {main_key: head.strip(), detail_key: tail.strip() if sep else ""}
+    if isinstance(item, dict):
+        return {keys.get(str(k).lower(), k): v for k, v in item.items()}
+    return item
+
+
+def normalize_extraction(data: Any) -> Any:
+    """
+    Mapuje odpowiedź modelu na pola KnowledgeGraph: polskie/alternatywne klucze,
+    pojedyncze wartości zamiast list, napisy zamiast obiektów. Pola z tym samym
+    celem (np. wskazówki + wnioski) są łączone.
+    """
+    if not isinstance(data, dict):
+        return data
+
+    normalized: Dict[str, Any] = {}
+    for key, value in data.items():
+        name = _FIELD_ALIASES.get(str(key).lower())
+        if name is None:
+            normalized.setdefault(key, value)
+            continue
+        if value is None:
+            value = []
+        elif not isinstance(value, list):
+            value = [value]
+        items = [_normalize_item(name, item) for item in value if item is not None]
+        normalized[name] = normalized.get(name, []) + items
+    return normalized
+
 
 class KnowledgeGraph(BaseModel):
-    topics: List[str] = Field(description="Główne tematy poruszone w fragmencie")
-    tools: List[Tool] = Field(description="Wymienione narzędzia i ich zastosowanie")
-    key_concepts: List[KeyConcept] = Field(description="Kluczowe pojęcia i definicje")
-    tips: List[str] = Field(description="Praktyczne porady i wskazówki")
-    
+    # Pola wymagane: schema (ograniczenie dekodowania) zawiera "required", a odpowiedź
+    # bez żadnego z pól ({} albo obce klucze) jest błędem walidacji, nie pustym grafem.
+    # Polskie klucze mapuje _accept_aliases przed sprawdzeniem wymagań.
+    topics: List[str] = Field(..., description="Główne tematy poruszone w fragmencie")
+    tools: List[Tool] = Field(..., description="Wymienione narzędzia i ich zastosowanie")
+    key_concepts: List[KeyConcept] = Field(..., description="Kluczowe pojęcia i definicje")
+    tips: List[str] = Field(..., description="Praktyczne porady i wskazówki")
+
     # ZMIANA: Dodajemy time_range z wartością domyślną None.
     # Dzięki temu stare pliki JSON (bez tego pola) nadal będą działać.
     time_range: Optional[str] = Field(default=None, description="Znacznik czasowy (np. 01:04) lub indeks fragmentu")
+
+    @model_validator(mode="before")
+    @classmethod
+    def _accept_aliases(cls, data: Any) -> Any:
+        return normalize_extraction(data)
+
+
+class CompactKnowledgeGraph(BaseModel):
+    """
+    Format przesyłowy ekstrakcji: jednoliterowe klucze z rejestru (wire_key)
+    i pary [nazwa, opis] zamiast obiektów, więc model generuje mniej tokenów
+    (patrz benchmarks/bench_wire_format.py), a to_graph() odtwarza
+    KnowledgeGraph bezstratnie.
+    """
+    s: List[str] = Field(..., description="topics")
+    t: List[Tuple[str, str]] = Field(..., description="tools: [name, description]")
+    c: List[Tuple[str, str]] = Field(..., description="key_concepts: [term, definition]")
+    p: List[str] = Field(..., description="tips")
+
+    def to_graph(self, time_range: Optional[str] = None) -> KnowledgeGraph:
+        data: Dict[str, Any] = {}
+        for f in EXTRACTION_FIELDS:
+            values = getattr(self, f.wire_key)
+            if f.item_keys:
+                keys = tuple(f.item_keys)
+                values = [dict(zip(keys, pair)) for pair in values]
+            data[f.name] = values
+        return KnowledgeGraph(**data, time_range=time_range)
+
+    @classmethod
+    def from_graph(cls, graph: KnowledgeGraph) -> "CompactKnowledgeGraph":
+        data: Dict[str, Any] = {}
+        for f in EXTRACTION_FIELDS:
+            values = getattr(graph, f.name)
+            if f.item_keys:
+                keys = tuple(f.item_keys)
+                values = [tuple(getattr(item, key) for key in keys) for item in values]
+            data[f.wire_key] = values
+        return cls(**data)
+
+
+class PackedFragment(KnowledgeGraph):
+    id: str = Field(..., description="Identyfikator fragmentu z promptu (F1, F2, ...)")
+
+
+class PackedKnowledgeGraphs(BaseModel):
+    """Odpowiedź na zapytanie z kilkoma fragmentami (chunk_packer) - po jednym grafie na fragment."""
+    fragments: List[PackedFragment] = Field(...)
+
+
+class PackedCompactFragment(CompactKnowledgeGraph):
+    id: str = Field(..., description="Identyfikator fragmentu z promptu (F1, F2, ...)")
+
+
+class PackedCompactKnowledgeGraphs(BaseModel):
+    """Pakiet fragmentów w formacie kompaktowym (EXTRACTION_WIRE_FORMAT="compact")."""
+    fragments: List[PackedCompactFragment] = Field(...)
+
+    def to_packed(self) -> PackedKnowledgeGraphs:
+        """Odtwarza PackedKnowledgeGraphs (pełne klucze) - dalej jak odpowiedź w formacie JSON."""
+        return PackedKnowledgeGraphs(fragments=[
+            PackedFragment(id=f.id, **f.to_graph().model_dump(exclude={"time_range"})) for f in self.fragments
+        ])
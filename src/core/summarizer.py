@@ -1,33 +1,32 @@
 import requests
 import os
-from src.utils.config import OLLAMA_URL
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.core.llm_cache import get_llm_cache
+from src.core.ollama_client import get_ollama_client
+from src.utils.config import OLLAMA_URL, OVERLAP, SUMMARY_MAX_WORKERS
+from src.utils.text_processing import smart_split_text
+
+# Separator streszczeń cząstkowych w etapie REDUCE
+SUMMARY_SEPARATOR = "\n\n"
+
 
 class Summarizer:
-    def __init__(self, logger, stop_event, progress_callback):
+    def __init__(self, logger, stop_event, progress_callback, max_workers=SUMMARY_MAX_WORKERS):
         self.logger = logger
         self.stop_event = stop_event
         self.progress_callback = progress_callback
+        self.max_workers = max(1, max_workers)
+        self.cache = get_llm_cache()
+        # Współdzielony klient: pula połączeń keep-alive + cache listy modeli (TTL)
+        self.client = get_ollama_client(OLLAMA_URL)
 
     def check_ollama_status(self):
-        try:
-            response = requests.get(f"{OLLAMA_URL}/api/tags", timeout=2)
-            if response.status_code == 200:
-                models = response.json().get("models", [])
-                if models:
-                    return True, f"Dostępny ({len(models)} modeli)"
-                return True, "Dostępny (brak modeli)"
-            return False, "Nie odpowiada"
-        except requests.exceptions.RequestException:
-            return False, "Niedostępny"
+        return self.client.status()
 
     def get_ollama_models(self):
         try:
-            response = requests.get(f"{OLLAMA_URL}/api/tags", timeout=2)
-            if response.status_code == 200:
-                models = [m["name"] for m in response.json().get("models", [])]
-                return models
-            return []
-        except:
+            return self.client.list_models(timeout=2)
+        except requests.exceptions.RequestException:
             return []
 
     def summarize_text(self, text, model_name=None, max_chars=10000, style="Zwięzłe (3 punkty)"):
@@ -35,77 +34,200 @@ class Summarizer:
         return self._run_summarization(text[:max_chars], model_name, style)
 
     def summarize_from_file(self, file_path, model_name=None, max_chars=10000, style="Zwięzłe (3 punkty)"):
+        """
+        Podsumowuje cały plik. Teksty dłuższe niż max_chars są streszczane
+        metodą map-reduce (fragmenty równolegle, potem synteza w wybranym stylu)
+        zamiast obcinania do pierwszych max_chars znaków.
+        """
         if not file_path or not os.path.exists(file_path):
             self.logger.log("Brak pliku do podsumowania.")
             return None
-        
+
         try:
             with open(file_path, "r", encoding="utf-8") as f:
-                # Read only needed amount
-                text = f.read(max_chars)
-                if f.read(1): # Check if there is more
-                    self.logger.log(f"Tekst z pliku został obcięty do {max_chars} znaków")
-                return self._run_summarization(text, model_name, style)
+                text = f.read()
         except Exception as e:
             self.logger.log(f"Błąd odczytu pliku: {e}")
             return None
 
+        if len(text) <= max_chars:
+            return self._run_summarization(text, model_name, style)
+        return self._run_map_reduce(text, model_name, max_chars, style)
+
+    # --- Wspólne elementy ---
+
+    def _select_model(self, model_name):
+        """Zwraca nazwę modelu dostępnego w Ollama (lub None, z logiem przyczyny)."""
+        try:
+            models = self.client.list_models(timeout=5)
+        except requests.exceptions.HTTPError:
+            self.logger.log("Ollama nie odpowiada poprawnie.")
+            return None
+
+        if not models:
+            self.logger.log("Brak modeli w Ollama.")
+            return None
+
+        if model_name and model_name in models:
+            return model_name
+
+        selected_model = models[0]
+        for m in models:
+            if "llama3" in m or "mistral" in m:
+                selected_model = m
+                break
+        return selected_model
+
+    @staticmethod
+    def _style_prompt(style):
+        if "Krótkie" in style:
+            return "Napisz krótkie streszczenie tego tekstu w jednym akapicie (po polsku)"
+        elif "Szczegółowe" in style:
+            return "Sporządź szczegółowe podsumowanie, uwzględniając najważniejsze wątki i detale (po polsku)"
+        return "Stwórz zwięzłe podsumowanie w 3 punktach (po polsku)"
+
+    def _generate(self, model, prompt):
+        """Pojedyncze wywołanie /api/generate przez współdzielonego klienta, z cache odpowiedzi."""
+        key = self.cache.make_key(model, prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            result = self.client.generate(model, prompt, timeout=300).get("response")
+        except requests.exceptions.HTTPError as e:
+            self.logger.log(f"Błąd Ollama: {e.response.status_code if e.response is not None else e}")
+            return None
+
+        self.cache.put(key, result)
+        return result
+
+    def _generate_many(self, model, prompts, progress_from, progress_to):
+        """Równoległe wywołania _generate; wyniki w kolejności promptów."""
+        results = [None] * len(prompts)
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self._generate, model, prompt): i for i, prompt in enumerate(prompts)}
+            for future in as_completed(futures):
+                if self.stop_event.is_set():
+                    for f in futures:
+                        f.cancel()
+                    raise InterruptedError("Operacja anulowana przez użytkownika")
+
+                results[futures[future]] = future.result()
+                done += 1
+                self.progress_callback(progress_from + (progress_to - progress_from) * done / len(prompts), "summarizing")
+        return results
+
+    @staticmethod
+    def _group_summaries(summaries, max_chars):
+        """Pakuje streszczenia cząstkowe w grupy do max_chars znaków."""
+        groups, current, size = [], [], 0
+        for summary in summaries:
+            if current and size + len(summary) + len(SUMMARY_SEPARATOR) > max_chars:
+                groups.append(current)
+                current, size = [], 0
+            current.append(summary)
+            size += len(summary) + len(SUMMARY_SEPARATOR)
+        if current:
+            groups.append(current)
+        return groups
+
+    # --- Tryby podsumowania ---
+
     def _run_summarization(self, text_to_summarize, model_name, style):
         if self.stop_event.is_set():
             raise InterruptedError("Operacja anulowana przez użytkownika")
-        
+
         try:
             self.logger.log("Próba połączenia z Ollama...")
             self.progress_callback(0, "summarizing")
 
-            tags_response = requests.get(f"{OLLAMA_URL}/api/tags", timeout=5)
-            if tags_response.status_code != 200:
-                self.logger.log("Ollama nie odpowiada poprawnie.")
+            selected_model = self._select_model(model_name)
+            if not selected_model:
                 return None
 
-            models = [m["name"] for m in tags_response.json().get("models", [])]
-            if not models:
-                self.logger.log("Brak modeli w Ollama.")
-                return None
-
-            if model_name and model_name in models:
-                selected_model = model_name
-            else:
-                selected_model = models[0]
-                for m in models:
-                    if "llama3" in m or "mistral" in m:
-                        selected_model = m
-                        break
-            
             self.logger.log(f"Używam modelu: {selected_model} do podsumowania.")
             self.progress_callback(20, "summarizing")
 
-            if "Krótkie" in style:
-                prompt_text = "Napisz krótkie streszczenie tego tekstu w jednym akapicie (po polsku)"
-            elif "Szczegółowe" in style:
-                prompt_text = "Sporządź szczegółowe podsumowanie, uwzględniając najważniejsze wątki i detale (po polsku)"
-            else:
-                prompt_text = "Stwórz zwięzłe podsumowanie w 3 punktach (po polsku)"
+            prompt = f"{self._style_prompt(style)} poniższego tekstu:\n\n{text_to_summarize}"
+            result = self._generate(selected_model, prompt)
 
-            prompt = f"{prompt_text} poniższego tekstu:\n\n{text_to_summarize}"
+            self.progress_callback(100, "summarizing")
+            return result
 
-            response = requests.post(
-                f"{OLLAMA_URL}/api/generate",
-                json={"model": selected_model, "prompt": prompt, "stream": False},
-                timeout=300,
-            )
+        except requests.exceptions.Timeout:
+            self.logger.log("Timeout przy połączeniu z Ollama.")
+            return None
+        except Exception as e:
+            self.logger.log(f"Nie udało się połączyć z Ollama: {e}")
+            return None
 
-            self.progress_callback(100, "summarizing")
+    def _run_map_reduce(self, text, model_name, max_chars, style):
+        """
+        MAP: fragmenty (po max_chars) streszczane równolegle promptem niezależnym od stylu,
+        więc zmiana stylu trafia w cache i kosztuje tylko etap REDUCE.
+        REDUCE: streszczenia łączone grupami, aż zmieszczą się w max_chars,
+        potem jedno wywołanie w wybranym stylu.
+        """
+        if self.stop_event.is_set():
+            raise InterruptedError("Operacja anulowana przez użytkownika")
 
-            if response.status_code == 200:
-                return response.json().get("response")
-            else:
-                self.logger.log(f"Błąd Ollama: {response.status_code}")
+        try:
+            self.logger.log("Próba połączenia z Ollama...")
+            self.progress_callback(0, "summarizing")
+
+            selected_model = self._select_model(model_name)
+            if not selected_model:
                 return None
 
+            chunks = smart_split_text(text, chunk_size=max_chars, chunk_overlap=OVERLAP)
+            self.logger.log(
+                f"Używam modelu: {selected_model}. Długi tekst ({len(text)} znaków) - "
+                f"map-reduce na {len(chunks)} fragmentach (równolegle: {self.max_workers})."
+            )
+            self.progress_callback(5, "summarizing")
+
+            # MAP
+            map_prompts = [
+                f"Streść najważniejsze informacje z fragmentu {i + 1}/{len(chunks)} transkrypcji "
+                f"(po polsku, zachowaj fakty, nazwy i liczby):\n\n{chunk}"
+                for i, chunk in enumerate(chunks)
+            ]
+            summaries = [s for s in self._generate_many(selected_model, map_prompts, 5, 75) if s]
+            if not summaries:
+                self.logger.log("Nie udało się streścić żadnego fragmentu.")
+                return None
+
+            # Pośrednie REDUCE (tylko gdy streszczenia nadal się nie mieszczą)
+            rounds = 0
+            while len(SUMMARY_SEPARATOR.join(summaries)) > max_chars and rounds < 5:
+                rounds += 1
+                groups = self._group_summaries(summaries, max_chars)
+                self.logger.log(f"Scalanie streszczeń (runda {rounds}): {len(summaries)} -> {len(groups)}")
+                merge_prompts = [
+                    "Połącz poniższe streszczenia kolejnych fragmentów w jedno, usuwając powtórzenia "
+                    f"(po polsku):\n\n{SUMMARY_SEPARATOR.join(group)}"
+                    for group in groups
+                ]
+                summaries = [s for s in self._generate_many(selected_model, merge_prompts, 75, 85) if s]
+
+            # REDUCE w wybranym stylu
+            self.progress_callback(90, "summarizing")
+            prompt = (
+                f"{self._style_prompt(style)} całego nagrania na podstawie streszczeń "
+                f"jego kolejnych fragmentów:\n\n{SUMMARY_SEPARATOR.join(summaries)}"
+            )
+            result = self._generate(selected_model, prompt)
+
+            self.progress_callback(100, "summarizing")
+            return result
+
         except requests.exceptions.Timeout:
             self.logger.log("Timeout przy połączeniu z Ollama.")
             return None
+        except InterruptedError:
+            raise
         except Exception as e:
             self.logger.log(f"Nie udało się połączyć z Ollama: {e}")
             return None
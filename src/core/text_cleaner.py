@@ -1,15 +1,276 @@
+import io
 import re
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+# Znaczniki czasu Whispera: [01:09 -> 01:22]
+TIMESTAMP_PATTERN = re.compile(r'\[(\d{2,3}:\d{2})\s->\s(\d{2,3}:\d{2})\]')
+
+# Słowniki wtrąceń (dostosuj do speakera / języka)
+FILLER_LEXICONS = {
+    "pl": ("yhh", "yyy", "no wiesz"),
+    "en": ("uh", "um", "you know"),
+}
+DEFAULT_LANGUAGE = "pl"
+
+# Ile znaków zbieramy przed przetworzeniem bufora wtrąceń
+FLUSH_SIZE = 64 * 1024
+
+
+class TranscriptTimeline:
+    """
+    Indeks boczny: offset w oczyszczonym tekście -> czas segmentu Whispera.
+
+    Kotwice są posortowane po offsecie; segment obowiązuje od swojej kotwicy
+    do kotwicy następnej. Fragment tekstu dostaje zakres od startu pierwszego
+    do końca ostatniego segmentu, który obejmuje.
+    """
+
+    def __init__(self, anchors: Sequence[Tuple[int, str, str]] = ()):
+        """
+        Args:
+            anchors: Lista (offset, start, end) posortowana po offsecie.
+        """
+        self.offsets = [a[0] for a in anchors]
+        self.starts = [a[1] for a in anchors]
+        self.ends = [a[2] for a in anchors]
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def span(self, start: int, end: int) -> Optional[Tuple[str, str]]:
+        """Zwraca (start, koniec) segmentów pokrywających znaki [start, end) lub None."""
+        if not self.offsets:
+            return None
+        first = max(bisect_right(self.offsets, start) - 1, 0)
+        last = max(bisect_left(self.offsets, max(end, start + 1)) - 1, first)
+        return self.starts[first], self.ends[last]
+
+    def time_range(self, start: int, end: int) -> Optional[str]:
+        """Zakres czasu w formacie znaczników transkrypcji: "MM:SS -> MM:SS"."""
+        span = self.span(start, end)
+        return f"{span[0]} -> {span[1]}" if span else None
+
+
+class TranscriptCleaner:
+    """
+    Jednoprzebiegowe czyszczenie transkrypcji (blokami pełnych linii).
+
+    - usuwa znaczniki czasu,
+    - usuwa puste linie i skleja resztę pojedynczą spacją,
+    - usuwa wtrącenia ze skompilowanego słownika (także kilka pod rząd).
+
+    Działa strumieniowo na uchwytach plików, więc nie trzyma całego tekstu w RAM.
+    """
+
+    def __init__(self, language: str = DEFAULT_LANGUAGE, fillers: Optional[Sequence[str]] = None,
+                 extra_fillers: Sequence[str] = (), flush_size: int = FLUSH_SIZE):
+        """
+        Args:
+            language: Klucz słownika w FILLER_LEXICONS.
+            fillers: Własny słownik wtrąceń (zastępuje słownik języka).
+            extra_fillers: Dodatkowe wtrącenia (np. charakterystyczne dla speakera).
+            flush_size: Rozmiar bufora (w znakach) przetwarzanego naraz.
+        """
+        lexicon = list(fillers) if fillers is not None else list(FILLER_LEXICONS.get(language, ()))
+        lexicon.extend(extra_fillers)
+        self.fillers = tuple(dict.fromkeys(f for f in lexicon if f))
+        self.flush_size = flush_size
+
+        if self.fillers:
+            alternation = "|".join(re.escape(f) for f in self.fillers)
+            # Lookahead nie konsumuje spacji po wtrąceniu, więc sąsiednie wtrącenia też znikają
+            self._filler_re = re.compile(rf'\s(?:{alternation})(?=\s)', re.IGNORECASE)
+            # Tyle znaków musi być za pozycją, żeby dopasowanie było rozstrzygnięte
+            self._lookahead = max(len(f) for f in self.fillers) + 2
+        else:
+            self._filler_re = None
+            self._lookahead = 0
+
+    def _spans(self, buf: str, cut: int) -> bool:
+        """Czy jakieś dopasowanie wtrącenia przechodzi przez pozycję `cut`."""
+        for pos in range(max(0, cut - self._lookahead), cut):
+            match = self._filler_re.match(buf, pos)
+            if match and match.end() > cut:
+                return True
+        return False
+
+    def _flush(self, buf: str, final: bool) -> Tuple[str, str]:
+        """
+        Usuwa wtrącenia z bufora. Zwraca (gotowy_tekst, niedokończona_końcówka).
+
+        Bufor jest cięty na spacji, przez którą nie przechodzi żadne dopasowanie,
+        więc re.sub na "głowie" daje ten sam wynik co jeden przebieg po całym tekście.
+        """
+        if self._filler_re is None:
+            return buf, ""
+        if final:
+            return self._filler_re.sub('', buf), ""
+
+        if len(buf) <= self._lookahead:
+            return "", buf
+        cut = buf.rfind(' ', 0, len(buf) - self._lookahead)
+        while cut > 0 and self._spans(buf, cut):
+            cut = buf.rfind(' ', 0, cut)
+        if cut <= 0:
+            return "", buf
+
+        # Spacja na pozycji `cut` zostaje w głowie jako lookahead i nigdy nie jest konsumowana
+        head = self._filler_re.sub('', buf[:cut + 1])
+        return head[:-1], buf[cut:]
+
+    def _iter_clean_blocks(self, blocks: Iterable[str]) -> Iterator[str]:
+        """
+        Rdzeń czyszczenia. Każdy blok to ciąg pełnych linii rozdzielonych '\n'
+        (znaczniki czasu i strip/join wykonują się na całym bloku naraz).
+        """
+        carry = ""
+        started = False
+
+        for block in blocks:
+            block = TIMESTAMP_PATTERN.sub('', block)
+            joined = ' '.join(filter(None, map(str.strip, block.split('\n'))))
+            if not joined:
+                continue
+
+            if started:
+                joined = ' ' + joined
+            started = True
+
+            out, carry = self._flush(carry + joined, final=False)
+            if out:
+                yield out
+
+        out, _ = self._flush(carry, final=True)
+        if out:
+            yield out
+
+    def _group_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """Skleja linie w bloki po ok. flush_size znaków."""
+        block: List[str] = []
+        size = 0
+        for line in lines:
+            block.append(line)
+            size += len(line)
+            if size >= self.flush_size:
+                yield '\n'.join(block)
+                block, size = [], 0
+        if block:
+            yield '\n'.join(block)
+
+    def _read_blocks(self, handle: TextIO) -> Iterator[str]:
+        """Czyta uchwyt pliku blokami zakończonymi na granicy linii."""
+        rest = ""
+        while True:
+            data = handle.read(self.flush_size)
+            if not data:
+                break
+            data = rest + data
+            cut = data.rfind('\n')
+            if cut == -1:
+                rest = data
+                continue
+            rest = data[cut + 1:]
+            yield data[:cut]
+        if rest:
+            yield rest
+
+    def iter_clean(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Czyści tekst podany jako iterator linii.
+        Zwraca kolejne fragmenty wyniku - ich konkatenacja to oczyszczony tekst.
+        """
+        return self._iter_clean_blocks(self._group_lines(lines))
+
+    def clean(self, text: str) -> str:
+        """Czyści cały tekst naraz."""
+        return "".join(self._iter_clean_blocks(self._read_blocks(io.StringIO(text))))
+
+    def clean_with_timeline(self, text: str) -> Tuple[str, TranscriptTimeline]:
+        """
+        Czyści tekst jak clean(), zapamiętując gdzie w wyniku zaczyna się każdy segment.
+
+        Offsety kotwic są przesuwane o długość usuniętych przed nimi wtrąceń,
+        więc fragmenty oczyszczonego tekstu można mapować na czas bez ponownego
+        parsowania znaczników.
+        """
+        parts: List[str] = []
+        anchors: List[Tuple[int, str, str]] = []
+        pos = 0
+        for line in text.split('\n'):
+            match = TIMESTAMP_PATTERN.search(line)
+            stripped = TIMESTAMP_PATTERN.sub('', line).strip()
+            if not stripped:
+                continue
+            if parts:
+                pos += 1  # spacja sklejająca linie
+            if match:
+                anchors.append((pos, match.group(1), match.group(2)))
+            parts.append(stripped)
+            pos += len(stripped)
+
+        joined = ' '.join(parts)
+        if self._filler_re is None:
+            return joined, TranscriptTimeline(anchors)
+
+        # Usunięte przedziały (te same dopasowania co w re.sub) i skumulowana długość usunięć
+        del_starts: List[int] = []
+        del_ends: List[int] = []
+        removed: List[int] = []
+        total = 0
+        for m in self._filler_re.finditer(joined):
+            del_starts.append(m.start())
+            del_ends.append(m.end())
+            total += m.end() - m.start()
+            removed.append(total)
+
+        def to_clean(offset: int) -> int:
+            i = bisect_right(del_starts, offset) - 1
+            if i < 0:
+                return offset
+            if offset < del_ends[i]:
+                # Kotwica wewnątrz usuniętego wtrącenia -> początek usunięcia
+                return del_starts[i] - (removed[i - 1] if i else 0)
+            return offset - removed[i]
+
+        cleaned = self._filler_re.sub('', joined)
+        shifted = []
+        for offset, start, end in anchors:
+            offset = to_clean(offset)
+            # Po usunięciu wtrącenia z początku segmentu kotwica trafia na spację
+            while offset < len(cleaned) and cleaned[offset] == ' ':
+                offset += 1
+            shifted.append((offset, start, end))
+        return cleaned, TranscriptTimeline(shifted)
+
+    def clean_stream(self, handle: TextIO, out: TextIO) -> int:
+        """
+        Czyści plik blokami pełnych linii i zapisuje wynik do `out`.
+
+        Returns:
+            Liczba zapisanych znaków.
+        """
+        written = 0
+        for piece in self._iter_clean_blocks(self._read_blocks(handle)):
+            out.write(piece)
+            written += len(piece)
+        return written
+
+    def clean_file(self, input_path: str, output_path: str) -> int:
+        """Czyści plik transkrypcji strumieniowo (bez wczytywania całości do RAM)."""
+        with open(input_path, 'r', encoding='utf-8') as src, \
+                open(output_path, 'w', encoding='utf-8') as dst:
+            return self.clean_stream(src, dst)
+
+
+_default_cleaner = TranscriptCleaner()
+
 
 def clean_transcript(text: str) -> str:
     """Usuwa metadane, timestampy i szum z transkrypcji."""
-    # 1. Usuwanie znaczników czasu [01:09 -> 01:22]
-    text = re.sub(r'\[\d{2,3}:\d{2}\s->\s\d{2,3}:\d{2}\]', '', text)
-    
-    # 2. Usuwanie wielokrotnych spacji i pustych linii
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-    text = ' '.join(lines)
-    
-    # 3. Opcjonalnie: Usuwanie powtarzalnych wtrąceń (dostosuj do speakera)
-    text = re.sub(r'\s(yhh|yyy|no wiesz)\s', ' ', text, flags=re.IGNORECASE)
-    
-    return text
+    return _default_cleaner.clean(text)
+
+
+def clean_transcript_with_timeline(text: str) -> Tuple[str, TranscriptTimeline]:
+    """Jak clean_transcript, ale zwraca też indeks offset -> czas segmentu."""
+    return _default_cleaner.clean_with_timeline(text)
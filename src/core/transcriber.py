@@ -1,32 +1,48 @@
 import os
 import json
-import torch
-from faster_whisper import WhisperModel
-from src.utils.config import DEVICE, COMPUTE_TYPE
+from src.utils.config import AUDIO_CACHE_ENABLED, get_device, get_compute_type
+from src.core.audio_prep import load_audio
 from src.utils.helpers import format_time, format_srt_time, format_vtt_time
 from src.core.gpu_manager import clear_gpu_memory
 
 class Transcriber:
-    def __init__(self, logger, stop_event, progress_callback):
+    def __init__(self, logger, stop_event, progress_callback, device_index=0, cpu_threads=0, num_workers=1):
+        """
+        Args:
+            device_index: Numer GPU (przy wielu kartach - patrz transcription_pool).
+            cpu_threads: Wątki CTranslate2 na CPU (0 = domyślnie).
+            num_workers: Równoległe transkrypcje w obrębie jednego modelu.
+        """
         self.logger = logger
         self.stop_event = stop_event
         self.progress_callback = progress_callback
+        self.device_index = device_index
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
         self.current_model = None
+        self._model_key = None
+        # True = model Whispera zostaje w pamięci między plikami (tryb wsadowy CLI)
+        self.keep_model = False
 
     def transcribe_video(self, filename, language, model_size):
-        """Transkrybuje plik używając Whisper (Generator)"""
+        """Transkrybuje plik (ścieżka lub tablica 16 kHz) używając Whisper (Generator)"""
         if self.stop_event.is_set():
             raise InterruptedError("Operacja anulowana przez użytkownika")
         
         self.logger.log("Ładowanie modelu Whisper...")
 
-        if DEVICE == "cuda":
-            gpu_name = torch.cuda.get_device_name(0)
-            self.logger.log(f"Używam GPU: {gpu_name}")
+        # Ciężkie importy dopiero przy faktycznej transkrypcji
+        from faster_whisper import WhisperModel
+
+        device = get_device()
+        if device == "cuda":
+            import torch
+            gpu_name = torch.cuda.get_device_name(self.device_index)
+            self.logger.log(f"Używam GPU {self.device_index}: {gpu_name}")
         else:
             self.logger.log("UWAGA: GPU nie wykryte! Używam CPU (będzie wolniej).")
 
-        self.progress_callback(0, f"Wczytywanie modelu {model_size} do pamięci ({DEVICE})...")
+        self.progress_callback(0, f"Wczytywanie modelu {model_size} do pamięci ({device})...")
 
         try:
             models_dir = os.path.join(os.getcwd(), "models")
@@ -34,20 +50,42 @@ class Transcriber:
                 os.makedirs(models_dir, exist_ok=True)
             self.logger.log(f"Katalog z modelami: {models_dir}")
 
-            model = WhisperModel(model_size, device=DEVICE, compute_type=COMPUTE_TYPE, download_root=models_dir)
-            self.current_model = model
+            model_key = (model_size, device, self.device_index, get_compute_type())
+            if self.current_model is not None and self._model_key == model_key:
+                model = self.current_model  # ciepły model z poprzedniego pliku
+            else:
+                model = WhisperModel(
+                    model_size,
+                    device=device,
+                    device_index=self.device_index,
+                    compute_type=get_compute_type(),
+                    cpu_threads=self.cpu_threads,
+                    num_workers=self.num_workers,
+                    download_root=models_dir,
+                )
+                self.current_model = model
+                self._model_key = model_key
         except Exception as e:
             raise Exception(f"Nie można załadować modelu Whisper: {str(e)}")
 
         if self.stop_event.is_set():
             raise InterruptedError("Operacja anulowana przez użytkownika")
 
+        # Plik dekodowany raz do 16 kHz mono PCM i trzymany w cache (kolejne transkrypcje
+        # tego samego nagrania, np. innym modelem, nie dekodują go ponownie)
+        audio = filename
+        if isinstance(filename, str) and AUDIO_CACHE_ENABLED:
+            try:
+                audio = load_audio(filename)
+            except Exception as e:
+                self.logger.log(f"Cache audio niedostępny ({e}) - dekodowanie przez Whisper.")
+
         self.logger.log(f"Rozpoczynam transkrypcję (język: {language or 'auto'})...")
 
         try:
             # Faster-Whisper transcribe returns (segments_generator, info)
             segments, info = model.transcribe(
-                filename,
+                audio,
                 language=language,
                 beam_size=5,
                 vad_filter=True,
@@ -92,11 +130,17 @@ class Transcriber:
             output_file = txt_baseline
 
         # Cleanup memory after consumption
-        self.current_model = None
-        clear_gpu_memory()
+        if not self.keep_model:
+            self.release_model()
 
         return output_file, json_file
 
+    def release_model(self):
+        """Zwalnia model Whispera i czyści VRAM."""
+        self.current_model = None
+        self._model_key = None
+        clear_gpu_memory()
+
     def _save_json(self, segments, info, filename, language):
         """Konsumuje generator Whispera i zapisuje do JSON. Zwraca listę segmentów."""
         segments_list = []
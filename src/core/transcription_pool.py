@@ -0,0 +1,403 @@
+"""
+Transcription Pool - równoległa transkrypcja wielu plików.
+
+Pliki są rozdzielane między procesy robocze:
+- GPU: jeden proces na kartę (device_index 0..N-1, opcjonalnie kilka na kartę),
+- CPU: kilka procesów, każdy z własnym modelem i `cpu_threads` dobranymi tak,
+  żeby razem wykorzystać wszystkie rdzenie.
+
+Każdy proces ładuje model Whispera raz i trzyma go między plikami. Pliki są
+przydzielane dynamicznie (wolny proces bierze następny plik), więc długie
+nagrania nie blokują krótkich. Wyniki wracają w kolejności wejścia, a postęp
+wszystkich procesów jest sumowany do jednego `progress_callback`.
+
+Długie nagrania (transcribe_long) są dzielone na okna w przerwach ciszy
+(src/core/long_audio.py), a okna transkrybowane równolegle i sklejane.
+
+Użycie:
+    pool = TranscriptionPool(logger, stop_event, progress_callback, model_size="large-v3")
+    results = pool.transcribe_files(files, language="pl")
+    for r in results:
+        print(r["file"], r["output"] or r["error"])
+
+    with TranscriptionPool(...) as pool:  # procesy i modele ciepłe między wywołaniami
+        output_file, json_file = pool.transcribe_long("wyklad_5h.mp3", language="pl")
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.core.audio_prep import SAMPLE_RATE, open_pcm, prepare_audio
+from src.core.long_audio import AudioWindow, plan_windows, speech_spans, stitch_segments
+from src.utils.config import (
+    DEFAULT_MODEL_SIZE, LONG_AUDIO_WINDOW, TRANSCRIBE_WORKERS_PER_GPU, TRANSCRIBE_CPU_THREADS, get_device,
+)
+
+# Co ile sekund wątki dyspozytorów sprawdzają stop_event
+POLL_INTERVAL = 0.5
+
+
+@dataclass
+class WorkerSpec:
+    """Konfiguracja jednego procesu roboczego."""
+    device: str
+    device_index: int = 0
+    cpu_threads: int = 0
+    num_workers: int = 1
+
+    @property
+    def label(self) -> str:
+        if self.device == "cuda":
+            return f"GPU {self.device_index}"
+        return f"CPU x{self.cpu_threads}"
+
+
+def plan_workers(max_workers: Optional[int] = None, device: Optional[str] = None,
+                 gpu_count: Optional[int] = None, cpu_count: Optional[int] = None,
+                 workers_per_gpu: int = TRANSCRIBE_WORKERS_PER_GPU,
+                 cpu_threads: int = TRANSCRIBE_CPU_THREADS) -> List[WorkerSpec]:
+    """
+    Dobiera procesy robocze do sprzętu.
+
+    Args:
+        max_workers: Górny limit procesów (None = tyle, ile pozwala sprzęt).
+        device: "cuda"/"cpu" (None = wykrycie).
+        gpu_count: Liczba GPU (None = wykrycie).
+        cpu_count: Liczba rdzeni (None = os.cpu_count()).
+        workers_per_gpu: Procesy na kartę (więcej niż 1 tylko przy zapasie VRAM).
+        cpu_threads: Docelowa liczba wątków na proces CPU.
+    """
+    device = device or get_device()
+    cpu_count = cpu_count or os.cpu_count() or 1
+
+    if device == "cuda":
+        if gpu_count is None:
+            from src.core.gpu_manager import get_cuda_device_count
+            gpu_count = get_cuda_device_count()
+        if gpu_count > 0:
+            total = gpu_count * max(1, workers_per_gpu)
+            if max_workers:
+                total = min(total, max_workers)
+            return [WorkerSpec("cuda", device_index=i % gpu_count) for i in range(total)]
+
+    # CPU: procesy po `cpu_threads` wątków, razem nie więcej niż rdzeni
+    processes = max(1, cpu_count // max(1, cpu_threads))
+    if max_workers:
+        processes = min(processes, max_workers)
+    threads = max(1, cpu_count // processes)
+    return [WorkerSpec("cpu", cpu_threads=threads) for _ in range(processes)]
+
+
+# ============================================================================
+# PROCES ROBOCZY
+# ============================================================================
+
+_worker: Dict = {}
+
+
+class _QueueLogger:
+    """Logger procesu roboczego - przekazuje komunikaty do procesu głównego."""
+
+    def __init__(self, events, label):
+        self.events = events
+        self.label = label
+
+    def log(self, message):
+        self.events.put(("log", f"[{self.label}] {message}"))
+
+
+def _init_worker(spec: WorkerSpec, model_size: str, events, stop_event):
+    """Inicjalizator procesu: konfiguracja i kanały komunikacji (model ładowany przy pierwszym pliku)."""
+    if spec.device == "cpu":
+        os.environ["TRANSKRYPCJE_DEVICE"] = "cpu"
+    _worker.update(spec=spec, model_size=model_size, events=events, stop_event=stop_event, transcriber=None)
+
+
+def _get_transcriber():
+    """Transcriber procesu roboczego (model Whispera ładowany raz na proces)."""
+    from src.core.transcriber import Transcriber
+
+    transcriber = _worker["transcriber"]
+    if transcriber is None:
+        spec = _worker["spec"]
+        transcriber = Transcriber(
+            _QueueLogger(_worker["events"], spec.label),
+            _worker["stop_event"],
+            lambda percent, stage="": None,
+            device_index=spec.device_index,
+            cpu_threads=spec.cpu_threads,
+            num_workers=spec.num_workers,
+        )
+        transcriber.keep_model = True
+        _worker["transcriber"] = transcriber
+    return transcriber
+
+
+def _transcribe_file(index: int, path: str, language: Optional[str], output_format: str):
+    """Transkrybuje jeden plik w procesie roboczym. Zwraca (output_file, json_file)."""
+    events = _worker["events"]
+    transcriber = _get_transcriber()
+    transcriber.progress_callback = lambda percent, stage="": events.put(("progress", index, percent))
+    segments, info = transcriber.transcribe_video(path, language, _worker["model_size"])
+    result = transcriber.save_transcription(segments, info, path, output_format, language)
+    events.put(("progress", index, 100.0))
+    return result
+
+
+def _transcribe_window(index: int, item: Tuple[str, AudioWindow], language: Optional[str]):
+    """
+    Transkrybuje okno nagrania (PCM z cache audio_prep, współdzielony przez memmap).
+    Zwraca (segmenty z czasami względem początku okna, język, pewność języka).
+    """
+    import numpy as np
+
+    pcm_path, window = item
+    events = _worker["events"]
+    stop_event = _worker["stop_event"]
+    audio = open_pcm(pcm_path)
+    chunk = np.ascontiguousarray(audio[int(window.start * SAMPLE_RATE):int(window.end * SAMPLE_RATE)])
+
+    segments, info = _get_transcriber().transcribe_video(chunk, language, _worker["model_size"])
+    length = max(window.end - window.start, 1e-6)
+    result = []
+    for segment in segments:
+        if stop_event.is_set():
+            raise InterruptedError("Anulowano")
+        result.append({"start": segment.start, "end": segment.end, "text": segment.text.strip()})
+        events.put(("progress", index, min(100.0, segment.end / length * 100)))
+
+    events.put(("progress", index, 100.0))
+    return result, info.language, info.language_probability
+
+
+# ============================================================================
+# PULA
+# ============================================================================
+
+class TranscriptionPool:
+    """
+    Rozdziela pliki (lub okna długiego nagrania) między procesy robocze
+    i zbiera wyniki. Użyta jako context manager trzyma procesy (i modele)
+    między wywołaniami; bez niego każde wywołanie uruchamia je od nowa.
+    """
+
+    def __init__(self, logger, stop_event, progress_callback, model_size: str = DEFAULT_MODEL_SIZE,
+                 specs: Optional[List[WorkerSpec]] = None, max_workers: Optional[int] = None,
+                 task: Callable = _transcribe_file):
+        """
+        Args:
+            specs: Gotowy plan procesów (None = plan_workers(max_workers)).
+            task: Funkcja wykonywana w procesie roboczym dla pliku (picklowalna, jak _transcribe_file).
+        """
+        self.logger = logger
+        self.stop_event = stop_event
+        self.progress_callback = progress_callback
+        self.model_size = model_size
+        self.specs = specs or plan_workers(max_workers)
+        self.task = task
+        self._executors = None
+        self._progress: List[float] = []
+
+    # --- Cykl życia procesów ---
+
+    def __enter__(self):
+        self._open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._close()
+        return False
+
+    def _open(self):
+        ctx = multiprocessing.get_context("spawn")  # CUDA nie działa w procesach z fork
+        self._manager = ctx.Manager()
+        self._events = self._manager.Queue()
+        self._shared_stop = self._manager.Event()
+        self._listener = threading.Thread(target=self._listen, daemon=True)
+        self._listener.start()
+        self._executors = [
+            ProcessPoolExecutor(max_workers=1, mp_context=ctx, initializer=_init_worker,
+                                initargs=(spec, self.model_size, self._events, self._shared_stop))
+            for spec in self.specs
+        ]
+
+    def _close(self):
+        if self._executors is None:
+            return
+        for executor in self._executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+        self._events.put(None)
+        self._listener.join()
+        self._manager.shutdown()
+        self._executors = None
+
+    @contextmanager
+    def _session(self):
+        """Otwiera procesy na czas wywołania, chyba że pula jest już otwarta."""
+        opened_here = self._executors is None
+        if opened_here:
+            self._open()
+        try:
+            yield
+        finally:
+            if opened_here:
+                self._close()
+
+    # --- API ---
+
+    def transcribe_files(self, files: List[str], language: Optional[str] = None,
+                         output_format: str = "txt") -> List[Dict]:
+        """
+        Transkrybuje pliki równolegle.
+
+        Returns:
+            Lista {"file", "output", "json", "error"} w kolejności `files`.
+        """
+        results: List[Dict] = [
+            {"file": path, "output": None, "json": None, "error": None} for path in files
+        ]
+        if not files:
+            return results
+
+        self.logger.log(
+            f"[POOL] {len(files)} plików, {min(len(files), len(self.specs))} proces(ów): "
+            f"{', '.join(s.label for s in self.specs[:len(files)])}"
+        )
+        with self._session():
+            self._progress = [0.0] * len(files)
+            outcomes = self._run(self.task, files, [os.path.basename(f) for f in files], language, output_format)
+
+        for result, (value, error) in zip(results, outcomes):
+            if error:
+                result["error"] = error
+            else:
+                result["output"], result["json"] = value
+
+        failed = sum(1 for r in results if r["error"])
+        self.logger.log(f"[POOL] Gotowe: {len(files) - failed}/{len(files)} plików.")
+        return results
+
+    def transcribe_long(self, path: str, language: Optional[str] = None, output_format: str = "txt",
+                        window: float = LONG_AUDIO_WINDOW):
+        """
+        Transkrybuje jedno długie nagranie: podział na okna w ciszy (VAD),
+        okna równolegle, sklejenie segmentów z czasami bezwzględnymi.
+        Zapis identyczny jak Transcriber.save_transcription.
+
+        Returns:
+            (output_file, json_file)
+        """
+        from src.core.transcriber import Transcriber
+
+        name = os.path.basename(path)
+        pcm_path = prepare_audio(path)  # dekodowanie raz, okna czytane z cache przez memmap
+        audio = open_pcm(pcm_path)
+        duration = len(audio) / SAMPLE_RATE
+        windows = plan_windows(speech_spans(audio), duration, window)
+        del audio
+        self.logger.log(f"[POOL] {name}: {duration / 60:.1f} min -> {len(windows)} okien po ~{window / 60:.0f} min")
+
+        with self._session():
+            items = [(pcm_path, w) for w in windows]
+            labels = [f"{name} [okno {i + 1}/{len(windows)}]" for i in range(len(windows))]
+            # Postęp liczony dla całego pliku, także gdy okna idą w dwóch przebiegach
+            self._progress = [0.0] * len(windows)
+
+            outcomes = []
+            if language is None:
+                # Język wykrywany na pierwszym oknie i narzucany pozostałym (spójna transkrypcja)
+                outcomes = self._run(_transcribe_window, items[:1], labels, None)
+                if outcomes[0][1]:
+                    raise RuntimeError(outcomes[0][1])
+                language = outcomes[0][0][1]
+                self.logger.log(f"[POOL] Wykryty język: {language}")
+            outcomes += self._run(_transcribe_window, items[len(outcomes):], labels, language, start=len(outcomes))
+
+        errors = [error for _, error in outcomes if error]
+        if errors:
+            raise RuntimeError(f"{len(errors)} okien nie powiodło się: {errors[0]}")
+
+        segments = stitch_segments(windows, [value[0] for value, _ in outcomes])
+        info = SimpleNamespace(
+            language=language,
+            language_probability=outcomes[0][0][2],
+            duration=duration,
+        )
+
+        # Zapis tą samą ścieżką co transkrypcja jednym modelem (JSON + TXT + format)
+        writer = Transcriber(self.logger, self.stop_event, self.progress_callback)
+        writer.keep_model = True
+        segment_objects = (SimpleNamespace(**seg) for seg in segments)
+        return writer.save_transcription(segment_objects, info, path, output_format, language)
+
+    # --- Wewnętrzne ---
+
+    def _run(self, task: Callable, items: List, labels: List[str], *args,
+             start: int = 0) -> List[Tuple[object, Optional[str]]]:
+        """
+        Wykonuje task(index, item, *args) w procesach roboczych. Zwraca [(wynik, błąd)] w kolejności.
+
+        `start` to indeks pierwszego elementu w całym zadaniu (labels i self._progress,
+        które wywołujący przygotowuje raz na całość).
+        """
+        outcomes: List[Tuple[object, Optional[str]]] = [(None, None)] * len(items)
+        tasks = queue.Queue()
+        for index, item in enumerate(items, start):
+            tasks.put((index, item))
+
+        dispatchers = [
+            threading.Thread(target=self._dispatch, args=(executor, tasks, outcomes, labels, task, args, start),
+                             daemon=True)
+            for executor in self._executors[:len(items)]
+        ]
+        for thread in dispatchers:
+            thread.start()
+        for thread in dispatchers:
+            thread.join()
+
+        if self.stop_event.is_set():
+            raise InterruptedError("Operacja anulowana przez użytkownika")
+        return outcomes
+
+    def _dispatch(self, executor, tasks, outcomes, labels, task, args, start):
+        """Wątek jednego procesu roboczego: pobiera kolejne zadania, dopóki są."""
+        while not self.stop_event.is_set():
+            try:
+                index, item = tasks.get_nowait()
+            except queue.Empty:
+                return
+
+            future = executor.submit(task, index, item, *args)
+            while True:
+                try:
+                    outcomes[index - start] = (future.result(timeout=POLL_INTERVAL), None)
+                    break
+                except FutureTimeout:
+                    if self.stop_event.is_set():
+                        self._shared_stop.set()  # przerywa transkrypcję w procesie roboczym
+                except Exception as e:
+                    outcomes[index - start] = (None, f"{type(e).__name__}: {e}")
+                    self.logger.log(f"[POOL] BŁĄD {labels[index]}: {outcomes[index - start][1]}")
+                    break
+
+    def _listen(self):
+        """Odbiera logi i postęp z procesów roboczych; postęp = średnia po zadaniach."""
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            if event[0] == "log":
+                self.logger.log(event[1])
+            elif event[0] == "progress":
+                _, index, percent = event
+                progress = self._progress
+                if index < len(progress):
+                    progress[index] = min(100.0, max(progress[index], percent))
+                    self.progress_callback(sum(progress) / len(progress), "transcribing")
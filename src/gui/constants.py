@@ -8,6 +8,8 @@ Stałe dla interfejsu Gradio.
 
 from typing import Dict, List, Tuple
 
+from src.utils.config import AUDIO_EXTENSIONS, VIDEO_EXTENSIONS, MEDIA_EXTENSIONS
+
 # =============================================================================
 # ETYKIETY UI
 # =============================================================================
@@ -203,6 +205,7 @@ SUCCESS_MESSAGES: Dict[str, str] = {
     "generation_complete": "Notatka wygenerowana pomyslnie",
     "save_complete": "Zapisano: {filepath}",
     "obsidian_save_complete": "Zapisano do Obsidian: {filename}",
+    "save_unchanged": "Bez zmian (plik aktualny): {filename}",
     "vram_cleared": "VRAM zwolniony. Wolne: {free_gb:.1f} GB / {total_gb:.1f} GB",
     "cancelled": "Operacja anulowana",
 }
@@ -227,14 +230,13 @@ def format_success(success_key: str, **kwargs) -> str:
 # TYPY PLIKÓW
 # =============================================================================
 
-ALLOWED_AUDIO_EXTENSIONS = [".mp3", ".wav", ".m4a", ".flac", ".ogg", ".wma"]
-ALLOWED_VIDEO_EXTENSIONS = [".mp4", ".mkv", ".avi", ".mov", ".webm", ".wmv"]
-ALLOWED_EXTENSIONS = ALLOWED_AUDIO_EXTENSIONS + ALLOWED_VIDEO_EXTENSIONS
+# Wspólne z CLI i main_pipeline (src/utils/config.py) - m.in. .opus/.aac z pobierania "best"
+ALLOWED_AUDIO_EXTENSIONS = list(AUDIO_EXTENSIONS)
+ALLOWED_VIDEO_EXTENSIONS = list(VIDEO_EXTENSIONS)
+ALLOWED_EXTENSIONS = list(MEDIA_EXTENSIONS)
 
 # Dla gr.File
-FILE_TYPES = [
-    ".mp4", ".mp3", ".m4a", ".wav", ".mkv", ".avi", ".mov", ".webm", ".flac"
-]
+FILE_TYPES = list(MEDIA_EXTENSIONS)
 
 # =============================================================================
 # DOMYŚLNE WARTOŚCI
@@ -685,6 +685,11 @@ def create_app() -> gr.Blocks:
 
 def main():
     """Punkt wejścia aplikacji."""
+    from src.core.kb_index import get_kb_index
+
+    # Indeks KB aktualizowany przez watchdog - lista plików bez skanowania dysku
+    get_kb_index().start_watching()
+
     theme, custom_css = get_theme_and_css()
     app = create_app()
     app.queue().launch(
@@ -99,10 +99,10 @@ def check_ollama_status() -> str:
     """Sprawdza czy Ollama jest dostępna."""
     try:
         import requests
-        from src.utils.config import OLLAMA_URL
-        response = requests.get(f"{OLLAMA_URL}/api/tags", timeout=5)
-        if response.status_code == 200:
-            return "Ollama: OK"
+        from src.core.ollama_client import get_ollama_client
+        get_ollama_client().list_models(timeout=5)
+        return "Ollama: OK"
+    except requests.exceptions.HTTPError:
         return "Ollama: Blad polaczenia"
     except Exception:
         return "Ollama: Niedostepna"
@@ -321,11 +321,6 @@ def process_local_files(
             log_capture.log(f"Przetwarzanie pliku {i+1}/{len(files)}: {filename}")
             yield log_capture.get_logs(), "", ""
 
-            # Konwersja do MP3 (opcjonalna)
-            if convert_to_mp3 and not file_path.endswith('.mp3'):
-                log_capture.log("Konwertowanie do MP3...")
-                file_path = processor.convert_to_mp3(file_path)
-
             # Transkrypcja
             txt_file = None
             if do_transcribe:
@@ -344,6 +339,12 @@ def process_local_files(
 
                 clear_gpu_memory()
 
+            # Konwersja do MP3 (opcjonalna, tylko jako plik wynikowy -
+            # transkrypcja korzysta z oryginału zdekodowanego do cache PCM)
+            if convert_to_mp3 and not file_path.endswith('.mp3'):
+                log_capture.log("Konwertowanie do MP3...")
+                processor.convert_to_mp3(file_path)
+
             # Ekstrakcja
             if do_extraction and txt_file:
                 log_capture.log("Ekstrakcja wiedzy...")
@@ -377,10 +378,11 @@ def run_knowledge_extraction(
         Ścieżka do pliku KB lub None
     """
     from src.utils.config import DATA_PROCESSED, CHUNK_SIZE, OVERLAP, MODEL_EXTRACTOR
-    from src.core.text_cleaner import clean_transcript
-    from src.utils.text_processing import smart_split_text
+    from src.core.text_cleaner import clean_transcript_with_timeline
+    from src.utils.text_processing import split_with_time_ranges
     from src.agents.extractor import KnowledgeExtractor
     from src.core.llm_engine import unload_model
+    from src.core.kb_store import save_kb, kb_path_for
 
     if not txt_file or not os.path.exists(txt_file):
         return None
@@ -390,8 +392,8 @@ def run_knowledge_extraction(
         with open(txt_file, 'r', encoding='utf-8') as f:
             raw_text = f.read()
 
-        clean_text = clean_transcript(raw_text)
-        chunks = smart_split_text(clean_text, chunk_size=CHUNK_SIZE, chunk_overlap=OVERLAP)
+        clean_text, timeline = clean_transcript_with_timeline(raw_text)
+        chunks = split_with_time_ranges(clean_text, timeline, chunk_size=CHUNK_SIZE, chunk_overlap=OVERLAP)
 
         if not chunks:
             log_capture.warning("Brak fragmentow do analizy")
@@ -403,25 +405,21 @@ def run_knowledge_extraction(
         knowledge_base = []
         extractor = KnowledgeExtractor()
 
-        for i, chunk in enumerate(chunks):
+        def on_progress(i, graph):
             progress_pct = 50 + (40 * (i + 1) / len(chunks))
             progress_adapter.update(progress_pct, "extracting")
 
-            graph = extractor.extract_knowledge(chunk, chunk_id=f"Part {i+1}")
+        # Nieudane fragmenty są ponawiane na końcu (gdy backend dojdzie do siebie)
+        for graph in extractor.extract_chunks(chunks, on_progress=on_progress):
             knowledge_base.append(graph.model_dump())
 
-        # Zapis JSON
+        # Zapis bazy wiedzy (format kompaktowy)
         base_name = os.path.basename(txt_file).replace('.txt', '')
-        json_filename = f"{base_name}_kb.json"
-        json_path = os.path.join(DATA_PROCESSED, json_filename)
-
-        os.makedirs(DATA_PROCESSED, exist_ok=True)
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(knowledge_base, f, ensure_ascii=False, indent=2)
+        kb_path = save_kb(kb_path_for(base_name, DATA_PROCESSED), knowledge_base)
 
         unload_model(MODEL_EXTRACTOR)
 
-        return json_path
+        return kb_path
 
     except Exception as e:
         log_capture.error(f"Blad ekstrakcji: {e}")
@@ -434,64 +432,43 @@ def run_knowledge_extraction(
 
 def get_kb_files() -> List[str]:
     """
-    Pobiera listę plików bazy wiedzy.
+    Pobiera listę plików bazy wiedzy z indeksu metadanych.
 
     Returns:
         Lista ścieżek do plików KB (posortowana wg czasu modyfikacji)
     """
-    from src.utils.config import DATA_PROCESSED
-
-    if not os.path.exists(DATA_PROCESSED):
-        return []
-
-    kb_files = []
-    for f in os.listdir(DATA_PROCESSED):
-        if f.endswith('_kb.json'):
-            full_path = os.path.join(DATA_PROCESSED, f)
-            kb_files.append(full_path)
+    from src.core.kb_index import get_kb_index
 
-    # Sortuj wg czasu modyfikacji (najnowsze pierwsze)
-    kb_files.sort(key=lambda x: os.path.getmtime(x), reverse=True)
-
-    return kb_files
+    return get_kb_index().list_files()
 
 
 def load_kb_file(filepath: str) -> Tuple[int, int, int, int, str, str]:
     """
-    Wczytuje plik KB i zwraca metryki.
+    Zwraca metryki pliku KB z indeksu metadanych
+    (plik jest parsowany tylko, jeśli zmienił się od ostatniego odczytu).
 
     Returns:
         tuple: (segments, concepts, tools, tips, topics_str, preview_json)
     """
+    from src.core.kb_index import get_kb_index
+
     if not filepath or not os.path.exists(filepath):
         return 0, 0, 0, 0, "", "{}"
 
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        if not isinstance(data, list):
-            return 0, 0, 0, 0, "", "{}"
-
-        segments = len(data)
-        concepts = sum(len(item.get('key_concepts', [])) for item in data)
-        tools = sum(len(item.get('tools', [])) for item in data)
-        tips = sum(len(item.get('tips', [])) for item in data)
-
-        # Zbierz unikalne tematy
-        all_topics = []
-        for item in data:
-            all_topics.extend(item.get('topics', []))
-        unique_topics = list(set(all_topics))[:10]
-        topics_str = ", ".join(unique_topics)
-
-        # Preview JSON (pierwsze 2 elementy)
-        preview = json.dumps(data[:2], ensure_ascii=False, indent=2)
-
-        return segments, concepts, tools, tips, topics_str, preview
+    entry = get_kb_index().get(filepath)
+    if not entry:
+        return 0, 0, 0, 0, "", "{}"
+    if entry.get("error"):
+        return 0, 0, 0, 0, f"Blad: {entry['error']}", "{}"
 
-    except Exception as e:
-        return 0, 0, 0, 0, f"Blad: {e}", "{}"
+    return (
+        entry["segments"],
+        entry["concepts"],
+        entry["tools"],
+        entry["tips"],
+        ", ".join(entry["topics"]),
+        entry["preview"],
+    )
 
 
 def extract_topic_from_filename(filepath: str) -> str:
@@ -502,7 +479,7 @@ def extract_topic_from_filename(filepath: str) -> str:
     topic = os.path.basename(filepath)
 
     # Usuń rozszerzenia i sufiksy
-    for suffix in ['.json', '.txt', '_kb', '_transkrypcja', '_transcript']:
+    for suffix in ['.jsonl', '.json', '.txt', '_kb', '_transkrypcja', '_transcript']:
         topic = topic.replace(suffix, '')
 
     # Zamień separatory na spacje
@@ -536,6 +513,7 @@ def generate_note_streaming(
     """
     from src.agents.writer import ReportWriter
     from src.core.llm_engine import unload_model
+    from src.core.kb_store import load_kb
     from src.utils.config import MODEL_WRITER
 
     if not kb_file_path or not os.path.exists(kb_file_path):
@@ -551,8 +529,7 @@ def generate_note_streaming(
 
     try:
         # Wczytaj bazę wiedzy
-        with open(kb_file_path, 'r', encoding='utf-8') as f:
-            knowledge_data = json.load(f)
+        knowledge_data = load_kb(kb_file_path)
 
         writer = ReportWriter()
 
@@ -650,10 +627,12 @@ def save_to_obsidian(content: str, filename: str, vault_path: str) -> str:
         if not safe_filename.endswith('.md'):
             safe_filename += '.md'
 
-        filepath = os.path.join(vault_path, safe_filename)
-
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+        # Zapis przyrostowy: tylko gdy treść się zmieniła, z zachowaniem pól
+        # frontmattera edytowanych w vaulcie (np. reviewed: true)
+        from src.core.obsidian_sync import sync_note
+        _, written = sync_note(content, safe_filename, vault_path)
+        if not written:
+            return format_success("save_unchanged", filename=safe_filename)
 
         return format_success("obsidian_save_complete", filename=safe_filename)
 
@@ -683,10 +662,10 @@ def save_note_locally(content: str, filename: str) -> str:
         if not safe_filename.endswith('.md'):
             safe_filename += '.md'
 
-        filepath = os.path.join(DATA_OUTPUT, safe_filename)
-
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+        from src.core.obsidian_sync import sync_note
+        filepath, written = sync_note(content, safe_filename, DATA_OUTPUT)
+        if not written:
+            return format_success("save_unchanged", filename=safe_filename)
 
         return format_success("save_complete", filepath=filepath)
 
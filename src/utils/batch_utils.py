@@ -6,9 +6,9 @@ Używane przez:
 - nightly_pipeline.py (nocny pipeline)
 """
 
-from typing import Dict
-from src.utils.prompts_config import EXTRACTION_PROMPT
-from src.utils.config import MODEL_EXTRACTOR_OPENAI
+from typing import Dict, List, Tuple
+from src.utils.prompts_config import EXTRACTION_PROMPT, EXTRACTION_PROMPT_PACKED
+from src.utils.config import MODEL_EXTRACTOR_OPENAI, CHUNK_SIZE, OVERLAP, PACK_SMALL_CHUNKS
 
 
 def build_batch_request(
@@ -30,6 +30,11 @@ def build_batch_request(
 
     Dokumentacja: https://platform.openai.com/docs/api-reference/batch
     """
+    return _chat_request(custom_id, EXTRACTION_PROMPT["system"],
+                         EXTRACTION_PROMPT["user"].format(text=transcript_text), model)
+
+
+def _chat_request(custom_id: str, system_prompt: str, user_prompt: str, model: str) -> Dict:
     return {
         "custom_id": custom_id,
         "method": "POST",
@@ -37,10 +42,101 @@ def build_batch_request(
         "body": {
             "model": model,
             "messages": [
-                {"role": "system", "content": EXTRACTION_PROMPT["system"]},
-                {"role": "user", "content": EXTRACTION_PROMPT["user"].format(text=transcript_text)}
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
             ],
             "temperature": 0.0,
             "response_format": {"type": "json_object"}
         }
     }
+
+
+def build_chunked_batch_requests(
+    custom_id: str,
+    transcript_text: str,
+    model: str = MODEL_EXTRACTOR_OPENAI,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = OVERLAP
+) -> List[Dict]:
+    """
+    Dzieli transkrypcję na fragmenty i buduje osobny request dla każdego z nich.
+    Fragmenty dostają custom_id w formacie 'nazwa__part_N', dzięki czemu
+    BatchManager.import_batch_to_lab scala je w kolejności, a
+    BatchManager.select_missing_requests pozwala ponowić tylko brakujące części.
+
+    Krótkie transkrypcje (jeden fragment) zachowują oryginalny custom_id.
+    """
+    return [
+        build_batch_request(item_id, text, model=model)
+        for item_id, text in build_chunk_items(custom_id, transcript_text, chunk_size, chunk_overlap)
+    ]
+
+
+def build_chunk_items(
+    custom_id: str,
+    transcript_text: str,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = OVERLAP
+) -> List[Tuple[str, str]]:
+    """
+    Podział transkrypcji jak w build_chunked_batch_requests, ale bez budowania
+    requestów: [(custom_id fragmentu, tekst)] - wejście dla build_packed_batch_requests.
+    """
+    from src.utils.text_processing import smart_split_text
+
+    chunks = smart_split_text(transcript_text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    if len(chunks) <= 1:
+        return [(custom_id, transcript_text)]
+    return [(f"{custom_id}__part_{i}", chunk) for i, chunk in enumerate(chunks)]
+
+
+def build_packed_batch_requests(
+    items: List[Tuple[str, str]],
+    model: str = MODEL_EXTRACTOR_OPENAI,
+    pack: bool = PACK_SMALL_CHUNKS
+) -> Tuple[List[Dict], Dict[str, Dict[str, str]]]:
+    """
+    Buduje requesty dla fragmentów [(custom_id, tekst)] z wielu plików, łącząc
+    krótkie fragmenty w pakiety (jeden prompt systemowy na kilka fragmentów).
+
+    Returns:
+        (requesty, pakiety) - pakiety {custom_id pakietu: {"F1": custom_id fragmentu, ...}}
+        trzeba zapisać w manifeście i przekazać do BatchManager.import_batch_to_lab(packs=...).
+    """
+    from src.core.chunk_packer import pack_id, plan_packs, render_pack
+
+    packs, singles = plan_packs(items) if pack else ([], items)
+    requests = [build_batch_request(item_id, text, model=model) for item_id, text in singles]
+    pack_map = {}
+    for members in packs:
+        text, id_map = render_pack(members)
+        request_id = pack_id(members)
+        requests.append(_chat_request(request_id, EXTRACTION_PROMPT_PACKED["system"],
+                                      EXTRACTION_PROMPT_PACKED["user"].format(fragments=text), model))
+        pack_map[request_id] = id_map
+    return requests, pack_map
+
+
+def build_chunk_time_ranges(
+    custom_id: str,
+    transcript_text: str,
+    timeline,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = OVERLAP
+) -> Dict[str, str]:
+    """
+    Zwraca {custom_id fragmentu: "MM:SS -> MM:SS"} dla requestów z build_chunked_batch_requests
+    (ten sam podział tekstu). Zapisywane w manifeście i przekazywane do
+    BatchManager.import_batch_to_lab(time_ranges=...).
+    """
+    from src.utils.text_processing import split_with_time_ranges
+
+    chunks = split_with_time_ranges(transcript_text, timeline, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    if len(chunks) <= 1:
+        return {}
+
+    return {
+        f"{custom_id}__part_{i}": time_range
+        for i, (_, time_range) in enumerate(chunks)
+        if time_range
+    }
@@ -4,16 +4,50 @@ from dotenv import load_dotenv
 # Wczytaj zmienne środowiskowe z .env
 load_dotenv()
 
-# Konfiguracja modeli
-import torch
-
 # Konfiguracja urządzenia
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-COMPUTE_TYPE = "float16" if DEVICE == "cuda" else "int8"
+# Wykrywanie CUDA wymaga importu torch (kilka sekund), więc odbywa się leniwie:
+# dopiero przy pierwszym użyciu get_device() / DEVICE / COMPUTE_TYPE.
+_device = None
+
+
+def get_device() -> str:
+    """Zwraca "cuda" lub "cpu" (wynik wykrycia jest zapamiętywany)."""
+    global _device
+    if _device is None:
+        forced = os.getenv("TRANSKRYPCJE_DEVICE")
+        if forced:
+            _device = forced
+        else:
+            try:
+                import torch
+                _device = "cuda" if torch.cuda.is_available() else "cpu"
+            except ImportError:
+                _device = "cpu"
+    return _device
+
+
+def get_compute_type() -> str:
+    """Typ obliczeń faster-whisper dla wykrytego urządzenia."""
+    return "float16" if get_device() == "cuda" else "int8"
+
+
+def __getattr__(name):
+    # Zgodność wsteczna: `from src.utils.config import DEVICE` nadal działa
+    if name == "DEVICE":
+        return get_device()
+    if name == "COMPUTE_TYPE":
+        return get_compute_type()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Konfiguracja Whisper
 WHISPER_MODELS = ["medium", "large-v3"]
 DEFAULT_MODEL_SIZE = "large-v3"
+# Pula transkrypcji (transcription_pool): procesy na GPU / wątki CTranslate2 na proces CPU
+TRANSCRIBE_WORKERS_PER_GPU = int(os.getenv("TRANSCRIBE_WORKERS_PER_GPU", "1"))
+TRANSCRIBE_CPU_THREADS = int(os.getenv("TRANSCRIBE_CPU_THREADS", "4"))
+# Długie nagrania (long_audio): okna ~10 min transkrybowane równolegle, od 30 min nagrania
+LONG_AUDIO_WINDOW = float(os.getenv("LONG_AUDIO_WINDOW", "600"))
+LONG_AUDIO_MIN_DURATION = float(os.getenv("LONG_AUDIO_MIN_DURATION", "1800"))
 WHISPER_LANGUAGES = {
     "Polski": "pl",
     "Angielski": "en",
@@ -24,7 +58,7 @@ WHISPER_LANGUAGES = {
 }
 
 # Konfiguracja modeli LLM
-LLM_PROVIDER = os.getenv("LLM_PROVIDER", "ollama") # "ollama" lub "openai"
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "ollama") # "ollama", "openai" lub "auto" (router per wywołanie)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 
 # Modele Ollama (Zmieniono na 7b dla RTX 3060)
@@ -32,6 +66,49 @@ MODEL_EXTRACTOR_OLLAMA = "qwen2.5:7b"
 MODEL_WRITER_OLLAMA = "bielik-writer"
 MODEL_TAGGER_OLLAMA = "qwen2.5:7b"
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+OLLAMA_MODELS_TTL = float(os.getenv("OLLAMA_MODELS_TTL", "30"))  # ważność listy modeli (s)
+OLLAMA_POOL_SIZE = 8  # utrzymywane połączenia HTTP do Ollamy
+# Pula serwerów Ollama (src/core/ollama_pool.py) - adresy po przecinku, np.
+# OLLAMA_HOSTS="http://gpu1:11434,http://gpu2:11434"; domyślnie tylko OLLAMA_URL
+OLLAMA_HOSTS = [h.strip() for h in os.getenv("OLLAMA_HOSTS", OLLAMA_URL).split(",") if h.strip()]
+OLLAMA_HEALTH_INTERVAL = 15.0  # s między health checkami hostów puli (/api/tags, /api/ps)
+# Kontekst modeli Ollamy (ollama_client.model_options). Inny num_ctx dla tego samego modelu
+# przeładowuje go i kasuje cache prefiksu promptu, więc każdy model ma jedną wartość,
+# niezależnie od ścieżki wywołania (instructor, /api/chat, OSINT, podsumowania).
+OLLAMA_NUM_CTX = 8192                          # domyślnie (jak PARAMETER num_ctx w Modelfile)
+OLLAMA_MODEL_NUM_CTX = {"qwen2.5:7b": 4096}    # ekstraktor/tagger - mniej VRAM na RTX 3060
+# Ustrukturyzowane odpowiedzi z Ollamy: "schema" - JSON schema modelu Pydantic
+# przekazany w `format` (dekodowanie ograniczone gramatyką, bez re-asków),
+# "instructor" - tryb JSON przez endpoint OpenAI z ponowieniami przy błędzie walidacji
+OLLAMA_STRUCTURED_MODE = os.getenv("OLLAMA_STRUCTURED_MODE", "schema")
+
+# Format odpowiedzi ekstraktora: "json" (pełne klucze KnowledgeGraph) albo
+# "compact" (krótkie klucze i pary - mniej generowanych tokenów na fragment)
+EXTRACTION_WIRE_FORMAT = os.getenv("EXTRACTION_WIRE_FORMAT", "json")
+
+# Ponowienia wywołań LLM (src/core/retry_policy.py)
+EXTRACTION_MAX_RETRIES = 3         # próby na fragment (błędy walidacji i przejściowe)
+RETRY_BASE_DELAY = 1.0             # s; backoff wykładniczy z jitterem
+RETRY_MAX_DELAY = 30.0
+CIRCUIT_FAILURE_THRESHOLD = 5      # kolejne błędy backendu, po których obwód się otwiera
+CIRCUIT_RESET_TIMEOUT = 30.0       # s do wywołania próbnego
+EXTRACTION_REQUEUE_WAIT = 120.0    # maks. czekanie na backend przed ponowieniem odłożonych fragmentów
+
+# Limity konta OpenAI (src/core/rate_limiter.py) - korygowane nagłówkami x-ratelimit-*
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "500"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "200000"))
+OPENAI_OUTPUT_TOKENS_ESTIMATE = 1024  # przewidywana długość odpowiedzi przy szacowaniu TPM
+
+# Provider "auto" (src/core/provider_router.py) - Ollama albo OpenAI wybierany per wywołanie.
+# Polityka etapu: "ollama" / "openai" (zawsze), "auto" (lokalnie, chmura gdy lokalny
+# backend niedostępny, GPU zajęte albo kolejka za długa)
+LLM_STAGE_POLICY = {"extractor": "auto", "writer": "auto", "tagger": "ollama"}
+ROUTER_QUEUE_SPILL = {"writer": 1}  # etap -> czekające wywołania lokalne, od których idziemy do chmury
+ROUTER_MIN_FREE_VRAM_GB = 1.0       # mniej wolnego VRAM (np. Whisper na GPU) = GPU zajęte
+ROUTER_COST_BUDGET_USD = float(os.getenv("ROUTER_COST_BUDGET_USD", "1.0"))  # limit kosztu OpenAI na przebieg
+ROUTER_TRACE_FILE = os.getenv("ROUTER_TRACE_FILE", "")  # JSONL z decyzjami routera (puste = tylko podsumowanie)
+# Cennik OpenAI (USD za 1M tokenów: wejście, wyjście) - do budżetu i śladów routera
+OPENAI_PRICES_PER_1M = {"gpt-4o-mini": (0.15, 0.60), "gpt-4o": (2.50, 10.00)}
 
 # Modele OpenAI
 MODEL_EXTRACTOR_OPENAI = "gpt-4o-mini"
@@ -54,12 +131,43 @@ DEFAULT_OLLAMA_MODEL = MODEL_EXTRACTOR
 CHUNK_SIZE = 5000  # Zmniejszono z 8000 dla lepszej stabilności VRAM (RTX 3060)
 OVERLAP = 300      # Zwiększono zakładkę dla lepszej ciągłości wiedzy
 
+# Adaptacyjna równoległość wywołań LLM (src/core/concurrency.py, AIMD).
+# Limit startuje od LLM_CONCURRENCY_INITIAL i sam dochodzi do możliwości backendu.
+LLM_CONCURRENCY_INITIAL = 2
+LLM_CONCURRENCY_MAX_OLLAMA = int(os.getenv("LLM_CONCURRENCY_MAX_OLLAMA", "4"))
+LLM_CONCURRENCY_MAX_OPENAI = int(os.getenv("LLM_CONCURRENCY_MAX_OPENAI", "32"))
+
+# Pakowanie krótkich fragmentów (src/core/chunk_packer.py): kilka małych fragmentów
+# (np. ostatnie części transkrypcji, krótkie filmy) w jednym zapytaniu ekstrakcji
+PACK_SMALL_CHUNKS = os.getenv("PACK_SMALL_CHUNKS", "1") == "1"
+PACK_SMALL_CHARS = CHUNK_SIZE // 2   # fragmenty krótsze od tego są pakowane
+PACK_MAX_CHARS = CHUNK_SIZE          # łączna długość tekstu w jednym pakiecie
+PACK_MAX_ITEMS = 6                   # maks. fragmentów w pakiecie
+
+# Równoległe zapytania do LLM (etap MAP w OsintAnalyzer).
+# Ollama obsłuży je naraz tylko przy OLLAMA_NUM_PARALLEL > 1 po stronie serwera.
+OSINT_MAX_WORKERS = int(os.getenv("OSINT_MAX_WORKERS", "4"))
+# To samo dla etapu MAP podsumowań długich transkrypcji (Summarizer)
+SUMMARY_MAX_WORKERS = int(os.getenv("SUMMARY_MAX_WORKERS", "4"))
+
 # Ścieżki
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 DATA_RAW = os.path.join(BASE_DIR, 'data', 'raw')
 DATA_PROCESSED = os.path.join(BASE_DIR, 'data', 'processed')
 DATA_OUTPUT = os.path.join(BASE_DIR, 'data', 'output')
 
+# Cache zdekodowanego audio (16 kHz mono PCM) - patrz src/core/audio_prep.py
+AUDIO_CACHE_ENABLED = os.getenv("AUDIO_CACHE_ENABLED", "true").lower() == "true"
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", os.path.join(DATA_PROCESSED, '.audio_cache'))
+AUDIO_CACHE_MAX_GB = float(os.getenv("AUDIO_CACHE_MAX_GB", "20"))
+# Kodek audio przy pobieraniu (audio_only): "best" = bez ponownego kodowania, "mp3" = konwersja
+DOWNLOAD_AUDIO_CODEC = os.getenv("DOWNLOAD_AUDIO_CODEC", "best")
+# Rozszerzenia mediów akceptowane przez CLI, GUI i main_pipeline. Audio obejmuje natywne
+# kodeki z YouTube zapisywane przy DOWNLOAD_AUDIO_CODEC="best" (opus, aac, webm, ...)
+AUDIO_EXTENSIONS = (".m4a", ".opus", ".webm", ".ogg", ".mp3", ".aac", ".flac", ".wav", ".wma")
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".avi", ".mov", ".webm", ".wmv")
+MEDIA_EXTENSIONS = tuple(dict.fromkeys(AUDIO_EXTENSIONS + VIDEO_EXTENSIONS))
+
 # Obsidian Vault - automatyczny eksport notatek
 # Ścieżka WSL do Windows: /mnt/c/Users/marci/Documents/Obsidian Vault/2ndBrain
 OBSIDIAN_VAULT_PATH = os.getenv("OBSIDIAN_VAULT_PATH", "/mnt/c/Users/marci/Documents/Obsidian Vault/2ndBrain")
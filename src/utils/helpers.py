@@ -1,7 +1,29 @@
+import importlib.util
 import os
 import re
 import shutil
 import subprocess
+import sys
+
+
+def lazy_import(name):
+    """
+    Zwraca moduł, który zostanie faktycznie zaimportowany dopiero przy pierwszym
+    dostępie do atrybutu (importlib.util.LazyLoader). Dla ciężkich zależności
+    (yt_dlp, faster_whisper), żeby nie spowalniały startu CLI/GUI.
+    Zwraca None, jeśli pakiet nie jest zainstalowany.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return None
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
 
 def validate_url(url):
     """Walidacja URL YouTube"""
@@ -1,23 +1,53 @@
 # src/utils/prompts_config.py
 
+from src.core.schema import render_compact_fields, render_extraction_fields
+
+# Klucze JSON pochodzą z rejestru pól (src/core/schema.py) - te same, które waliduje KnowledgeGraph
 EXTRACTION_PROMPT = {
     "system": """Jesteś ekspertem analizy treści i architektem wiedzy. Twoim zadaniem jest przekształcenie surowej transkrypcji w strukturalną, gęstą od faktów bazę wiedzy.
 WYMAGANIA:
-1. Język: Odpowiadaj wyłącznie w języku polskim.
+1. Język: Wartości pisz wyłącznie po polsku (klucze JSON dokładnie jak poniżej).
 2. Format: Zwróć wyłącznie poprawny obiekt JSON.
 3. Detaliczność: Unikaj ogólników. Wyciągaj konkretne nazwy, kroki, przyczyny i skutki.
 
 STRUKTURA JSON:
-- kluczowe_pojęcia: Lista obiektów { "termin": "...", "definicja_i_kontekst": "..." }. Definicje muszą być wyczerpujące (min. 2 zdania).
-- wnioski_i_ciekawostki: Głębokie spostrzeżenia, nietrywialne wnioski lub interesujące fakty z tekstu.
-- narzędzia_i_technologie: Konkretne oprogramowanie, protokoły, urządzenia lub standardy wspomniane w tekście wraz z ich rolą.
-- praktyczne_wskazówki: Lista konkretnych kroków, porad typu "Tip of the day" lub instrukcji "jak to zrobić".
-- tematy: Lista ogólnych obszarów tematycznych, których dotyczy fragment.
+""" + render_extraction_fields() + """
 
 ZASADA ZERO HALUCYNACJI: Jeśli tekst o czymś nie wspomina, nie dodawaj tego od siebie. Skup się na tym, co faktycznie padło w nagraniu.""",
     "user": "Przeanalizuj poniższy fragment transkrypcji i stwórz na jego podstawie szczegółową bazę wiedzy w formacie JSON:\n\n{text}"
 }
 
+# Kilka krótkich fragmentów w jednym zapytaniu (src/core/chunk_packer.py, PackedKnowledgeGraphs)
+PACKED_INSTRUCTIONS = """
+
+WIELE FRAGMENTÓW: Otrzymasz kilka niezależnych fragmentów oznaczonych [F1], [F2], ...
+Zwróć obiekt {"fragments": [{"id": "F1", ...pola STRUKTURY JSON...}, {"id": "F2", ...}]} - dokładnie
+jeden element na każdy fragment. Wiedzę każdego fragmentu wyciągaj wyłącznie z jego treści."""
+
+EXTRACTION_PROMPT_PACKED = {
+    "system": EXTRACTION_PROMPT["system"] + PACKED_INSTRUCTIONS,
+    "user": "Przeanalizuj poniższe fragmenty transkrypcji i dla każdego z nich stwórz szczegółową bazę wiedzy w formacie JSON:\n\n{fragments}"
+}
+
+# Dopisywane do promptu użytkownika przy ponowieniu po błędzie walidacji
+EXTRACTION_REASK = "\n\nUWAGA: Poprzednia odpowiedź nie przeszła walidacji ({error}). Zwróć wyłącznie poprawny obiekt JSON zgodny ze STRUKTURĄ."
+
+# Wariant kompaktowy (EXTRACTION_WIRE_FORMAT="compact"): te same pola, krótsze klucze
+# i pary zamiast obiektów - mniej tokenów do wygenerowania (CompactKnowledgeGraph)
+EXTRACTION_PROMPT_COMPACT = {
+    "system": EXTRACTION_PROMPT["system"].replace(
+        render_extraction_fields(),
+        render_compact_fields() + "\nUżywaj wyłącznie kluczy jednoliterowych (s, t, c, p).",
+    ),
+    "user": EXTRACTION_PROMPT["user"],
+}
+
+# Pakiety w formacie kompaktowym (PackedCompactKnowledgeGraphs)
+EXTRACTION_PROMPT_PACKED_COMPACT = {
+    "system": EXTRACTION_PROMPT_COMPACT["system"] + PACKED_INSTRUCTIONS,
+    "user": EXTRACTION_PROMPT_PACKED["user"],
+}
+
 PROMPT_TEMPLATES = {
     "standard": {
         "name": "📘 Podręcznik (Standard)",
@@ -1,5 +1,17 @@
+from typing import Optional
+
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+
+def _make_splitter(chunk_size: int, chunk_overlap: int, add_start_index: bool = False) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", ". ", " ", ""],
+        strip_whitespace=True,
+        add_start_index=add_start_index
+    )
+
 def smart_split_text(text: str, chunk_size: int = 6000, chunk_overlap: int = 500) -> list[str]:
     """
     Dzieli tekst na fragmenty przy użyciu RecursiveCharacterTextSplitter, dbając o semantyczną spójność.
@@ -21,11 +33,36 @@ def smart_split_text(text: str, chunk_size: int = 6000, chunk_overlap: int = 500
     if not text:
         return []
 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        separators=["\n\n", "\n", ". ", " ", ""],
-        strip_whitespace=True
-    )
+    return _make_splitter(chunk_size, chunk_overlap).split_text(text)
+
 
-    return text_splitter.split_text(text)
+def split_text_with_offsets(text: str, chunk_size: int = 6000, chunk_overlap: int = 500) -> list[tuple[int, str]]:
+    """
+    Dzieli tekst tak samo jak smart_split_text, ale zwraca też offset początku
+    każdego fragmentu w tekście wejściowym.
+
+    Returns:
+        list[tuple[int, str]]: Lista (offset, fragment).
+    """
+    if not text:
+        return []
+
+    docs = _make_splitter(chunk_size, chunk_overlap, add_start_index=True).create_documents([text])
+    return [(doc.metadata["start_index"], doc.page_content) for doc in docs]
+
+
+def split_with_time_ranges(text: str, timeline=None, chunk_size: int = 6000,
+                           chunk_overlap: int = 500) -> list[tuple[str, Optional[str]]]:
+    """
+    Dzieli oczyszczoną transkrypcję i przypisuje każdemu fragmentowi zakres czasu
+    z indeksu TranscriptTimeline (patrz clean_transcript_with_timeline).
+
+    Returns:
+        list[tuple[str, Optional[str]]]: Lista (fragment, "MM:SS -> MM:SS" lub None,
+        gdy transkrypcja nie miała znaczników czasu).
+    """
+    result = []
+    for offset, chunk in split_text_with_offsets(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap):
+        time_range = timeline.time_range(offset, offset + len(chunk)) if timeline else None
+        result.append((chunk, time_range))
+    return result
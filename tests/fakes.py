@@ -0,0 +1,11 @@
+"""Wspólne atrapy dla testów (nie są zbierane jako testy)."""
+
+
+class FakeClock:
+    """Zegar sterowany ręcznie (clock= w CircuitBreaker, AdaptiveConcurrency, OllamaPool)."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
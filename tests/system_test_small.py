@@ -34,7 +34,7 @@ class TestSystemSmall(unittest.TestCase):
             os.remove(self.raw_path)
         
         # Clean up processed files (optional, maybe we want to inspect them)
-        processed_kb = os.path.join(DATA_PROCESSED, f"{self.test_filename}_kb.json")
+        processed_kb = os.path.join(DATA_PROCESSED, f"{self.test_filename}_kb.jsonl")
         if os.path.exists(processed_kb):
             os.remove(processed_kb)
 
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import time
+import unittest
+import wave
+from unittest.mock import patch
+
+import numpy as np
+
+from src.core import audio_prep
+from src.core.audio_prep import SAMPLE_RATE, load_audio, prepare_audio, prune_audio_cache
+
+
+def write_wav(path, seconds=1.0, rate=8000, freq=440.0):
+    t = np.arange(int(rate * seconds)) / rate
+    samples = (0.5 * np.sin(2 * np.pi * freq * t) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.tobytes())
+
+
+class TestAudioPrep(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = os.path.join(self.tmp.name, "cache")
+        self.source = os.path.join(self.tmp.name, "nagranie.wav")
+        write_wav(self.source)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_decodes_once_to_16k_and_reuses_cache(self):
+        audio = load_audio(self.source, self.cache)
+        self.assertEqual(audio.dtype, np.float32)
+        self.assertAlmostEqual(len(audio) / SAMPLE_RATE, 1.0, places=2)
+        self.assertGreater(float(np.abs(audio).max()), 0.3)
+
+        with patch.object(audio_prep, "_decode", side_effect=AssertionError("ponowne dekodowanie")):
+            again = load_audio(self.source, self.cache)
+        np.testing.assert_array_equal(audio, again)
+
+    def test_cache_key_follows_content(self):
+        first = prepare_audio(self.source, self.cache)
+        write_wav(self.source, freq=880.0)
+        second = prepare_audio(self.source, self.cache)
+        self.assertNotEqual(first, second)
+
+        copy = os.path.join(self.tmp.name, "kopia.wav")
+        with open(self.source, "rb") as src, open(copy, "wb") as dst:
+            dst.write(src.read())
+        self.assertEqual(prepare_audio(copy, self.cache), second)
+
+    def test_prune_removes_least_recently_used(self):
+        old = prepare_audio(self.source, self.cache)
+        past = time.time() - 100
+        os.utime(old, (past, past))
+        write_wav(self.source, freq=880.0)
+        new = prepare_audio(self.source, self.cache)
+
+        removed = prune_audio_cache(self.cache, max_bytes=os.path.getsize(new))
+        self.assertEqual(removed, 1)
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(new))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,6 +8,7 @@ project_root = Path(__file__).resolve().parent
 sys.path.append(str(project_root))
 
 from src.core.batch_manager import BatchManager
+from src.core.kb_store import load_kb
 from src.utils.config import DATA_PROCESSED
 
 def test_import():
@@ -39,12 +40,11 @@ def test_import():
     print("Testing import_batch_to_lab...")
     imported = bm.import_batch_to_lab(mock_results)
     
-    if "test_video_kb.json" in imported:
+    if "test_video_kb.jsonl" in imported:
         print("✅ SUCCESS: File imported correctly.")
-        kb_path = os.path.join(DATA_PROCESSED, "test_video_kb.json")
-        with open(kb_path, 'r') as f:
-            data = json.load(f)
-            print(f"Imported content: {json.dumps(data, indent=2)}")
+        kb_path = os.path.join(DATA_PROCESSED, "test_video_kb.jsonl")
+        data = load_kb(kb_path)
+        print(f"Imported content: {json.dumps(data, indent=2)}")
     else:
         print("❌ FAILURE: File not imported.")
 
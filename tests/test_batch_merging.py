@@ -9,6 +9,7 @@ project_root = Path(__file__).resolve().parent.parent
 sys.path.append(str(project_root))
 
 from src.core.batch_manager import BatchManager
+from src.core.kb_store import load_kb, read_kb_header
 
 def test_merging():
     manager = BatchManager()
@@ -63,13 +64,13 @@ def test_merging():
     imported_files = manager.import_batch_to_lab(results)
     print(f"Imported files: {imported_files}")
     
-    assert "test_video_kb.json" in imported_files
-    assert "other_video_kb.json" in imported_files
+    assert "test_video_kb.jsonl" in imported_files
+    assert "other_video_kb.jsonl" in imported_files
     
-    # Verify content of test_video_kb.json
-    kb_path = os.path.join("data/processed", "test_video_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    # Verify content of test_video_kb.jsonl
+    kb_path = os.path.join("data/processed", "test_video_kb.jsonl")
+    data = load_kb(kb_path)
+    assert read_kb_header(kb_path)["segments"] == 2
     
     print(f"Merged data length: {len(data)}")
     assert len(data) == 2
@@ -78,5 +79,43 @@ def test_merging():
     
     print("Verification SUCCESSFUL!")
 
+def _result(custom_id, items):
+    return {
+        "custom_id": custom_id,
+        "response": {"body": {"choices": [{"message": {"content": json.dumps(items)}}]}},
+    }
+
+
+def test_ordered_upsert_and_missing_parts():
+    import tempfile
+    from unittest.mock import patch
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            patch("src.core.batch_manager.DATA_PROCESSED", tmp):
+        manager = BatchManager()
+
+        # Części przychodzą w odwrotnej kolejności, część 1 brakuje
+        manager.import_batch_to_lab(
+            [_result("lecture__part_2", [{"topics": ["C"]}]),
+             _result("lecture__part_0", [{"topics": ["A"]}])],
+            expected_parts={"lecture": 3},
+        )
+        assert manager.last_missing_parts == {"lecture": [1]}
+        assert manager.missing_parts("lecture", 3) == [1]
+
+        # Ponowienie tylko brakującej części nie nadpisuje pozostałych
+        requests = [{"custom_id": f"lecture__part_{i}"} for i in range(3)]
+        assert manager.select_missing_requests(requests) == [{"custom_id": "lecture__part_1"}]
+
+        manager.import_batch_to_lab([_result("lecture__part_1", [{"topics": ["B"]}])])
+
+        data = load_kb(os.path.join(tmp, "lecture_kb.jsonl"))
+
+        assert [item["topics"] for item in data] == [["A"], ["B"], ["C"]]
+        assert [item["time_range"] for item in data] == ["Part 1", "Part 2", "Part 3"]
+        assert manager.missing_parts("lecture", 3) == []
+
+
 if __name__ == "__main__":
     test_merging()
+    test_ordered_upsert_and_missing_parts()
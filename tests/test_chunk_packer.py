@@ -0,0 +1,109 @@
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.agents.extractor import KnowledgeExtractor, get_extraction_stats
+from src.core.batch_manager import BatchManager
+from src.core.chunk_packer import plan_packs, render_pack, split_pack_result
+from src.core.kb_store import load_kb
+from src.core.schema import (
+    CompactKnowledgeGraph, KnowledgeGraph, PackedCompactKnowledgeGraphs, PackedKnowledgeGraphs,
+)
+from src.utils.batch_utils import build_packed_batch_requests
+
+
+def batch_result(custom_id, payload):
+    content = json.dumps(payload, ensure_ascii=False)
+    return {"custom_id": custom_id, "response": {"body": {"choices": [{"message": {"content": content}}]}}}
+
+
+class TestPlanPacks(unittest.TestCase):
+    def test_small_chunks_are_packed_within_limits(self):
+        items = [("duzy", "x" * 900), ("a", "a" * 300), ("b", "b" * 300), ("c", "c" * 300), ("d", "d" * 50)]
+        packs, singles = plan_packs(items, small_chars=500, max_chars=700, max_items=3)
+
+        self.assertEqual(singles[0][0], "duzy")
+        packed = [key for pack in packs for key, _ in pack]
+        self.assertEqual(sorted(packed + [key for key, _ in singles[1:]]), ["a", "b", "c", "d"])
+        for pack in packs:
+            self.assertGreater(len(pack), 1)
+            self.assertLessEqual(sum(len(text) for _, text in pack), 700)
+
+    def test_split_maps_ids_back_and_skips_missing(self):
+        text, id_map = render_pack([("plik1#0", "pierwszy"), ("plik2#3", "drugi")])
+        self.assertIn("[F2]\ndrugi", text)
+        graphs = split_pack_result({"fragments": [{"id": "f2", "topics": ["B"]}, {"id": "F9"}]}, id_map)
+        self.assertEqual(graphs, {"plik2#3": {"topics": ["B"]}})
+
+
+class TestPackedBatch(unittest.TestCase):
+    def test_packed_batch_round_trip(self):
+        items = [("film_a", "Krótki film A."), ("film_b", "Krótki film B."), ("dlugi__part_1", "y" * 40)]
+        requests, packs = build_packed_batch_requests(items, model="gpt-4o-mini", pack=True)
+        self.assertEqual(len(requests), 1)
+        pack_request_id, id_map = next(iter(packs.items()))
+        self.assertEqual(requests[0]["custom_id"], pack_request_id)
+        self.assertEqual(sorted(id_map.values()), ["dlugi__part_1", "film_a", "film_b"])
+
+        reply = {"fragments": [{"id": fid, "topics": [key]} for fid, key in id_map.items()]}
+        with tempfile.TemporaryDirectory() as tmp, patch("src.core.batch_manager.DATA_PROCESSED", tmp):
+            manager = BatchManager.__new__(BatchManager)
+            imported = manager.import_batch_to_lab([batch_result(pack_request_id, reply)], packs=packs)
+            self.assertEqual(len(imported), 3)
+            self.assertEqual(load_kb(f"{tmp}/film_b_kb.jsonl")[0]["topics"], ["film_b"])
+            self.assertEqual(load_kb(f"{tmp}/dlugi_kb.jsonl")[0]["part"], 1)
+
+
+class TestExtractPacked(unittest.TestCase):
+    def test_pack_results_are_split_and_missing_fragments_retried(self):
+        extractor = KnowledgeExtractor(provider="ollama", wire_format="json")
+        extractor.llm = MagicMock(last_parse_errors=0)
+        extractor.llm.concurrency.max_limit = 1
+
+        def generate(system_prompt, user_prompt, response_model):
+            if response_model is PackedKnowledgeGraphs:
+                # Model pomija drugi fragment pakietu
+                return PackedKnowledgeGraphs(fragments=[
+                    {"id": "F1", "topics": ["pakiet"], "tools": [], "key_concepts": [], "tips": []}])
+            return KnowledgeGraph(topics=["osobno"], tools=[], key_concepts=[], tips=[])
+
+        extractor.llm.generate_structured.side_effect = generate
+        items = [("a#0", "Fragment A", "00:00 -> 00:10"), ("b#0", "Fragment B", None)]
+        graphs = extractor.extract_packed(items)
+
+        self.assertEqual(graphs["a#0"].topics, ["pakiet"])
+        self.assertEqual(graphs["a#0"].time_range, "00:00 -> 00:10")
+        self.assertEqual(graphs["b#0"].topics, ["osobno"])
+        self.assertEqual(extractor.llm.generate_structured.call_count, 2)
+
+    def test_compact_wire_format_applies_to_packs(self):
+        extractor = KnowledgeExtractor(provider="ollama", wire_format="compact")
+        extractor.llm = MagicMock(last_parse_errors=0)
+        extractor.llm.concurrency.max_limit = 1
+        models = []
+
+        def generate(system_prompt, user_prompt, response_model):
+            models.append(response_model)
+            if response_model is PackedCompactKnowledgeGraphs:
+                self.assertIn("- s (topics):", system_prompt)
+                return PackedCompactKnowledgeGraphs(fragments=[
+                    {"id": "F1", "s": ["pakiet"], "t": [["Shodan", "Skaner"]], "c": [], "p": []}])
+            return CompactKnowledgeGraph(s=["osobno"], t=[], c=[], p=[])
+
+        extractor.llm.generate_structured.side_effect = generate
+        stats = get_extraction_stats()
+        stats.reset()
+        graphs = extractor.extract_packed([("a#0", "Fragment A", None), ("b#0", "Fragment B", None)])
+
+        self.assertEqual(models, [PackedCompactKnowledgeGraphs, CompactKnowledgeGraph])
+        self.assertEqual(graphs["a#0"].tools[0].name, "Shodan")
+        self.assertEqual(graphs["b#0"].topics, ["osobno"])
+        # Pakiet liczony osobno - odsetek "za 1. razem" dotyczy tylko pojedynczych fragmentów
+        summary = stats.summary()
+        self.assertEqual((summary["chunks"], summary["packs"]), (1, 1))
+        self.assertIn("Pakiety: 1", stats.format())
+
+
+if __name__ == "__main__":
+    unittest.main()
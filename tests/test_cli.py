@@ -0,0 +1,117 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from src.cli import build_parser, expand_inputs, is_up_to_date, split_frontmatter, cmd_export, main, ConsoleLogger
+from src.core.provider_router import get_routing_trace
+from src.utils.config import MEDIA_EXTENSIONS, MODEL_TAGGER_OPENAI
+
+
+class TestCliParser(unittest.TestCase):
+    def test_extract_options(self):
+        args = build_parser().parse_args(
+            ["extract", "a.txt", "b/*.txt", "--workers", "2", "--concurrency", "4",
+             "--resume", "--provider", "openai", "--model", "gpt-4o"]
+        )
+        self.assertEqual(args.inputs, ["a.txt", "b/*.txt"])
+        self.assertEqual((args.workers, args.concurrency), (2, 4))
+        self.assertTrue(args.resume)
+        self.assertEqual((args.provider, args.model), ("openai", "gpt-4o"))
+
+    def test_batch_subcommands(self):
+        args = build_parser().parse_args(["batch", "import", "batch_123", "--manifest", "m.json"])
+        self.assertEqual((args.batch_command, args.batch_id, args.manifest), ("import", "batch_123", "m.json"))
+
+    def test_transcribe_rejects_unknown_model(self):
+        with self.assertRaises(SystemExit):
+            build_parser().parse_args(["transcribe", "x.mp3", "--model", "tiny-unknown"])
+
+
+class TestCliInputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        for name in ("a_transkrypcja.txt", "b_transkrypcja.txt", "notes.md"):
+            with open(os.path.join(self.dir, name), "w", encoding="utf-8") as f:
+                f.write("x")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_expand_globs_dirs_and_duplicates(self):
+        pattern = os.path.join(self.dir, "*.txt")
+        files = expand_inputs([pattern, self.dir, os.path.join(self.dir, "missing.txt")], (".txt",))
+        self.assertEqual([os.path.basename(f) for f in files], ["a_transkrypcja.txt", "b_transkrypcja.txt"])
+
+    def test_native_download_codecs_are_media(self):
+        # Pobieranie z DOWNLOAD_AUDIO_CODEC="best" zostawia natywny kodek (.opus, .aac, .webm)
+        for name in ("wyklad.opus", "podcast.aac", "film.webm"):
+            with open(os.path.join(self.dir, name), "w") as f:
+                f.write("x")
+        files = expand_inputs([self.dir], MEDIA_EXTENSIONS)
+        self.assertEqual(sorted(os.path.basename(f) for f in files), ["film.webm", "podcast.aac", "wyklad.opus"])
+
+    def test_resume_freshness(self):
+        source = os.path.join(self.dir, "a_transkrypcja.txt")
+        output = os.path.join(self.dir, "out.jsonl")
+        self.assertFalse(is_up_to_date(output, source))
+
+        with open(output, "w") as f:
+            f.write("{}")
+        past = time.time() - 100
+        os.utime(source, (past, past))
+        self.assertTrue(is_up_to_date(output, source))
+
+        os.utime(source, None)
+        os.utime(output, (past, past))
+        self.assertFalse(is_up_to_date(output, source))
+
+    def test_split_frontmatter(self):
+        frontmatter, body = split_frontmatter("---\ntags: []\n---\n\n# Tytuł\n")
+        self.assertEqual(frontmatter, "---\ntags: []\n---\n")
+        self.assertEqual(body, "\n# Tytuł\n")
+        self.assertEqual(split_frontmatter("# Bez\n"), ("", "# Bez\n"))
+
+    def test_export_copies_and_skips_unchanged(self):
+        vault = os.path.join(self.dir, "vault")
+        os.makedirs(vault)
+        args = build_parser().parse_args(
+            ["export", os.path.join(self.dir, "*.md"), "--vault", vault, "--subfolder", "Sub"]
+        )
+        self.assertEqual(cmd_export(args, ConsoleLogger()), 0)
+        target = os.path.join(vault, "Sub", "notes.md")
+        self.assertTrue(os.path.exists(target))
+
+        mtime = os.path.getmtime(target)
+        self.assertEqual(cmd_export(args, ConsoleLogger()), 0)
+        self.assertEqual(os.path.getmtime(target), mtime)
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            build_parser().parse_args(["export", target, "--resume"])
+
+    def test_each_run_starts_with_fresh_routing_budget(self):
+        trace = get_routing_trace()
+        trace.spent = 4.99
+        missing_vault = os.path.join(self.dir, "brak")
+        self.assertEqual(main(["export", os.path.join(self.dir, "*.md"), "--vault", missing_vault]), 1)
+        self.assertEqual((trace.spent, trace.records), (0.0, []))
+
+    def test_tag_with_openai_provider_uses_openai_model(self):
+        note = os.path.join(self.dir, "notes.md")
+        with patch("src.agents.tagger.LLMEngine") as engine_cls:
+            engine = engine_cls.return_value
+            engine.provider, engine.router = "openai", None
+            engine.generate.return_value = "OSINT, VPN"
+            self.assertEqual(main(["tag", note, "--provider", "openai"]), 0)
+
+        kwargs = engine_cls.call_args.kwargs
+        self.assertEqual((kwargs["provider"], kwargs["model_name"]), ("openai", MODEL_TAGGER_OPENAI))
+        with open(note, encoding="utf-8") as f:
+            self.assertIn("tags: ['osint', 'vpn']", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
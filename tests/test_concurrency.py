@@ -0,0 +1,62 @@
+import threading
+import unittest
+
+import requests
+
+from src.core.concurrency import AdaptiveConcurrency
+from tests.fakes import FakeClock
+
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.controller = AdaptiveConcurrency("test", initial=2, max_limit=8, clock=self.clock)
+
+    def run_round(self, latency):
+        """Jedna runda: `limit` równoległych wywołań o danym opóźnieniu."""
+        started = [self.controller.acquire() for _ in range(self.controller.limit)]
+        self.clock.now += latency
+        for start in started:
+            self.controller.release(start)
+
+    def test_additive_increase_while_throughput_grows(self):
+        for _ in range(3):
+            self.run_round(1.0)  # stałe opóźnienie przy rosnącym limicie = rosnąca przepustowość
+        self.assertEqual(self.controller.limit, 5)
+
+    def test_holds_when_throughput_saturates(self):
+        # Backend przetwarza po jednym: opóźnienie rośnie proporcjonalnie do limitu
+        for _ in range(4):
+            self.run_round(1.0 * self.controller.limit / 2)
+        self.assertLessEqual(self.controller.limit, 3)
+
+    def test_multiplicative_decrease_once_per_overload(self):
+        self.controller.limit = 8
+        started = [self.controller.acquire() for _ in range(4)]
+        self.clock.now += 1
+        for start in started:
+            self.controller.release(start, error_kind="rate_limit")
+        self.assertEqual(self.controller.limit, 4)
+        self.assertEqual(self.controller.metrics()["decreases"], 1)
+
+    def test_slot_classifies_timeouts_and_blocks_at_limit(self):
+        self.controller.limit = 4
+        with self.assertRaises(requests.ReadTimeout):
+            with self.controller.slot():
+                raise requests.ReadTimeout()
+        self.assertEqual(self.controller.limit, 2)
+
+        self.controller.limit = 1
+        self.controller.acquire()
+        waiter = threading.Thread(target=self.controller.acquire)
+        waiter.start()
+        waiter.join(0.1)
+        self.assertTrue(waiter.is_alive())
+        self.controller.release(self.clock.now)
+        waiter.join(1)
+        self.assertFalse(waiter.is_alive())
+        self.assertIn("limit", self.controller.format())
+
+
+if __name__ == "__main__":
+    unittest.main()
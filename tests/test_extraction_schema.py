@@ -0,0 +1,91 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from pydantic import ValidationError
+
+from src.agents.extractor import ExtractionStats, KnowledgeExtractor
+from src.core.batch_manager import BatchManager
+from src.core.schema import EXTRACTION_FIELDS, CompactKnowledgeGraph, KnowledgeGraph
+from src.utils.prompts_config import EXTRACTION_PROMPT, EXTRACTION_PROMPT_COMPACT
+
+
+class TestExtractionSchema(unittest.TestCase):
+    def test_prompt_lists_registry_keys(self):
+        for field in EXTRACTION_FIELDS:
+            self.assertIn(f"- {field.name}:", EXTRACTION_PROMPT["system"])
+        self.assertNotIn("kluczowe_pojęcia", EXTRACTION_PROMPT["system"])
+
+    def test_polish_keys_validate_without_reask(self):
+        graph = KnowledgeGraph.model_validate({
+            "kluczowe_pojęcia": [{"termin": "Doxing", "definicja_i_kontekst": "Zbieranie danych."}],
+            "narzędzia_i_technologie": ["Sherlock: wyszukiwanie nicków", {"nazwa": "Maltego"}],
+            "praktyczne_wskazówki": "Używaj VPN",
+            "wnioski_i_ciekawostki": ["Metadane zdradzają lokalizację"],
+            "tematy": None,
+        })
+        self.assertEqual(graph.key_concepts[0].term, "Doxing")
+        self.assertEqual([t.name for t in graph.tools], ["Sherlock", "Maltego"])
+        self.assertEqual(graph.tools[0].description, "wyszukiwanie nicków")
+        self.assertEqual(graph.tips, ["Używaj VPN", "Metadane zdradzają lokalizację"])
+        self.assertEqual(graph.topics, [])
+
+    def test_reply_without_fields_is_invalid(self):
+        for data in ({}, {"foo": 1}, {"tematy": ["OSINT"]}):
+            with self.assertRaises(ValidationError):
+                KnowledgeGraph.model_validate(data)
+        with self.assertRaises(ValidationError):
+            CompactKnowledgeGraph.model_validate({})
+        self.assertEqual(KnowledgeGraph.model_json_schema()["required"], ["topics", "tools", "key_concepts", "tips"])
+
+    def test_batch_result_is_normalized(self):
+        content = json.dumps({"tematy": ["OSINT"], "narzędzia": [{"nazwa": "Shodan", "opis": "Skaner"}],
+                              "pojęcia": [], "wskazówki": []})
+        res = {"response": {"body": {"choices": [{"message": {"content": f"```json\n{content}\n```"}}]}}}
+        items = BatchManager._parse_result_content(res)
+        self.assertEqual(items, [{"topics": ["OSINT"], "tools": [{"name": "Shodan", "description": "Skaner"}],
+                                  "key_concepts": [], "tips": []}])
+        KnowledgeGraph.model_validate(items[0])
+
+    def test_stats_first_attempt_rate(self):
+        stats = ExtractionStats()
+        stats.record(1, 0, failed=False)
+        stats.record(1, 2, failed=False)
+        stats.record(3, 0, failed=True)
+        summary = stats.summary()
+        self.assertEqual(summary["first_attempt_valid"], 1)
+        self.assertAlmostEqual(summary["first_attempt_rate"], 0.333)
+        self.assertEqual((summary["reasks"], summary["retries"], summary["failures"]), (2, 2, 1))
+
+
+
+class TestCompactWireFormat(unittest.TestCase):
+    GRAPH = KnowledgeGraph(
+        topics=["OSINT"],
+        tools=[{"name": "Shodan", "description": "Wyszukiwarka urządzeń"}],
+        key_concepts=[{"term": "Doxing", "definition": "Zbieranie danych o osobie."}],
+        tips=["Używaj VPN"],
+        time_range="01:00 -> 02:00",
+    )
+
+    def test_round_trip_is_lossless_and_shorter(self):
+        compact = CompactKnowledgeGraph.from_graph(self.GRAPH)
+        wire = compact.model_dump_json()
+        self.assertEqual(CompactKnowledgeGraph.model_validate_json(wire).to_graph("01:00 -> 02:00"), self.GRAPH)
+        self.assertLess(len(wire), len(self.GRAPH.model_dump_json(exclude={"time_range"})))
+
+    def test_compact_prompt_uses_wire_keys(self):
+        for field in EXTRACTION_FIELDS:
+            self.assertIn(f"- {field.wire_key} ({field.name}):", EXTRACTION_PROMPT_COMPACT["system"])
+
+    def test_extractor_returns_knowledge_graph(self):
+        extractor = KnowledgeExtractor(provider="ollama", wire_format="compact")
+        compact = CompactKnowledgeGraph.from_graph(self.GRAPH)
+        with patch.object(extractor.llm, "generate_structured", return_value=compact) as generate:
+            graph = extractor.extract_knowledge("tekst", time_range="01:00 -> 02:00")
+        self.assertIs(generate.call_args.kwargs["response_model"], CompactKnowledgeGraph)
+        self.assertEqual(graph, self.GRAPH)
+
+
+if __name__ == "__main__":
+    unittest.main()
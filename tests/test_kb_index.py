@@ -0,0 +1,56 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from src.core.kb_index import KBIndex
+from src.core.kb_store import save_kb, kb_path_for
+
+
+class TestKBIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        save_kb(kb_path_for("a", self.dir), [{"topics": ["OSINT"], "tools": [], "key_concepts": [], "tips": ["x"]}])
+        save_kb(kb_path_for("b", self.dir), [{"topics": ["Krypto"], "tools": [], "key_concepts": [], "tips": []}] * 3)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_list_and_get_metrics(self):
+        index = KBIndex(self.dir)
+        files = index.list_files()
+        self.assertEqual(sorted(os.path.basename(f) for f in files), ["a_kb.jsonl", "b_kb.jsonl"])
+
+        entry = index.get(kb_path_for("b", self.dir))
+        self.assertEqual(entry["segments"], 3)
+        self.assertEqual(entry["topics"], ["Krypto"])
+
+    def test_refresh_reparses_only_changed_files(self):
+        index = KBIndex(self.dir)
+        index.list_files()
+
+        # Zmiana jednego pliku (inny rozmiar => unieważnienie po mtime/size)
+        time.sleep(0.01)
+        save_kb(kb_path_for("a", self.dir), [{"topics": ["Nowy"], "tools": [], "key_concepts": [], "tips": []}] * 2)
+
+        with patch.object(KBIndex, "_build_entry", wraps=KBIndex._build_entry) as build:
+            index.refresh()
+            index.get(kb_path_for("b", self.dir))
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(index.get(kb_path_for("a", self.dir))["segments"], 2)
+
+    def test_index_persisted_and_removed_files_dropped(self):
+        KBIndex(self.dir).list_files()
+        os.remove(kb_path_for("b", self.dir))
+
+        index = KBIndex(self.dir)
+        with patch.object(KBIndex, "_build_entry") as build:
+            files = index.list_files()
+        build.assert_not_called()
+        self.assertEqual([os.path.basename(f) for f in files], ["a_kb.jsonl"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.core.kb_store import (
+    kb_path_for, find_kb_path, save_kb, load_kb,
+    read_kb_header, read_kb_preview, is_kb_file, kb_base_name,
+)
+
+
+class TestKBStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.records = [
+            {
+                "topics": ["OSINT", "Maltego"],
+                "tools": [{"name": "Maltego", "description": "Grafy powiązań"}],
+                "key_concepts": [{"term": "OPSEC", "definition": "Bezpieczeństwo operacyjne"}],
+                "tips": ["Używaj VPN"],
+                "time_range": "00:00 -> 01:10",
+            },
+            {"topics": ["OSINT"], "tools": [], "key_concepts": [], "tips": ["Zapisuj źródła"]},
+            {"topics": ["Krypto"], "tools": [], "key_concepts": [], "tips": []},
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip_and_header(self):
+        path = save_kb(kb_path_for("wyklad", self.tmp.name), self.records)
+
+        self.assertTrue(path.endswith("wyklad_kb.jsonl"))
+        self.assertEqual(load_kb(path), self.records)
+
+        header = read_kb_header(path)
+        self.assertEqual(header["version"], 1)
+        self.assertEqual((header["segments"], header["concepts"], header["tools"], header["tips"]), (3, 1, 1, 2))
+        self.assertEqual(header["topics"][0], "OSINT")
+
+        self.assertEqual(read_kb_preview(path, 1), self.records[:1])
+
+    def test_compact_records_one_per_line(self):
+        path = save_kb(kb_path_for("wyklad", self.tmp.name), self.records)
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 1 + len(self.records))
+        self.assertNotIn(": ", lines[1])
+
+    def test_legacy_json_still_readable_and_replaced(self):
+        legacy_path = os.path.join(self.tmp.name, "stary_kb.json")
+        with open(legacy_path, "w", encoding="utf-8") as f:
+            json.dump(self.records, f, ensure_ascii=False, indent=2)
+
+        self.assertEqual(find_kb_path("stary", self.tmp.name), legacy_path)
+        self.assertEqual(load_kb(legacy_path), self.records)
+        self.assertEqual(read_kb_header(legacy_path)["segments"], 3)
+
+        new_path = save_kb(kb_path_for("stary", self.tmp.name), self.records[:1])
+        self.assertFalse(os.path.exists(legacy_path))
+        self.assertEqual(find_kb_path("stary", self.tmp.name), new_path)
+
+    def test_file_name_helpers(self):
+        self.assertTrue(is_kb_file("a_kb.jsonl"))
+        self.assertTrue(is_kb_file("a_kb.json"))
+        self.assertFalse(is_kb_file("a_transkrypcja.json"))
+        self.assertEqual(kb_base_name("/x/a.txt_kb.jsonl"), "a.txt")
+
+
+if __name__ == "__main__":
+    unittest.main()
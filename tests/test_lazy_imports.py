@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("torch", "faster_whisper", "yt_dlp", "openai", "instructor", "gradio")
+
+
+def imported_heavy_modules(code: str, env=None) -> list:
+    """Uruchamia kod w świeżym interpreterze i zwraca faktycznie załadowane ciężkie moduły."""
+    probe = (
+        f"{code}\n"
+        "import sys\n"
+        # Moduł z LazyLoader jest w sys.modules od razu, ale jego podmoduły dopiero po użyciu
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if any(k.startswith(m + '.') for k in sys.modules)))\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True,
+                          env={**os.environ, **(env or {})}, check=True)
+    return [m for m in proc.stdout.strip().split(",") if m]
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_core_modules_do_not_import_heavy_dependencies(self):
+        code = (
+            "import src.utils.config, src.core.gpu_manager, src.core.transcriber, "
+            "src.core.downloader, src.core.batch_manager, main_pipeline"
+        )
+        self.assertEqual(imported_heavy_modules(code), [])
+
+    def test_device_is_detected_on_first_use(self):
+        code = "from src.utils.config import DEVICE, COMPUTE_TYPE; assert (DEVICE, COMPUTE_TYPE) == ('cpu', 'int8')"
+        self.assertEqual(imported_heavy_modules(code, env={"TRANSKRYPCJE_DEVICE": "cpu"}), [])
+
+    def test_lazy_module_loads_on_attribute_access(self):
+        code = "from src.core import downloader; downloader.yt_dlp.YoutubeDL"
+        self.assertIn("yt_dlp", imported_heavy_modules(code))
+
+
+if __name__ == "__main__":
+    unittest.main()
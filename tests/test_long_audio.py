@@ -0,0 +1,64 @@
+import unittest
+
+from src.core.long_audio import AudioWindow, WINDOW_PAD, plan_windows, stitch_segments
+
+
+class TestPlanWindows(unittest.TestCase):
+    def test_short_audio_is_one_window(self):
+        windows = plan_windows([(0, 100)], duration=800, window=600)
+        self.assertEqual(windows, [AudioWindow(0.0, 800, 0.0, 800)])
+
+    def test_cuts_in_silence_near_target(self):
+        # Przerwy w mowie: 590-596 (środek 593) i 1190-1210 (środek 1200)
+        speech = [(0, 590), (596, 1190), (1210, 1900)]
+        windows = plan_windows(speech, duration=1900, window=600)
+
+        self.assertEqual([(w.own_start, w.own_end) for w in windows], [(0.0, 593.0), (593.0, 1200.0), (1200.0, 1900)])
+        self.assertEqual(windows[1].start, 593.0 - WINDOW_PAD)
+        self.assertEqual(windows[1].end, 1200.0 + WINDOW_PAD)
+
+    def test_hard_cut_without_silence(self):
+        windows = plan_windows([(0, 2000)], duration=2000, window=600)
+        self.assertEqual([w.own_end for w in windows], [600.0, 1200.0, 2000])
+
+
+class TestStitchSegments(unittest.TestCase):
+    def test_absolute_offsets_and_boundary_dedup(self):
+        windows = [AudioWindow(0, 602, 0, 600), AudioWindow(598, 1000, 600, 1000)]
+        results = [
+            [
+                {"start": 0.0, "end": 5.0, "text": "Początek."},
+                {"start": 596.0, "end": 599.5, "text": "Zdanie na granicy."},
+                {"start": 600.5, "end": 601.8, "text": "Już w następnym oknie"},
+            ],
+            [
+                # Zakładka: to samo zdanie rozpoznane też w drugim oknie
+                {"start": 0.0, "end": 1.6, "text": "zdanie na granicy"},
+                {"start": 2.4, "end": 3.8, "text": "Już w następnym oknie."},
+                {"start": 10.0, "end": 12.0, "text": "Dalej."},
+            ],
+        ]
+        stitched = stitch_segments(windows, results)
+
+        self.assertEqual(
+            [(s["start"], s["end"], s["text"]) for s in stitched],
+            [
+                (0.0, 5.0, "Początek."),
+                (596.0, 599.5, "Zdanie na granicy."),
+                (600.4, 601.8, "Już w następnym oknie."),
+                (608.0, 610.0, "Dalej."),
+            ],
+        )
+
+    def test_repeats_inside_window_are_kept(self):
+        windows = [AudioWindow(0, 602, 0, 600)]
+        results = [[
+            {"start": 10.0, "end": 10.6, "text": "Tak."},
+            {"start": 11.0, "end": 11.6, "text": "Tak."},
+        ]]
+        stitched = stitch_segments(windows, results)
+        self.assertEqual([(s["start"], s["text"]) for s in stitched], [(10.0, "Tak."), (11.0, "Tak.")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+
+from src.core.obsidian_sync import (
+    MANIFEST_NAME, export_to_obsidian, merge_user_fields, parse_frontmatter, sync_directory, sync_note,
+)
+
+NOTE = """---
+tags: ['osint']
+topic: "Temat"
+created: 2025-01-01 10:00
+reviewed: false
+---
+
+# Treść {version}
+"""
+
+
+class TestFrontmatterMerge(unittest.TestCase):
+    def test_parse_keeps_multiline_values(self):
+        fields, body = parse_frontmatter("---\naliases:\n  - A\n  - B\nreviewed: false\n---\nTreść")
+        self.assertEqual([k for k, _ in fields], ["aliases", "reviewed"])
+        self.assertEqual(fields[0][1], "aliases:\n  - A\n  - B")
+        self.assertEqual(body, "Treść")
+
+    def test_user_fields_survive_regeneration(self):
+        existing = NOTE.format(version=1).replace("reviewed: false", "reviewed: true\nmoja_ocena: 5")
+        new = NOTE.format(version=2).replace("created: 2025-01-01 10:00", "created: 2025-02-02 12:00")
+
+        merged = merge_user_fields(new, existing)
+        self.assertIn("reviewed: true", merged)
+        self.assertIn("moja_ocena: 5", merged)
+        self.assertIn("created: 2025-01-01 10:00", merged)
+        self.assertIn("# Treść 2", merged)
+
+    def test_note_without_frontmatter_is_untouched(self):
+        self.assertEqual(merge_user_fields("# Bez\n", NOTE.format(version=1)), "# Bez\n")
+
+
+class TestObsidianSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "output")
+        self.vault = os.path.join(self.tmp.name, "vault")
+        os.makedirs(self.source)
+        os.makedirs(self.vault)
+        for i in range(3):
+            self.write_source(f"n{i}.md", NOTE.format(version=1))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_source(self, name, content):
+        with open(os.path.join(self.source, name), "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def test_only_changed_notes_are_written(self):
+        target = os.path.join(self.vault, "Sub")
+        self.assertEqual(sync_directory(self.source, target)["written"], 3)
+        self.assertTrue(os.path.exists(os.path.join(target, MANIFEST_NAME)))
+
+        report = sync_directory(self.source, target)
+        self.assertEqual((report["written"], report["skipped"]), (0, 3))
+
+        # Użytkownik oznacza notatkę jako przejrzaną, potem źródło się zmienia
+        reviewed_path = os.path.join(target, "n1.md")
+        with open(reviewed_path, "r", encoding="utf-8") as f:
+            edited = f.read().replace("reviewed: false", "reviewed: true")
+        with open(reviewed_path, "w", encoding="utf-8") as f:
+            f.write(edited)
+        self.write_source("n1.md", NOTE.format(version=2))
+
+        report = sync_directory(self.source, target)
+        self.assertEqual((report["written"], report["skipped"]), (1, 2))
+        with open(reviewed_path, "r", encoding="utf-8") as f:
+            content = f.read()
+        self.assertIn("reviewed: true", content)
+        self.assertIn("# Treść 2", content)
+        self.assertEqual([n for n in os.listdir(target) if n.endswith(".tmp")], [])
+
+    def test_sync_note_and_export_to_obsidian(self):
+        path, written = sync_note(NOTE.format(version=1), "gui.md", self.vault)
+        self.assertTrue(written)
+        self.assertFalse(sync_note(NOTE.format(version=1), "gui.md", self.vault)[1])
+
+        report = export_to_obsidian(os.path.join(self.source, "n0.md"), self.vault, "Sub")
+        self.assertEqual(report["written"], 1)
+        self.assertIsNone(export_to_obsidian(self.source, os.path.join(self.tmp.name, "brak")))
+
+
+if __name__ == "__main__":
+    unittest.main()
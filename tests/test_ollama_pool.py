@@ -0,0 +1,130 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from src.core.ollama_pool import OllamaPool, model_key
+from tests.fakes import FakeClock
+
+
+def fake_client(host, models=("qwen2.5:7b",), resident=(), up=True):
+    client = MagicMock(host=host)
+    if up:
+        client.list_models.return_value = list(models)
+        client.running_models.return_value = list(resident)
+    else:
+        client.list_models.side_effect = requests.ConnectionError("odmowa połączenia")
+    return client
+
+
+class TestOllamaPool(unittest.TestCase):
+    def make_pool(self, *clients):
+        self.clock = FakeClock()
+        by_host = {c.host: c for c in clients}
+        return OllamaPool(list(by_host), check_interval=15, clock=self.clock, client_factory=by_host.__getitem__)
+
+    def test_prefers_resident_model_then_spreads_by_load(self):
+        pool = self.make_pool(
+            fake_client("http://gpu1:11434"),
+            fake_client("http://gpu2:11434", resident=["qwen2.5:7b"]),
+        )
+        hosts = [pool._acquire("qwen2.5:7b").url for _ in range(3)]
+        # Załadowany model wygrywa remis, ale nie blokuje drugiej karty
+        self.assertEqual(hosts, ["http://gpu2:11434", "http://gpu2:11434", "http://gpu1:11434"])
+
+    def test_skips_hosts_without_model(self):
+        pool = self.make_pool(
+            fake_client("http://gpu1:11434", models=["llama3:8b"]),
+            fake_client("http://gpu2:11434"),
+        )
+        seen = {pool.call("qwen2.5:7b", lambda host: host) for _ in range(3)}
+        self.assertEqual(seen, {"http://gpu2:11434"})
+
+    def test_failover_marks_host_down_until_next_check(self):
+        pool = self.make_pool(
+            fake_client("http://gpu1:11434", resident=["qwen2.5:7b"]),
+            fake_client("http://gpu2:11434"),
+        )
+        calls = []
+
+        def chat(host):
+            calls.append(host)
+            if host == "http://gpu1:11434":
+                raise requests.ConnectionError("host padł")
+            return "ok"
+
+        self.assertEqual(pool.call("qwen2.5:7b", chat), "ok")
+        self.assertEqual(calls, ["http://gpu1:11434", "http://gpu2:11434"])
+        self.assertFalse(pool.hosts[0].healthy)
+
+        pool.call("qwen2.5:7b", chat)
+        self.assertEqual(calls[-1], "http://gpu2:11434")
+
+        # Po check_interval health check przywraca host
+        self.clock.now = 20
+        pool._acquire("qwen2.5:7b")
+        self.assertTrue(pool.hosts[0].healthy)
+
+    def test_all_hosts_down_raises_last_error(self):
+        pool = self.make_pool(fake_client("http://gpu1:11434", up=False), fake_client("http://gpu2:11434", up=False))
+
+        def chat(host):
+            raise requests.ConnectionError(host)
+
+        with self.assertRaises(requests.ConnectionError):
+            pool.call("qwen2.5:7b", chat)
+        self.assertEqual([m["in_flight"] for m in pool.metrics()], [0, 0])
+
+    def test_fatal_errors_are_not_retried_elsewhere(self):
+        pool = self.make_pool(fake_client("http://gpu1:11434"), fake_client("http://gpu2:11434"))
+        fn = MagicMock(side_effect=ValueError("zły prompt"))
+        self.assertRaises(ValueError, pool.call, "qwen2.5:7b", fn)
+        self.assertEqual(fn.call_count, 1)
+        self.assertTrue(all(m["healthy"] for m in pool.metrics()))
+
+    def test_concurrent_calls_use_every_host(self):
+        pool = self.make_pool(*(fake_client(f"http://gpu{i}:11434") for i in range(3)))
+        barrier = threading.Barrier(6)
+        used = []
+
+        def chat(host):
+            used.append(host)
+            barrier.wait(timeout=5)
+
+        threads = [threading.Thread(target=pool.call, args=("qwen2.5:7b", chat)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(used.count(url) for url in pool.urls), [2, 2, 2])
+
+    def test_single_host_pool_skips_health_checks(self):
+        client = fake_client("http://localhost:11434")
+        pool = OllamaPool(["localhost:11434"], client_factory=lambda host: client)
+        self.assertEqual(pool.call("qwen2.5", lambda host: host), "http://localhost:11434")
+        client.list_models.assert_not_called()
+        self.assertEqual(model_key("qwen2.5"), "qwen2.5:latest")
+
+
+class TestEngineOnPool(unittest.TestCase):
+    def test_structured_calls_are_routed_through_pool(self):
+        from src.core.llm_engine import LLMEngine
+        from src.core.schema import KnowledgeGraph
+
+        engine = LLMEngine("extractor", provider="ollama")
+        engine.pool = MagicMock()
+        engine.pool.call.side_effect = lambda model, fn: fn("http://gpu2:11434")
+        reply = MagicMock()
+        reply.chat.return_value = {"message": {"content": '{"topics": ["GPU"], "tools": [], "key_concepts": [], "tips": []}'}}
+        engine.structured_mode = "schema"
+
+        with patch("src.core.llm_engine.get_ollama_client", return_value=reply) as get_client:
+            graph = engine.generate_structured("system", "tekst", KnowledgeGraph)
+
+        self.assertEqual(graph.topics, ["GPU"])
+        get_client.assert_called_with("http://gpu2:11434")
+
+
+if __name__ == "__main__":
+    unittest.main()
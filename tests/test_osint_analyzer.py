@@ -0,0 +1,114 @@
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from src.core.ioc_extractor import extract_iocs, format_iocs_markdown
+from src.core.osint_analyzer import OsintAnalyzer, REPORT_NOTES_BUDGET, CONDENSE_GROUP_CHARS
+
+
+class TestIocExtractor(unittest.TestCase):
+    def test_extracts_all_categories(self):
+        text = (
+            "Wejdź na https://evil-site.com/login?x=1, potem example.org. Serwer 192.168.1.10, "
+            "zły adres 999.1.1.1 i 2001:db8::1 o 12:30:45. Pisz na jan.kowalski@firma.pl. "
+            "MD5 d41d8cd98f00b204e9800998ecf8427e, portfel bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq."
+        )
+        iocs = extract_iocs(text)
+
+        self.assertEqual(iocs["urls"], ["https://evil-site.com/login?x=1"])
+        self.assertEqual(iocs["domains"], ["evil-site.com", "example.org", "firma.pl"])
+        self.assertEqual(iocs["ipv4"], ["192.168.1.10"])
+        self.assertEqual(iocs["ipv6"], ["2001:db8::1"])
+        self.assertEqual(iocs["emails"], ["jan.kowalski@firma.pl"])
+        self.assertEqual(iocs["hashes"], ["d41d8cd98f00b204e9800998ecf8427e"])
+        self.assertEqual(iocs["wallets"], ["bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq"])
+
+    def test_ignores_file_names_and_abbreviations(self):
+        iocs = extract_iocs("Uruchom skrypt.py, m.in. raport.pdf i wersja 1.2.3 [01:09 -> 01:22]")
+        self.assertEqual(iocs["domains"], [])
+        self.assertEqual(iocs["ipv4"], [])
+        self.assertEqual(iocs["ipv6"], [])
+
+    def test_markdown_section(self):
+        section = format_iocs_markdown(extract_iocs("adres 10.0.0.1 i 10.0.0.1"))
+        self.assertIn("## IoC / Ślady", section)
+        self.assertEqual(section.count("`10.0.0.1`"), 1)
+
+
+class TestOsintAnalyzerMap(unittest.TestCase):
+    def test_parallel_map_keeps_chunk_order(self):
+        analyzer = OsintAnalyzer(max_workers=4)
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def fake_analyze(text, context_header, model):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(random.uniform(0.01, 0.05))
+            with lock:
+                active -= 1
+            return f"notatka {context_header}"
+
+        with patch.object(analyzer, "_analyze_chunk_stream", side_effect=fake_analyze):
+            notes = analyzer._map_chunks([f"fragment {i}" for i in range(12)], "model")
+
+        self.assertEqual(notes, [f"notatka [FRAGMENT {i + 1}/12]" for i in range(12)])
+        self.assertGreater(peak, 1)
+        self.assertLessEqual(peak, 4)
+
+    def test_report_gets_deterministic_ioc_section(self):
+        analyzer = OsintAnalyzer(max_workers=2)
+        with tempfile.TemporaryDirectory() as tmp:
+            input_file = os.path.join(tmp, "in.txt")
+            output_file = os.path.join(tmp, "raport.md")
+            with open(input_file, "w", encoding="utf-8") as f:
+                f.write("Atakujący używał domeny malware-c2.net i IP 203.0.113.7.")
+
+            with patch.object(analyzer, "_analyze_chunk_stream", return_value="- NARZĘDZIA: nmap"), \
+                    patch.object(analyzer, "_generate_final_report", return_value="# Raport"):
+                self.assertTrue(analyzer.analyze_transcription(input_file, output_file))
+
+            with open(output_file, encoding="utf-8") as f:
+                report = f.read()
+
+        self.assertTrue(report.startswith("# Raport"))
+        self.assertIn("`malware-c2.net`", report)
+        self.assertIn("`203.0.113.7`", report)
+
+
+class TestOsintCondenseTree(unittest.TestCase):
+    def test_condenses_all_notes_within_budget(self):
+        progress = []
+        analyzer = OsintAnalyzer(max_workers=4, progress_callback=lambda p, s: progress.append(p))
+        notes = [f"NOTA{i:03d} " + "x" * 1500 for i in range(200)]
+
+        def fake_condense(text, model):
+            # Model "scala" grupę: zostawia identyfikatory notatek, wyrzuca resztę
+            self.assertLessEqual(len(text), CONDENSE_GROUP_CHARS)
+            return " ".join(w for w in text.split() if w.startswith("NOTA"))
+
+        with patch.object(analyzer, "_condense_notes", side_effect=fake_condense):
+            result = analyzer._condense_tree(notes, "model")
+
+        self.assertLessEqual(len(result), REPORT_NOTES_BUDGET)
+        # Nic nie zostało ucięte - każda notatka przeszła przez kondensację
+        self.assertEqual(sorted(set(result.split()) - {"---"}), [f"NOTA{i:03d}" for i in range(200)])
+        self.assertEqual(progress, sorted(progress))
+        self.assertTrue(all(70 <= p <= 90 for p in progress))
+
+    def test_short_notes_skip_condensation(self):
+        analyzer = OsintAnalyzer()
+        with patch.object(analyzer, "_condense_notes") as condense:
+            self.assertEqual(analyzer._condense_tree(["a", "b"], "model"), "a\n\n---\n\nb")
+        condense.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.core.llm_engine import LLMEngine, build_messages
+from src.core.ollama_client import OllamaClient, model_options
+from src.core.schema import KnowledgeGraph
+from src.utils.config import OLLAMA_NUM_CTX, OLLAMA_MODEL_NUM_CTX
+
+
+def session_with_reply(content="{}"):
+    session = MagicMock()
+    session.post.return_value.json.return_value = {"message": {"content": content}}
+    return session
+
+
+class TestModelOptions(unittest.TestCase):
+    def test_num_ctx_is_fixed_per_model(self):
+        qwen_ctx = OLLAMA_MODEL_NUM_CTX["qwen2.5:7b"]
+        self.assertEqual(model_options("qwen2.5:7b", {"num_ctx": 8192, "temperature": 0.2}),
+                         {"num_ctx": qwen_ctx, "temperature": 0.2})
+        self.assertEqual(model_options("qwen2.5:7b:latest")["num_ctx"], qwen_ctx)
+        self.assertEqual(model_options("bielik-writer")["num_ctx"], OLLAMA_NUM_CTX)
+
+    def test_client_applies_options_except_on_unload(self):
+        session = session_with_reply()
+        client = OllamaClient("localhost:11434", session=session)
+
+        client.chat("qwen2.5:7b", [{"role": "user", "content": "x"}], options={"num_ctx": 8192})
+        client.generate("qwen2.5:7b", "x")
+        chat_payload, generate_payload = (c.kwargs["json"] for c in session.post.call_args_list)
+        self.assertEqual(chat_payload["options"], generate_payload["options"])
+
+        client.unload("qwen2.5:7b")
+        self.assertNotIn("options", session.post.call_args.kwargs["json"])
+
+
+class TestMessageLayout(unittest.TestCase):
+    def test_prefix_is_byte_identical(self):
+        first = build_messages("Instrukcje\r\nSTRUKTURA:\n", "fragment 1")
+        second = build_messages("\nInstrukcje\nSTRUKTURA:", "fragment 2\r\n")
+        self.assertEqual(json.dumps(first[0]), json.dumps(second[0]))
+        self.assertEqual(second[1]["content"], "fragment 2")
+        # Nowe słowniki przy każdym wywołaniu (instructor modyfikuje je w miejscu)
+        self.assertIsNot(first[0], build_messages("Instrukcje\nSTRUKTURA:", "x")[0])
+
+    def test_constrained_and_instructor_paths_share_options(self):
+        engine = LLMEngine("extractor", provider="ollama")
+        engine.structured_mode = "schema"
+        engine.client = MagicMock()
+        engine.client.chat.completions.create.return_value = KnowledgeGraph(topics=[], tools=[], key_concepts=[], tips=[])
+        session = session_with_reply('{"topics": ["uci')  # ucięta odpowiedź -> instructor
+        engine.pool = MagicMock()
+        engine.pool.call.side_effect = lambda model, fn: fn(engine.ollama_url)
+
+        with patch("src.core.llm_engine.get_ollama_client",
+                   return_value=OllamaClient(engine.ollama_url, session=session)):
+            engine.generate_structured("  system\r\n", "tekst", KnowledgeGraph)
+
+        native = session.post.call_args.kwargs["json"]
+        compat = engine.client.chat.completions.create.call_args.kwargs
+        self.assertEqual(native["options"]["num_ctx"], compat["extra_body"]["options"]["num_ctx"])
+        self.assertEqual(native["messages"], compat["messages"])
+
+
+if __name__ == "__main__":
+    unittest.main()
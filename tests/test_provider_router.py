@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from src.core.provider_router import ProviderRouter, RoutingTrace, decide, estimate_cost
+from src.core.schema import KnowledgeGraph
+
+MESSAGES = [{"role": "system", "content": "system"}, {"role": "user", "content": "x" * 4000}]
+
+
+def fake_engine(model, backend):
+    engine = MagicMock(model=model, backend=backend, last_parse_errors=0)
+    engine.pool.urls = ["http://localhost:11434"]
+    engine.concurrency.waiting = 0
+    return engine
+
+
+@patch("src.core.provider_router.OPENAI_API_KEY", "sk-test")
+class TestProviderRouter(unittest.TestCase):
+    def setUp(self):
+        self.trace = RoutingTrace(path="")
+        self.local = fake_engine("qwen2.5:7b", f"ollama:test-{self.id()}")
+        self.cloud = fake_engine("gpt-4o-mini", "openai")
+
+    def make_router(self, stage="writer", vram=None, **kwargs):
+        return ProviderRouter(stage, self.local, lambda: self.cloud, trace=self.trace,
+                              vram_probe=lambda: vram, **kwargs)
+
+    def test_local_by_default_and_policy_overrides(self):
+        self.local.generate.return_value = "lokalnie"
+        self.assertEqual(self.make_router().run(MESSAGES, lambda e: e.generate("s", "u")), "lokalnie")
+        self.assertEqual(self.trace.records[-1]["provider"], "ollama")
+        self.assertEqual(self.trace.records[-1]["cost_usd"], 0.0)
+
+        self.cloud.generate.return_value = "chmura"
+        self.make_router(policy="openai").run(MESSAGES, lambda e: e.generate("s", "u"))
+        self.assertEqual(self.trace.records[-1]["provider"], "openai")
+        self.assertGreater(self.trace.spent, 0)
+
+    def test_spills_to_cloud_on_queue_and_busy_gpu(self):
+        self.local.concurrency.waiting = 1
+        self.assertEqual(self.make_router("writer").route(1000).provider, "openai")
+        # Ekstrakcja nie przelewa kolejki do chmury, ale ucieka przed zajętym GPU
+        self.assertEqual(self.make_router("extractor").route(1000).provider, "ollama")
+        decision = self.make_router("extractor", vram=0.4).route(1000)
+        self.assertEqual(decision.provider, "openai")
+        self.assertIn("GPU", decision.reason)
+
+    def test_transient_local_error_falls_back_to_cloud(self):
+        self.local.generate_structured.side_effect = requests.ConnectionError("odmowa połączenia")
+        self.cloud.generate_structured.return_value = KnowledgeGraph(topics=["OSINT"], tools=[], key_concepts=[], tips=[])
+
+        graph = self.make_router("extractor").run(
+            MESSAGES, lambda e: e.generate_structured("s", "u", KnowledgeGraph))
+
+        self.assertEqual(graph.topics, ["OSINT"])
+        first, second = self.trace.records
+        self.assertEqual((first["provider"], first["error"]), ("ollama", "connection"))
+        self.assertEqual(second["provider"], "openai")
+        self.assertTrue(second["reason"].startswith("fallback"))
+
+    def test_budget_keeps_calls_local(self):
+        self.local.generate.side_effect = requests.ConnectionError("odmowa połączenia")
+        router = self.make_router(budget=0.0)
+        self.assertEqual(router.route(1000).reason, "chmura niedostępna (klucz/budżet)")
+        self.assertRaises(requests.ConnectionError, router.run, MESSAGES, lambda e: e.generate("s", "u"))
+        self.cloud.generate.assert_not_called()
+
+    def test_summary_and_trace_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "routing.jsonl")
+            trace = RoutingTrace(path=path)
+            trace.record("writer", "openai", "gpt-4o-mini", "kolejka lokalna: 2", 2.0, 1000, 500)
+            trace.record("writer", "ollama", "bielik-writer", "lokalnie", 8.0, 1000, 500, error="timeout")
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual([json.loads(line)["provider"] for line in f], ["openai", "ollama"])
+
+        summary = trace.summary()
+        self.assertEqual(summary["writer/ollama"]["errors"], 1)
+        self.assertAlmostEqual(summary["writer/openai"]["cost_usd"], estimate_cost("gpt-4o-mini", 1000, 500))
+        self.assertIn("[ROUTER] writer/openai: wywołania 1", trace.format())
+
+
+class TestDecide(unittest.TestCase):
+    def test_signals(self):
+        self.assertEqual(decide("auto").provider, "ollama")
+        self.assertEqual(decide("auto", local_circuit="open").provider, "openai")
+        self.assertEqual(decide("auto", local_circuit="open", cloud_ready=False).provider, "ollama")
+        self.assertEqual(decide("auto", local_waiting=3, spill_at=None).provider, "ollama")
+        self.assertEqual(decide("ollama", free_vram_gb=0.1).provider, "ollama")
+
+
+class TestEngineRouting(unittest.TestCase):
+    def test_auto_engine_delegates_and_counts_parse_errors(self):
+        from src.core.llm_engine import LLMEngine
+
+        engine = LLMEngine("extractor", provider="auto")
+        self.assertTrue(engine.backend.startswith("auto:ollama:"))
+        self.assertIs(engine.concurrency, engine.router.local.concurrency)
+
+        local = fake_engine("qwen2.5:7b", "ollama:test-engine")
+        local.last_parse_errors = 2
+        local.generate_structured.return_value = KnowledgeGraph(topics=[], tools=[], key_concepts=[], tips=[])
+        engine.router = ProviderRouter("extractor", local, MagicMock(), trace=RoutingTrace(path=""),
+                                       vram_probe=lambda: None)
+        engine.generate_structured("s", "u", KnowledgeGraph)
+        self.assertEqual(engine.last_parse_errors, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import MagicMock
+
+import httpx
+
+from src.core.llm_engine import LLMEngine
+from src.core.rate_limiter import RateLimiter, estimate_tokens, parse_reset
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.time = FakeTime()
+        self.limiter = RateLimiter("test", rpm=60, tpm=6000, clock=self.time.clock, sleep=self.time.sleep)
+
+    def test_sustained_rate_matches_limits(self):
+        # 120 requestów po 100 tokenów: limitem jest RPM (60/min) -> ~1 min ponad pełny kubełek
+        for _ in range(120):
+            self.limiter.acquire(100)
+        self.assertAlmostEqual(self.time.now, 60.0, delta=1.0)
+
+        # Tokeny: 3000 na request przy TPM 6000 -> 2 requesty na minutę
+        start = self.time.now
+        for _ in range(4):
+            self.limiter.acquire(3000)
+        self.assertGreaterEqual(self.time.now - start, 60.0)
+
+    def test_headers_and_429_throttle_all_calls(self):
+        self.limiter.update_from_headers({
+            "x-ratelimit-limit-requests": "30", "x-ratelimit-remaining-requests": "0",
+        })
+        self.assertEqual(self.limiter.requests.capacity, 30)
+        self.assertAlmostEqual(self.limiter.acquire(), 2.0, places=3)
+
+        response = httpx.Response(429, headers={"retry-after": "5"})
+        self.limiter.on_response(response)
+        self.assertGreaterEqual(self.limiter.acquire(), 5.0)
+
+    def test_helpers(self):
+        self.assertEqual(parse_reset("6m0s"), 360.0)
+        self.assertEqual(parse_reset("20ms"), 0.02)
+        self.assertEqual(parse_reset("1.5"), 1.5)
+        self.assertEqual(estimate_tokens([{"content": "x" * 400}], output_tokens=100), 204)
+
+
+class TestEngineThrottling(unittest.TestCase):
+    def test_openai_calls_go_through_shared_limiter(self):
+        engine = LLMEngine("writer", provider="openai")
+        self.assertIs(engine.limiter, LLMEngine("extractor", provider="openai").limiter)
+
+        engine.limiter = MagicMock()
+        engine.raw_client = MagicMock()
+        engine.generate("system", "treść")
+        engine.limiter.acquire.assert_called_once()
+
+        # Próby instructora (hook completion:kwargs) też pobierają z limitera
+        engine.client.hooks.emit_completion_arguments(messages=[{"role": "user", "content": "x" * 40}])
+        self.assertEqual(engine.limiter.acquire.call_count, 2)
+
+    def test_ollama_is_not_throttled(self):
+        self.assertIsNone(LLMEngine("extractor", provider="ollama").limiter)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import json
+import random
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+from pydantic import ValidationError
+
+from src.agents.extractor import KnowledgeExtractor
+from src.core.retry_policy import CircuitBreaker, CircuitOpenError, backoff_delay, classify_error
+from src.core.schema import KnowledgeGraph
+from tests.fakes import FakeClock
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+class TestClassification(unittest.TestCase):
+    def test_error_classes(self):
+        try:
+            KnowledgeGraph.model_validate({"tools": [{"description": "bez nazwy"}]})
+        except ValidationError as e:
+            validation = e
+        self.assertEqual(classify_error(validation), "validation")
+        self.assertEqual(classify_error(json.JSONDecodeError("x", "", 0)), "validation")
+        self.assertEqual(classify_error(requests.ReadTimeout()), "timeout")
+        self.assertEqual(classify_error(requests.ConnectionError()), "connection")
+        self.assertEqual(classify_error(http_error(429)), "rate_limit")
+        self.assertEqual(classify_error(http_error(503)), "server")
+        self.assertEqual(classify_error(http_error(404)), "fatal")
+        self.assertEqual(classify_error(CircuitOpenError("x", 1)), "circuit")
+
+        wrapped = RuntimeError("opakowanie")
+        wrapped.__cause__ = requests.ConnectionError()
+        self.assertEqual(classify_error(wrapped), "connection")
+
+    def test_backoff_has_jitter_and_cap(self):
+        rng = random.Random(1)
+        delays = [backoff_delay(3, base=1.0, cap=5.0, rng=rng) for _ in range(50)]
+        self.assertTrue(all(0 <= d <= 5.0 for d in delays))
+        self.assertGreater(len(set(delays)), 1)
+        self.assertEqual(backoff_delay(0, retry_after=7.0, cap=5.0), 5.0)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_then_probes_once(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertRaises(CircuitOpenError, breaker.before_call)
+
+        clock.now = 10
+        breaker.before_call()  # wywołanie próbne
+        self.assertRaises(CircuitOpenError, breaker.before_call)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+        clock.now = 20
+        breaker.before_call()
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+
+@patch("src.agents.extractor.time.sleep")
+class TestExtractorRetries(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.extractor = KnowledgeExtractor(provider="ollama")
+        self.extractor.breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=10, clock=self.clock)
+        self.llm = self.extractor.llm = MagicMock(last_parse_errors=0)
+        self.llm.concurrency.max_limit = 1
+
+    def test_backend_down_fails_fast_and_requeues(self, sleep):
+        self.llm.generate_structured.side_effect = requests.ConnectionError("odmowa połączenia")
+        chunks = [(f"fragment {i}", f"0{i}:00 -> 0{i}:30") for i in range(4)]
+
+        def recover_after_cooldown(seconds):
+            self.clock.now += seconds
+            self.llm.generate_structured.side_effect = lambda **kwargs: KnowledgeGraph(topics=["OK"], tools=[], key_concepts=[], tips=[])
+
+        sleep.side_effect = lambda seconds: recover_after_cooldown(seconds) if seconds >= 10 else None
+        graphs = self.extractor.extract_chunks(chunks)
+
+        # 3 próby pierwszego fragmentu otwierają obwód; reszta bez wywołań LLM
+        self.assertEqual(self.llm.generate_structured.call_count, 3 + 4)
+        self.assertEqual([g.topics for g in graphs], [["OK"]] * 4)
+        self.assertEqual(graphs[2].time_range, "02:00 -> 02:30")
+
+    def test_packed_failures_are_requeued(self, sleep):
+        self.llm.generate_structured.side_effect = requests.ConnectionError("odmowa połączenia")
+        items = [(f"plik#{i}", f"fragment {i}", f"0{i}:00 -> 0{i}:30") for i in range(4)]
+
+        def recover_after_cooldown(seconds):
+            self.clock.now += seconds
+            self.llm.generate_structured.side_effect = lambda **kwargs: KnowledgeGraph(topics=["OK"], tools=[], key_concepts=[], tips=[])
+
+        sleep.side_effect = lambda seconds: recover_after_cooldown(seconds) if seconds >= 10 else None
+        graphs = self.extractor.extract_packed(items)
+
+        # Pakiet otwiera obwód, fragmenty osobno odpadają bez wywołań, potem ponowienie każdego
+        self.assertEqual(self.llm.generate_structured.call_count, 3 + 4)
+        self.assertEqual({key: g.topics for key, g in graphs.items()}, {key: ["OK"] for key, _, _ in items})
+        self.assertEqual(graphs["plik#2"].time_range, "02:00 -> 02:30")
+
+    def test_validation_error_reasks_immediately_with_feedback(self, sleep):
+        try:
+            KnowledgeGraph.model_validate({"tools": [{"description": "bez nazwy"}]})
+        except ValidationError as e:
+            error = e
+        self.llm.generate_structured.side_effect = [error, KnowledgeGraph(topics=["OK"], tools=[], key_concepts=[], tips=[])]
+
+        graph = self.extractor.extract_knowledge("tekst", time_range="00:00 -> 00:30")
+        self.assertEqual(graph.topics, ["OK"])
+        sleep.assert_not_called()
+        second_prompt = self.llm.generate_structured.call_args_list[1].kwargs["user_prompt"]
+        self.assertIn("nie przeszła walidacji", second_prompt)
+        self.assertEqual(self.extractor.breaker.state, "closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
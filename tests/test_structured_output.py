@@ -0,0 +1,52 @@
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.core.llm_engine import LLMEngine, response_schema
+from src.core.schema import EXTRACTION_FIELDS, KnowledgeGraph
+
+
+def ollama_reply(content):
+    client = MagicMock()
+    client.chat.return_value = {"message": {"content": content}}
+    return client
+
+
+class TestConstrainedDecoding(unittest.TestCase):
+    def setUp(self):
+        self.engine = LLMEngine("extractor", provider="ollama")
+        self.engine.structured_mode = "schema"
+        self.engine.client = MagicMock()
+
+    def test_schema_is_sent_as_format_and_parsed_without_reask(self):
+        client = ollama_reply(json.dumps({"topics": ["OSINT"], "tools": [{"name": "Shodan", "description": "Skaner"}],
+                                          "key_concepts": [], "tips": []}))
+        with patch("src.core.llm_engine.get_ollama_client", return_value=client):
+            graph = self.engine.generate_structured("system", "tekst", KnowledgeGraph)
+
+        self.assertEqual(graph.tools[0].name, "Shodan")
+        self.assertEqual(client.chat.call_args.kwargs["format"], KnowledgeGraph.model_json_schema())
+        self.assertIs(response_schema(KnowledgeGraph), response_schema(KnowledgeGraph))
+        self.assertEqual(self.engine.last_parse_errors, 0)
+        self.engine.client.chat.completions.create.assert_not_called()
+
+    def test_format_payload_requires_extraction_fields(self):
+        client = ollama_reply(json.dumps({"topics": [], "tools": [], "key_concepts": [], "tips": []}))
+        with patch("src.core.llm_engine.get_ollama_client", return_value=client):
+            self.engine.generate_structured("system", "tekst", KnowledgeGraph)
+
+        schema = client.chat.call_args.kwargs["format"]
+        self.assertEqual(set(schema["required"]), {f.name for f in EXTRACTION_FIELDS})
+        self.assertNotIn("time_range", schema["required"])
+
+    def test_invalid_output_falls_back_to_instructor(self):
+        self.engine.client.chat.completions.create.return_value = KnowledgeGraph(topics=[], tools=[], key_concepts=[], tips=[])
+        with patch("src.core.llm_engine.get_ollama_client", return_value=ollama_reply('{"topics": ["uci')):
+            self.engine.generate_structured("system", "tekst", KnowledgeGraph)
+
+        self.assertEqual(self.engine.last_parse_errors, 1)
+        self.engine.client.chat.completions.create.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from src.core.ollama_client import OllamaClient
+from src.core.summarizer import Summarizer
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """Udaje Ollamę: /api/tags zwraca jeden model, /api/generate - skrót promptu."""
+
+    def __init__(self):
+        self.prompts = []
+        self.tags_calls = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, timeout=None):
+        self.tags_calls += 1
+        return FakeResponse({"models": [{"name": "llama3"}]})
+
+    def post(self, url, json=None, stream=False, timeout=None):
+        with self.lock:
+            self.prompts.append(json["prompt"])
+        first_line = json["prompt"].split("\n", 1)[0]
+        return FakeResponse({"response": f"STRESZCZENIE<{first_line[:40]}>"})
+
+
+class TestSummarizer(unittest.TestCase):
+    def setUp(self):
+        self.summarizer = Summarizer(MagicMock(), threading.Event(), MagicMock(), max_workers=3)
+        self.summarizer.cache.clear()
+        self.session = FakeSession()
+        self.summarizer.client = OllamaClient("localhost:11434", models_ttl=60, session=self.session)
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "wyklad.txt")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(" ".join(f"zdanie{i}." for i in range(6000)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_long_file_is_fully_summarized(self):
+        result = self.summarizer.summarize_from_file(self.path, max_chars=10000, style="Krótkie")
+
+        self.assertTrue(result.startswith("STRESZCZENIE<"))
+        map_prompts = [p for p in self.session.prompts if p.startswith("Streść")]
+        self.assertGreater(len(map_prompts), 1)
+        # Koniec pliku też trafił do modelu (brak obcinania do max_chars)
+        self.assertTrue(any("zdanie5999." in p for p in map_prompts))
+        self.assertTrue(self.session.prompts[-1].startswith("Napisz krótkie streszczenie"))
+
+    def test_style_change_reuses_cached_chunk_summaries(self):
+        self.summarizer.summarize_from_file(self.path, max_chars=10000, style="Krótkie")
+        calls = len(self.session.prompts)
+
+        self.summarizer.summarize_from_file(self.path, max_chars=10000, style="Szczegółowe")
+        self.assertEqual(len(self.session.prompts), calls + 1)
+
+    def test_short_file_single_call(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("krótki tekst")
+        self.summarizer.summarize_from_file(self.path)
+        self.assertEqual(len(self.session.prompts), 1)
+
+    def test_model_discovery_is_cached(self):
+        for _ in range(3):
+            self.assertEqual(self.summarizer.check_ollama_status(), (True, "Dostępny (1 modeli)"))
+            self.summarizer.summarize_text("tekst")
+        self.assertEqual(self.session.tags_calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import io
+import random
+import re
+import unittest
+
+from src.core.text_cleaner import TranscriptCleaner, clean_transcript, clean_transcript_with_timeline
+from src.utils.text_processing import split_with_time_ranges
+
+
+def legacy_clean_transcript(text: str) -> str:
+    """Poprzednia implementacja (3 przebiegi re.sub) - wzorzec do porównań."""
+    text = re.sub(r'\[\d{2,3}:\d{2}\s->\s\d{2,3}:\d{2}\]', '', text)
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    text = ' '.join(lines)
+    text = re.sub(r'\s(yhh|yyy|no wiesz)\s', ' ', text, flags=re.IGNORECASE)
+    return text
+
+
+def random_transcript(rng: random.Random, n_lines: int, adjacent: bool = False) -> str:
+    words = ["narzędzie", "Maltego", "wiesz", "nie", "OSINT", "yh", "yyyy", "dane,", "VPN."]
+    fillers = ["yhh", "YYY", "no wiesz", "Yhh"]
+    lines = []
+    for i in range(n_lines):
+        tokens = []
+        last_filler = False
+        for _ in range(rng.randint(0, 12)):
+            # Wtrącenia nigdy nie sąsiadują (tam stare zachowanie było błędne)
+            if (adjacent or not last_filler) and rng.random() < 0.25:
+                tokens.append(rng.choice(fillers))
+                last_filler = True
+            else:
+                tokens.append(rng.choice(words))
+                last_filler = False
+        prefix = f"[{i // 60:02d}:{i % 60:02d} -> {i // 60:02d}:{(i + 1) % 60:02d}] " if rng.random() < 0.7 else ""
+        lines.append(rng.choice(["", "  "]) + prefix + " ".join(tokens) + rng.choice(["", " ", "\t"]))
+        if tokens and tokens[-1] in fillers and not adjacent:
+            # Linia kończąca się wtrąceniem + następna zaczynająca się wtrąceniem to też sąsiedztwo
+            lines.append("słowo")
+    return "\n".join(lines)
+
+
+class TestTranscriptCleaner(unittest.TestCase):
+    def test_matches_legacy_output(self):
+        rng = random.Random(1234)
+        for flush_size in (1, 7, 64, 64 * 1024):
+            cleaner = TranscriptCleaner(flush_size=flush_size)
+            for _ in range(50):
+                text = random_transcript(rng, rng.randint(0, 40))
+                self.assertEqual(cleaner.clean(text), legacy_clean_transcript(text))
+
+    def test_small_flush_matches_single_pass(self):
+        # Wtrącenia także w sąsiednich liniach; bufory krótsze niż lookahead
+        rng = random.Random(4321)
+        for flush_size in (1, 2, 4, 7, 16):
+            cleaner = TranscriptCleaner(flush_size=flush_size)
+            for _ in range(50):
+                text = random_transcript(rng, rng.randint(0, 20), adjacent=True)
+                self.assertEqual(cleaner.clean(text), clean_transcript(text))
+        self.assertEqual(TranscriptCleaner(flush_size=4).clean("wiesz\nno\nwiesz\nma"), "wiesz ma")
+
+    def test_adjacent_fillers_removed(self):
+        text = "[00:01 -> 00:04] to jest yhh yhh yyy narzędzie\nno wiesz yhh Maltego"
+        self.assertEqual(clean_transcript(text), "to jest narzędzie Maltego")
+
+    def test_stream_from_file_handle(self):
+        text = "[00:01 -> 00:04] pierwsza linia yhh\n\n  druga linia  \n"
+        out = io.StringIO()
+        TranscriptCleaner(flush_size=4).clean_stream(io.StringIO(text), out)
+        self.assertEqual(out.getvalue(), "pierwsza linia druga linia")
+
+    def test_custom_lexicon(self):
+        cleaner = TranscriptCleaner(language="en", extra_fillers=["like"])
+        self.assertEqual(cleaner.clean("so um it is like really uh good"), "so it is really good")
+        self.assertEqual(TranscriptCleaner(fillers=[]).clean("a yhh b"), "a yhh b")
+
+
+class TestTranscriptTimeline(unittest.TestCase):
+    def setUp(self):
+        # Każde słowo niesie numer segmentu, więc zakres fragmentu da się sprawdzić z tekstu
+        self.raw = "".join(
+            f"[{i // 60:02d}:{i % 60:02d} -> {(i + 5) // 60:02d}:{(i + 5) % 60:02d}] "
+            f"yyy s{i}a s{i}b s{i}c no wiesz\n"
+            for i in range(0, 300, 5)
+        )
+
+    @staticmethod
+    def fmt(seconds: int) -> str:
+        return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+    def test_text_matches_clean_transcript(self):
+        text, timeline = clean_transcript_with_timeline(self.raw)
+        self.assertEqual(text, clean_transcript(self.raw))
+        self.assertEqual(len(timeline), 60)
+
+    def test_anchors_point_at_segment_text(self):
+        text, timeline = clean_transcript_with_timeline(self.raw)
+        for offset, start in list(zip(timeline.offsets, timeline.starts))[1:]:
+            minutes, seconds = map(int, start.split(":"))
+            self.assertTrue(text[offset:].startswith(f"s{minutes * 60 + seconds}a "))
+
+    def test_chunks_get_exact_time_ranges(self):
+        text, timeline = clean_transcript_with_timeline(self.raw)
+        chunks = split_with_time_ranges(text, timeline, chunk_size=200, chunk_overlap=40)
+        self.assertGreater(len(chunks), 3)
+        for chunk, time_range in chunks[1:]:
+            segments = [int(n) for n in re.findall(r"s(\d+)[abc]", chunk)]
+            self.assertEqual(time_range, f"{self.fmt(segments[0])} -> {self.fmt(segments[-1] + 5)}")
+
+    def test_no_timestamps_gives_no_range(self):
+        text, timeline = clean_transcript_with_timeline("bez znaczników czasu\nyyy druga linia")
+        self.assertEqual(split_with_time_ranges(text, timeline), [(text, None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
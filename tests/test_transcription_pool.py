@@ -0,0 +1,84 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from src.core import transcription_pool
+from src.core.transcription_pool import TranscriptionPool, WorkerSpec, plan_workers
+
+
+def fake_task(index, path, language, output_format):
+    """Zastępuje transkrypcję w procesie roboczym (musi być picklowalna)."""
+    if path.endswith("broken.mp3"):
+        raise RuntimeError("uszkodzony plik")
+    events = transcription_pool._worker["events"]
+    events.put(("progress", index, 50.0))
+    events.put(("log", f"{path} na {transcription_pool._worker['spec'].label}"))
+    events.put(("progress", index, 100.0))
+    return f"{path}.{output_format}", f"{path}.json"
+
+
+class TestPlanWorkers(unittest.TestCase):
+    def test_one_worker_per_gpu(self):
+        specs = plan_workers(device="cuda", gpu_count=3, cpu_count=16)
+        self.assertEqual([(s.device, s.device_index) for s in specs], [("cuda", 0), ("cuda", 1), ("cuda", 2)])
+
+    def test_gpu_limit_and_oversubscription(self):
+        specs = plan_workers(max_workers=3, device="cuda", gpu_count=2, workers_per_gpu=2)
+        self.assertEqual([s.device_index for s in specs], [0, 1, 0])
+
+    def test_cpu_splits_cores_between_processes(self):
+        specs = plan_workers(device="cpu", cpu_count=16, cpu_threads=4)
+        self.assertEqual(len(specs), 4)
+        self.assertTrue(all(s.cpu_threads == 4 for s in specs))
+
+        specs = plan_workers(max_workers=2, device="cpu", cpu_count=16, cpu_threads=4)
+        self.assertEqual([s.cpu_threads for s in specs], [8, 8])
+
+    def test_cuda_without_gpus_falls_back_to_cpu(self):
+        specs = plan_workers(device="cuda", gpu_count=0, cpu_count=2, cpu_threads=4)
+        self.assertEqual([(s.device, s.cpu_threads) for s in specs], [("cpu", 2)])
+
+
+class TestTranscriptionPool(unittest.TestCase):
+    def test_results_in_order_with_aggregated_progress(self):
+        progress = []
+        logger = MagicMock()
+        pool = TranscriptionPool(
+            logger, threading.Event(), lambda p, stage="": progress.append(p),
+            specs=[WorkerSpec("cpu", cpu_threads=1), WorkerSpec("cpu", cpu_threads=1)],
+            task=fake_task,
+        )
+        files = [f"f{i}.mp3" for i in range(5)] + ["broken.mp3"]
+        results = pool.transcribe_files(files, language="pl", output_format="txt")
+
+        self.assertEqual([r["file"] for r in results], files)
+        self.assertEqual([r["output"] for r in results[:5]], [f"f{i}.mp3.txt" for i in range(5)])
+        self.assertIn("uszkodzony plik", results[5]["error"])
+        self.assertIsNone(results[5]["output"])
+
+        # 5 z 6 plików ukończonych -> średni postęp 5/6
+        self.assertAlmostEqual(max(progress), 500 / 6)
+        self.assertEqual(progress, sorted(progress))
+        logged = " ".join(str(c.args[0]) for c in logger.log.call_args_list)
+        self.assertIn("f0.mp3 na CPU x1", logged)
+
+    def test_progress_spans_consecutive_runs(self):
+        # Jak transcribe_long: pierwsze okno osobno (wykrycie języka), reszta w drugim przebiegu
+        progress = []
+        pool = TranscriptionPool(
+            MagicMock(), threading.Event(), lambda p, stage="": progress.append(p),
+            specs=[WorkerSpec("cpu", cpu_threads=1)], task=fake_task,
+        )
+        files = ["a.mp3", "b.mp3", "c.mp3"]
+        with pool:
+            pool._progress = [0.0] * len(files)
+            outcomes = pool._run(fake_task, files[:1], files, "pl", "txt")
+            outcomes += pool._run(fake_task, files[1:], files, "pl", "txt", start=1)
+
+        self.assertEqual([value[0] for value, _ in outcomes], [f"{f}.txt" for f in files])
+        self.assertEqual(progress, sorted(progress))
+        self.assertAlmostEqual(progress[-1], 100.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
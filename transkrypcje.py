@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Punkt wejścia CLI: python transkrypcje.py <download|transcribe|extract|write|tag|export|batch> ...
+Szczegóły: python transkrypcje.py --help (implementacja w src/cli.py).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())